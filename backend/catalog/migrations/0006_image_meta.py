@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_catalogitem_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cataloggalleryimage',
+            name='image_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='catalogitem',
+            name='cover_image_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_image_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogitem',
+            name='pdf_file_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 
 class CatalogItem(models.Model):
+    TRANSLATED_FIELDS = ("title", "short_description", "content")
+    DERIVED_IMAGE_FIELDS = {"cover_image": "cover_image_meta"}
+    PDF_PREVIEW_FIELDS = {"pdf_file": "pdf_file_meta"}
+
     slug = models.SlugField(unique=True)
     title_uk = models.CharField(max_length=255)
     title_en = models.CharField(max_length=255, blank=True, default="")
@@ -10,27 +14,35 @@ class CatalogItem(models.Model):
     content_en = models.TextField(blank=True, default="")
 
     cover_image = models.ImageField(upload_to="catalog/covers/", blank=True, null=True)
+    cover_image_meta = models.JSONField(default=dict, blank=True, editable=False)
     pdf_file = models.FileField(upload_to="catalog/pdfs/", blank=True, null=True)
+    pdf_file_meta = models.JSONField(default=dict, blank=True, editable=False)
     # Додамо PDF у пункті 2
     # category додамо у пункті 3
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title_uk
 
 
 class CatalogGalleryImage(models.Model):
+    TRANSLATED_FIELDS = ("caption",)
+    DERIVED_IMAGE_FIELDS = {"image": "image_meta"}
+
     item = models.ForeignKey(
         CatalogItem,
         related_name="gallery",
         on_delete=models.CASCADE
     )
     image = models.ImageField(upload_to="catalog/gallery/")
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
     caption_uk = models.CharField(max_length=255, blank=True, default="")
     caption_en = models.CharField(max_length=255, blank=True, default="")
     order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["order", "id"]
@@ -1,35 +1,46 @@
 from rest_framework import serializers
+from core.projection import ProjectionMixin
+from uploads.fields import DocumentInfoField, ImageInfoField, MediaUrlField, SrcsetField
+from uploads.media import MediaUrlMixin
 from .models import CatalogItem, CatalogGalleryImage
 
-class CatalogGalleryImageSerializer(serializers.ModelSerializer):
-    image_url = serializers.SerializerMethodField()
+class CatalogGalleryImageSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
+    image_url = MediaUrlField("image")
+    image_srcset = SrcsetField("image")
+    image_info = ImageInfoField("image")
 
     class Meta:
         model = CatalogGalleryImage
-        fields = ["id", "order", "caption_uk", "caption_en", "image_url"]
+        fields = ["id", "order", "caption_uk", "caption_en", "image_url", "image_srcset", "image_info"]
+        column_sources = {"image_url": "image", "image_srcset": "image_meta", "image_info": "image_meta"}
 
-    def get_image_url(self, obj):
-        return obj.image.url if obj.image else None
 
-
-class CatalogItemListSerializer(serializers.ModelSerializer):
-    cover_image_url = serializers.SerializerMethodField()
+class CatalogItemListSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
+    cover_image_url = MediaUrlField("cover_image")
+    cover_image_srcset = SrcsetField("cover_image")
+    cover_image_info = ImageInfoField("cover_image")
 
     class Meta:
         model = CatalogItem
         fields = [
             "id", "slug", "title_uk", "title_en",
             "short_description_uk", "short_description_en",
-            "cover_image_url",
+            "cover_image_url", "cover_image_srcset", "cover_image_info",
         ]
-
-    def get_cover_image_url(self, obj):
-        return obj.cover_image.url if obj.cover_image else None
+        column_sources = {
+            "cover_image_url": "cover_image",
+            "cover_image_srcset": "cover_image_meta",
+            "cover_image_info": "cover_image_meta",
+        }
 
 
-class CatalogItemDetailSerializer(serializers.ModelSerializer):
-    cover_image_url = serializers.SerializerMethodField()
-    pdf_url = serializers.SerializerMethodField()
+class CatalogItemDetailSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
+    cover_image_url = MediaUrlField("cover_image")
+    cover_image_srcset = SrcsetField("cover_image")
+    cover_image_info = ImageInfoField("cover_image")
+    pdf_url = MediaUrlField("pdf_file")
+    pdf_preview = SrcsetField("pdf_file")
+    pdf_info = DocumentInfoField("pdf_file")
     gallery = CatalogGalleryImageSerializer(many=True, read_only=True)
 
     class Meta:
@@ -39,13 +50,19 @@ class CatalogItemDetailSerializer(serializers.ModelSerializer):
             "short_description_uk", "short_description_en",
             "content_uk", "content_en",
             "cover_image_url",
+            "cover_image_srcset",
+            "cover_image_info",
             "pdf_url",
+            "pdf_preview",
+            "pdf_info",
             "gallery",
             "is_active", "created_at",
         ]
-
-    def get_cover_image_url(self, obj):
-        return obj.cover_image.url if obj.cover_image else None
-
-    def get_pdf_url(self, obj):
-        return obj.pdf_file.url if getattr(obj, "pdf_file", None) else None
\ No newline at end of file
+        column_sources = {
+            "cover_image_url": "cover_image",
+            "cover_image_srcset": "cover_image_meta",
+            "cover_image_info": "cover_image_meta",
+            "pdf_url": "pdf_file",
+            "pdf_preview": "pdf_file_meta",
+            "pdf_info": "pdf_file_meta",
+        }
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_on_commit
+from .models import CatalogItem, CatalogGalleryImage
+
+
+@receiver(pre_save, sender=CatalogItem)
+def remember_previous_slug(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._previous_slug = (
+        CatalogItem.objects.filter(pk=instance.pk).values_list("slug", flat=True).first() or instance.slug
+    )
+
+
+@receiver([post_save, post_delete], sender=CatalogItem)
+def catalog_item_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slugs = {instance.slug, getattr(instance, "_previous_slug", instance.slug)}
+    invalidate_on_commit("catalog", *(f"catalog:{slug}" for slug in slugs))
+
+
+@receiver([post_save, post_delete], sender=CatalogGalleryImage)
+def catalog_gallery_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slug = CatalogItem.objects.filter(pk=instance.item_id).values_list("slug", flat=True).first()
+    if slug:
+        invalidate_on_commit(f"catalog:{slug}")
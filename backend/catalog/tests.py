@@ -1,3 +1,115 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import CatalogItem, CatalogGalleryImage
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item = CatalogItem.objects.create(slug="park", title_uk="Парк", title_en="Park")
+
+    @override_settings(MEDIA_WORKERS=0)
+    def test_gallery_change_invalidates_detail_only(self):
+        detail = reverse("catalog-items-detail", args=["park"])
+        listing = reverse("catalog-items-list")
+        self.client.get(detail)
+        self.client.get(listing)
+
+        # The file does not exist, so no derivatives are generated
+        with self.assertLogs("uploads.derivatives", "WARNING"), self.captureOnCommitCallbacks(execute=True):
+            CatalogGalleryImage.objects.create(item=self.item, image="catalog/gallery/a.jpg")
+
+        response = self.client.get(detail)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["gallery"]), 1)
+        self.assertEqual(self.client.get(listing)["X-Cache"], "HIT")
+
+    def test_deactivating_item_invalidates_list(self):
+        listing = reverse("catalog-items-list")
+        self.assertEqual(len(self.client.get(listing).json()["results"]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.is_active = False
+            self.item.save()
+        self.assertEqual(self.client.get(listing).json()["results"], [])
+
+
+class CatalogConditionalGetTest(TestCase):
+    def test_gallery_change_invalidates_etag(self):
+        item = CatalogItem.objects.create(slug="park", title_uk="Парк")
+        url = reverse("catalog-items-detail", args=["park"])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        CatalogGalleryImage.objects.create(item=item, image="catalog/gallery/a.jpg")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(API_THROTTLE_STORE="core.throttling.LocalBucketStore")
+class CatalogLanguageProjectionTest(TestCase):
+    def test_detail_projects_item_and_gallery(self):
+        item = CatalogItem.objects.create(slug="park", title_uk="Парк", title_en="Park", content_uk="<p>Текст</p>")
+        CatalogGalleryImage.objects.create(item=item, image="catalog/gallery/a.jpg", caption_uk="Фото")
+
+        data = self.client.get(reverse("catalog-items-detail", args=["park"]), {"lang": "en"}).json()
+        self.assertEqual(data["title_en"], "Park")
+        self.assertEqual(data["content_en"], "<p>Текст</p>")
+        self.assertNotIn("content_uk", data)
+        self.assertEqual(data["gallery"][0]["caption_en"], "Фото")
+        self.assertNotIn("caption_uk", data["gallery"][0])
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_expand_skips_gallery(self):
+        item = CatalogItem.objects.create(slug="hall", title_uk="Зал")
+        CatalogGalleryImage.objects.create(item=item, image="catalog/gallery/a.jpg")
+        url = reverse("catalog-items-detail", args=["hall"])
+
+        with self.assertNumQueries(2):  # validator + item
+            data = self.client.get(url, {"expand": "", "fields": "slug,title_uk,gallery"}).json()
+        self.assertEqual(data, {"slug": "hall", "title_uk": "Зал"})
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE="core.throttling.LocalBucketStore")
+class CatalogCompiledSerializerTest(TestCase):
+    def setUp(self):
+        variants = [{"name": "derived/c/320.webp", "format": "webp", "width": 320, "height": 180}]
+        meta = {"version": 2, "width": 1600, "height": 900, "bytes": 4096, "color": "#101010", "variants": variants}
+        for index in range(3):
+            CatalogItem.objects.create(
+                slug=f"item-{index}", title_uk=f"Товар {index}", title_en="" if index else "Item",
+                cover_image=f"catalog/covers/{index}.jpg" if index else "", cover_image_meta=meta,
+            )
+        item = CatalogItem.objects.get(slug="item-0")
+        item.pdf_file = "catalog/pdfs/brochure.pdf"
+        item.pdf_file_meta = {"bytes": 8192, "pages": 2, "variants": variants}
+        item.save()
+        CatalogGalleryImage.objects.create(item=item, image="catalog/gallery/b.jpg", image_meta=meta, order=1)
+        CatalogGalleryImage.objects.create(item=item, image="catalog/gallery/a.jpg", caption_uk="Фото", order=0)
+
+    def test_responses_are_byte_identical(self):
+        for url, params in (
+            (reverse("catalog-items-list"), None),
+            (reverse("catalog-items-list"), {"lang": "en", "page_size": 2}),
+            (reverse("catalog-items-detail", args=["item-0"]), None),
+            (reverse("catalog-items-detail", args=["item-0"]), {"lang": "en", "fields": "slug,pdf_info,gallery.caption_en"}),
+        ):
+            with self.subTest(url=url, params=params):
+                with self.settings(API_COMPILED_SERIALIZERS=False):
+                    expected = self.client.get(url, params)
+                with mock.patch.object(serializers.Serializer, "to_representation", side_effect=AssertionError):
+                    compiled = self.client.get(url, params)
+                self.assertEqual(expected.status_code, 200)
+                self.assertEqual(compiled.content, expected.content)
+
+    def test_unknown_slug_is_404(self):
+        self.assertEqual(self.client.get(reverse("catalog-items-detail", args=["missing"])).status_code, 404)
+
+    def test_list_streams_every_item(self):
+        url = reverse("catalog-items-list")
+        with self.settings(API_STREAM_CHUNK_SIZE=2):
+            response = self.client.get(url, {"stream": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), self.client.get(url, {"page_size": 100}).content)
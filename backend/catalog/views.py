@@ -1,16 +1,67 @@
+from django.db.models import Count, Max, Prefetch
 from rest_framework.generics import ListAPIView, RetrieveAPIView
-from .models import CatalogItem
+from core.cache import CachedResponseMixin
+from core.compiled import CompiledSerializerMixin
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from core.streaming import StreamingListMixin
+from core.projection import ProjectionViewMixin, load_only, project_language
+from .models import CatalogItem, CatalogGalleryImage
 from .serializers import (
+    CatalogGalleryImageSerializer,
     CatalogItemListSerializer,
     CatalogItemDetailSerializer,
 )
 
-class CatalogItemListAPIView(ListAPIView):
+class CatalogItemListAPIView(ProjectionViewMixin, ConditionalGetMixin, CachedResponseMixin, StreamingListMixin,
+                             CompiledSerializerMixin, ListAPIView):
     queryset = CatalogItem.objects.filter(is_active=True)
     serializer_class = CatalogItemListSerializer
+    authentication_classes = []
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
+    cache_tags = ("catalog",)
 
+    def get_queryset(self):
+        spec = self.get_field_spec()
+        queryset = load_only(super().get_queryset(), spec, self.serializer_class)
+        return project_language(queryset, spec=spec, **self.get_language_options())
 
-class CatalogItemDetailAPIView(RetrieveAPIView):
+    def get_validator_state(self):
+        # No Last-Modified: a deleted row leaves Max(updated_at) as it was, only the count changes
+        return None, CatalogItem.objects.filter(is_active=True).aggregate(updated=Max("updated_at"), count=Count("id"))
+
+
+class CatalogItemDetailAPIView(ProjectionViewMixin, ConditionalGetMixin, CachedResponseMixin, CompiledSerializerMixin, RetrieveAPIView):
     queryset = CatalogItem.objects.filter(is_active=True)
     serializer_class = CatalogItemDetailSerializer
-    lookup_field = "slug"
\ No newline at end of file
+    authentication_classes = []
+    lookup_field = "slug"
+
+    def get_queryset(self):
+        spec, options = self.get_field_spec(), self.get_language_options()
+        queryset = load_only(super().get_queryset(), spec, self.serializer_class)
+        queryset = project_language(queryset, spec=spec, **options)
+        if not (spec.includes("gallery") and spec.expands("gallery")):
+            return queryset
+        node = spec.child("gallery")
+        gallery = load_only(CatalogGalleryImage.objects.all(), node, CatalogGalleryImageSerializer, required=("item",))
+        gallery = project_language(gallery, spec=node, **options)
+        return queryset.prefetch_related(Prefetch("gallery", queryset=gallery))
+
+    def get_cache_tags(self):
+        return (f"catalog:{self.kwargs['slug']}",)
+
+    def get_validator_state(self):
+        state = (
+            CatalogItem.objects.filter(slug=self.kwargs["slug"], is_active=True)
+            .values("pk")
+            .annotate(
+                item_updated=Max("updated_at"),
+                gallery_updated=Max("gallery__updated_at"),
+                gallery_count=Count("gallery"),
+            )
+            .first()
+        )
+        # Deleting a gallery image only shows in the count: no Last-Modified
+        return (None, state) if state is not None else None
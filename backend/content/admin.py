@@ -1,5 +1,7 @@
 from django.contrib import admin
 from django import forms
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import format_html
 from adminsortable2.admin import SortableAdminMixin, SortableInlineAdminMixin
 from .models import (
@@ -7,8 +9,12 @@ from .models import (
     SummaryPage, AdvantagesPage, InfrastructurePage, TourismPage, InternationalPage, EducationPage,
     IndustryPage, AgriculturePage, MineralsPage, EnergyPage, EconomyMainPage,
     OpportunitiesPage, CatalogPage, TastingHallsPage, ProjectsPage, TaxationPage, ParksPage, RelocatedPage, ITPage,
-    Page, PageSection, PageSectionItem, PageSectionItemImage  # New models
+    Page, PageSection, PageSectionItem, PageSectionItemImage,  # New models
+    ContactMessage,
 )
+from . import outbox
+from .queries import with_section_count
+from .signals import refresh_page_tree
 
 class SinglePageAdmin(admin.ModelAdmin):
     """
@@ -127,6 +133,22 @@ class ITPageAdmin(SinglePageAdmin): pass
 # NEW DYNAMIC PAGE ADMIN
 # ===========================================
 
+class PageTreeSortableAdminMixin(SortableAdminMixin):
+    """
+    Drag-and-drop reordering is saved with bulk_update, which sends no model
+    signals and skips auto_now, so bump updated_at (used for ETags) and
+    refresh the affected page snapshots and caches explicitly.
+    """
+    def _update_order(self, updated_items, extra_model_filters):
+        with transaction.atomic():
+            num_updated = super()._update_order(updated_items, extra_model_filters)
+            moved = self.model.objects.filter(pk__in=[item[0] for item in updated_items])
+            moved.update(updated_at=timezone.now())
+            for obj in moved:
+                refresh_page_tree(obj)
+        return num_updated
+
+
 class PageSectionItemImageInline(SortableInlineAdminMixin, admin.TabularInline):
     """Inline for managing multiple images for a section item (gallery)"""
     model = PageSectionItemImage
@@ -181,7 +203,7 @@ class PageSectionInline(SortableInlineAdminMixin, admin.StackedInline):
 
 
 @admin.register(Page)
-class PageAdmin(SortableAdminMixin, admin.ModelAdmin):
+class PageAdmin(PageTreeSortableAdminMixin, admin.ModelAdmin):
     """Admin for dynamic pages with sortable ordering"""
     list_display = ('title_uk', 'slug', 'menu_category', 'order', 'section_count', 'is_active', 'show_in_menu', 'updated_at')
     list_editable = ('is_active', 'show_in_menu', 'menu_category')
@@ -207,14 +229,18 @@ class PageAdmin(SortableAdminMixin, admin.ModelAdmin):
             'all': ('admin/css/ckeditor_fix.css',)
         }
     
+    def get_queryset(self, request):
+        return with_section_count(super().get_queryset(request))
+
     def section_count(self, obj):
         """Show number of sections for this page"""
-        return obj.sections.count()
+        return obj.section_count
     section_count.short_description = 'Секцій'
+    section_count.admin_order_field = 'section_count'
 
 
 @admin.register(PageSection)
-class PageSectionAdmin(SortableAdminMixin, admin.ModelAdmin):
+class PageSectionAdmin(PageTreeSortableAdminMixin, admin.ModelAdmin):
     """Standalone admin for page sections with nested items"""
     list_display = ('page', 'section_type', 'title_uk', 'order')
     list_filter = ('section_type', 'page')
@@ -226,7 +252,7 @@ class PageSectionAdmin(SortableAdminMixin, admin.ModelAdmin):
             'all': ('admin/css/ckeditor_fix.css',)
         }
 @admin.register(PageSectionItem)
-class PageSectionItemAdmin(SortableAdminMixin, admin.ModelAdmin):
+class PageSectionItemAdmin(PageTreeSortableAdminMixin, admin.ModelAdmin):
     """Standalone admin for section items (PDFs, cards)"""
     list_display = ('title_uk', 'get_section_title', 'get_page_title', 'order')
     list_filter = ('section__page', 'section')
@@ -245,3 +271,19 @@ class PageSectionItemAdmin(SortableAdminMixin, admin.ModelAdmin):
     def get_page_title(self, obj):
         return obj.section.page.title_uk
     get_page_title.short_description = 'Сторінка'
+
+
+@admin.register(ContactMessage)
+class ContactMessageAdmin(admin.ModelAdmin):
+    """Contact outbox: delivery status of form submissions"""
+    list_display = ('name', 'email', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('name', 'email', 'message')
+    readonly_fields = ('recipients', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry_now']
+
+    @admin.action(description='Відправити ще раз')
+    def retry_now(self, request, queryset):
+        queryset.update(status=ContactMessage.PENDING, next_attempt_at=timezone.now())
+        # An idle worker sleeps until notified
+        transaction.on_commit(outbox.notify)
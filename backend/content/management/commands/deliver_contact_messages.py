@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from content.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Send the contact messages waiting in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages per SMTP connection")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox")
+        parser.add_argument("--interval", type=float, default=10, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_pending(options["batch_size"])
+            if sent or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} contact message(s)"))
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content.snapshots import rebuild_all_snapshots
+
+
+class Command(BaseCommand):
+    help = "Re-render the stored JSON snapshots for all active dynamic pages"
+
+    def handle(self, *args, **options):
+        count = rebuild_all_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} page snapshot(s)"))
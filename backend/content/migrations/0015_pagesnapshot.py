@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_pagesectionitem_button_text_en_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('payload', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='content.page')),
+            ],
+            options={
+                'verbose_name': 'Знімок сторінки',
+                'verbose_name_plural': 'Знімки сторінок',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_pagesectionitemimage_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagesnapshot',
+            name='payload_en',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='pagesnapshot',
+            name='payload_uk',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_pagesnapshot_payload_languages'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['order', 'title_uk', 'id'], name='page_order_title_id_idx'),
+        ),
+    ]
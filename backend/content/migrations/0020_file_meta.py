@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0019_image_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagesectionitem',
+            name='file_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
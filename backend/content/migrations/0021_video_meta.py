@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0020_file_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagesection',
+            name='video_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 16:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0021_video_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name="Ім'я")),
+                ('email', models.EmailField(max_length=254, verbose_name='Email')),
+                ('message', models.TextField(verbose_name='Повідомлення')),
+                ('recipients', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pending', 'Очікує відправки'), ('sent', 'Відправлено'), ('failed', 'Не вдалося відправити')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Спроби')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, verbose_name='Остання помилка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Створено')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Відправлено')),
+            ],
+            options={
+                'verbose_name': 'Повідомлення з форми',
+                'verbose_name_plural': 'Повідомлення з форми',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='contact_outbox_due_idx')],
+            },
+        ),
+    ]
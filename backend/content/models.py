@@ -1,7 +1,11 @@
 from django.db import models
+from django.utils import timezone
 from django_ckeditor_5.fields import CKEditor5Field
 
 class PageContent(models.Model):
+    TRANSLATED_FIELDS = ('title', 'content')
+    DERIVED_IMAGE_FIELDS = {'image': 'image_meta'}
+
     slug = models.SlugField(unique=True, help_text="Unique identifier for the page")
     
     title_uk = models.CharField(max_length=200, verbose_name="Title (Ukrainian)")
@@ -11,6 +15,7 @@ class PageContent(models.Model):
     content_en = CKEditor5Field(verbose_name="Content (English)", blank=True, config_name="default")
     
     image = models.ImageField(upload_to='page_images/', blank=True, null=True)
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
     
     SECTION_CHOICES = [
         ('general', 'General'),
@@ -185,6 +190,8 @@ class EconomyMainPage(PageContent):
 
 class Page(models.Model):
     """Dynamic page that can be created from admin"""
+    TRANSLATED_FIELDS = ('title', 'description')
+
     slug = models.SlugField(unique=True, max_length=100, help_text="URL-friendly identifier")
     
     title_uk = models.CharField(max_length=200, verbose_name="Назва (українською)")
@@ -216,6 +223,10 @@ class Page(models.Model):
     
     class Meta:
         ordering = ['order', 'title_uk']
+        indexes = [
+            # Keyset pagination of /api/pages/
+            models.Index(fields=['order', 'title_uk', 'id'], name='page_order_title_id_idx'),
+        ]
         verbose_name = "Сторінка"
         verbose_name_plural = "Динамічні сторінки"
     
@@ -228,6 +239,10 @@ class Page(models.Model):
 
 class PageSection(models.Model):
     """Content section within a page"""
+    TRANSLATED_FIELDS = ('title', 'content')
+    DERIVED_IMAGE_FIELDS = {'image': 'image_meta'}
+    VIDEO_POSTER_FIELDS = {'video': 'video_meta'}
+
     SECTION_TYPE_CHOICES = [
         ('hero', 'Hero (Full-screen Video/Image)'),
         ('text', 'Текстовий контент'),
@@ -253,7 +268,9 @@ class PageSection(models.Model):
     # Media fields
     # Media fields
     image = models.ImageField(upload_to='section_images/', blank=True, null=True, verbose_name="Зображення")
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
     video = models.FileField(upload_to='section_videos/', blank=True, null=True, verbose_name="Відео")
+    video_meta = models.JSONField(default=dict, blank=True, editable=False)
     
     # For embeds (YouTube, maps, etc.)
     embed_code = models.TextField(blank=True, verbose_name="Код вбудовування")
@@ -277,6 +294,12 @@ class PageSection(models.Model):
 
 class PageSectionItem(models.Model):
     """Specific items within a section (e.g., cards in a grid)"""
+    TRANSLATED_FIELDS = ('title', 'description', 'content', 'button_text')
+    # An empty label means the frontend's default ('View Details'), not a missing translation
+    NO_FALLBACK_FIELDS = ('button_text',)
+    DERIVED_IMAGE_FIELDS = {'image': 'image_meta'}
+    PDF_PREVIEW_FIELDS = {'file': 'file_meta'}
+
     ITEM_TYPE_CHOICES = [
         ('card', 'Стандартна картка'),
         ('document', 'Документ (PDF/Файл)'),
@@ -296,7 +319,9 @@ class PageSectionItem(models.Model):
     content_en = CKEditor5Field(blank=True, verbose_name="Full Content (English)", config_name="default")
     
     image = models.ImageField(upload_to='item_images/', blank=True, null=True, verbose_name="Зображення")
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
     file = models.FileField(upload_to='item_files/', blank=True, null=True, verbose_name="Файл (PDF)")
+    file_meta = models.JSONField(default=dict, blank=True, editable=False)
     
     button_text_uk = models.CharField(max_length=100, blank=True, verbose_name="Текст кнопки (укр)", help_text="За замовчуванням: 'Детальніше'")
     button_text_en = models.CharField(max_length=100, blank=True, verbose_name="Button text (en)", help_text="Default: 'View Details'")
@@ -317,9 +342,13 @@ class PageSectionItem(models.Model):
 
 class PageSectionItemImage(models.Model):
     """Multiple images for a single section item (gallery)"""
+    DERIVED_IMAGE_FIELDS = {'image': 'image_meta'}
+
     item = models.ForeignKey(PageSectionItem, on_delete=models.CASCADE, related_name='images', verbose_name="Елемент")
     image = models.ImageField(upload_to='item_gallery/', verbose_name="Зображення")
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0, db_index=True, verbose_name="Порядок")
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order']
@@ -328,3 +357,54 @@ class PageSectionItemImage(models.Model):
 
     def __str__(self):
         return f"Image for {self.item.title_uk}"
+
+
+class PageSnapshot(models.Model):
+    """Pre-rendered JSON of a page tree, served by PageDetailView as-is"""
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, related_name='snapshot')
+    # Copied from the page so lookups by slug don't need a join
+    slug = models.SlugField(unique=True, max_length=100)
+    payload = models.BinaryField()
+    # Single-language projections (?lang=uk|en)
+    payload_uk = models.BinaryField(default=b'')
+    payload_en = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Знімок сторінки"
+        verbose_name_plural = "Знімки сторінок"
+
+    def __str__(self):
+        return self.slug
+
+
+class ContactMessage(models.Model):
+    """Contact form submission waiting in the outbox (see content.outbox)"""
+    PENDING, SENT, FAILED = 'pending', 'sent', 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Очікує відправки'),
+        (SENT, 'Відправлено'),
+        (FAILED, 'Не вдалося відправити'),
+    ]
+
+    name = models.CharField(max_length=200, verbose_name="Ім'я")
+    email = models.EmailField(verbose_name="Email")
+    message = models.TextField(verbose_name="Повідомлення")
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Спроби")
+    # Also serves as the lease of the worker currently sending it
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, verbose_name="Остання помилка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Створено")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Відправлено")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='contact_outbox_due_idx')]
+        verbose_name = "Повідомлення з форми"
+        verbose_name_plural = "Повідомлення з форми"
+
+    def __str__(self):
+        return f"{self.name} <{self.email}>"
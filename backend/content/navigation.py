@@ -0,0 +1,105 @@
+"""
+Pre-grouped site menu for /api/navigation/.
+
+The menu has three dropdowns (about, economy, investment). Each one lists
+the legacy PageContent proxy pages of that category, in admin order, and
+then the dynamic Pages filed under it with ``show_in_menu``. The whole tree
+costs two queries and is cached under the ``navigation`` tag, which
+content.signals invalidates whenever a Page or PageContent row changes.
+"""
+import re
+
+from django.apps import apps
+
+from .models import Page, PageContent
+
+MENU_CATEGORIES = [
+    # (key, SPA path, title_uk, title_en)
+    ('about', '/about', 'Про регіон', 'About'),
+    ('economy', '/economy', 'Економіка', 'Economy'),
+    ('investment', '/investment', 'Інвестиції', 'Investment'),
+]
+
+# SPA routes and English menu labels of the legacy proxy pages (the admin
+# labels are Ukrainian); proxies without a route of their own (the economy
+# landing page, unpublished pages) stay out of the menu.
+LEGACY_ROUTES = {
+    'about-summary': ('/summary', 'Summary'),
+    'about-advantages': ('/advantages', 'Advantages'),
+    'about-infrastructure': ('/infrastructure', 'Infrastructure'),
+    'about-tourism': ('/tourism', 'Tourism'),
+    'about-education': ('/education', 'Education'),
+    'economy-industry': ('/industry', 'Industry'),
+    'economy-agriculture': ('/agriculture', 'Agriculture'),
+    'economy-minerals': ('/minerals', 'Minerals'),
+    'economy-energy': ('/energy', 'Energy'),
+    'investment-opportunities': ('/opportunities', 'Opportunities'),
+    'investment-catalog': ('/catalog', 'Catalog'),
+    'investment-tasting-halls': ('/tasting-halls', 'Tasting Halls'),
+    'investment-projects': ('/projects', 'Projects'),
+    'investment-taxation': ('/taxation', 'Taxation'),
+    'investment-parks': ('/parks', 'Industrial Parks'),
+    'investment-relocated': ('/relocated-enterprises', 'Relocated Enterprises'),
+    'investment-it': ('/it', 'IT Sector'),
+}
+
+
+def legacy_pages():
+    """PageContent proxy models with a fixed slug, in declaration (admin) order."""
+    return [
+        model for model in apps.get_app_config('content').get_models()
+        if issubclass(model, PageContent) and getattr(model, 'FIXED_SLUG', None)
+    ]
+
+
+def _admin_label(model):
+    # verbose names are numbered for the admin index: "2. Переваги"
+    return re.sub(r'^\d+\.\s*', '', str(model._meta.verbose_name))
+
+
+def legacy_entries():
+    models = [model for model in legacy_pages() if model.FIXED_SLUG in LEGACY_ROUTES]
+    titles = {
+        row['slug']: row for row in PageContent.objects.filter(
+            slug__in=[model.FIXED_SLUG for model in models],
+        ).values('slug', 'title_uk', 'title_en')
+    }
+    for model in models:
+        row = titles.get(model.FIXED_SLUG, {})
+        path, label_en = LEGACY_ROUTES[model.FIXED_SLUG]
+        yield model.FIXED_SLUG.split('-', 1)[0], {
+            'slug': model.FIXED_SLUG,
+            'title_uk': row.get('title_uk') or _admin_label(model),
+            'title_en': row.get('title_en') or label_en,
+            'path': path,
+            'source': 'content',
+        }
+
+
+def page_entries():
+    pages = Page.objects.filter(
+        is_active=True, show_in_menu=True, menu_category__in=[key for key, *_ in MENU_CATEGORIES],
+    ).order_by('order', 'title_uk', 'id').values('slug', 'title_uk', 'title_en', 'menu_category')
+    for page in pages:
+        yield page['menu_category'], {
+            'slug': page['slug'],
+            'title_uk': page['title_uk'],
+            'title_en': page['title_en'],
+            'path': f"/pages/{page['slug']}",
+            'source': 'page',
+        }
+
+
+def build_navigation():
+    """The menu tree: ``{'categories': [{key, path, titles, children}, ...]}``."""
+    children = {key: [] for key, *_ in MENU_CATEGORIES}
+    for source in (legacy_entries(), page_entries()):
+        for key, entry in source:
+            if key in children:
+                children[key].append(entry)
+    return {
+        'categories': [
+            {'key': key, 'path': path, 'title_uk': title_uk, 'title_en': title_en, 'children': children[key]}
+            for key, path, title_uk, title_en in MENU_CATEGORIES
+        ]
+    }
@@ -0,0 +1,182 @@
+"""
+Outbox for contact form messages.
+
+ContactAPIView only stores the submission as a ContactMessage and answers
+202; delivery happens off the request path, depending on CONTACT_DELIVERY:
+
+* ``thread`` (default): one background thread per serving process,
+  started with the process (core.wsgi/core.asgi), drains the outbox, sleeps
+  until a retry falls due and is woken up by every new submission. Messages
+  left pending by a restart, deploy or crash (retries, expired leases) are
+  picked up as soon as a process starts.
+* ``command``: only ``manage.py deliver_contact_messages [--loop]`` sends,
+  e.g. from cron or a dedicated worker process.
+* ``inline``: sent right after the commit (tests, debugging).
+
+A run claims up to CONTACT_OUTBOX_BATCH_SIZE due messages by pushing their
+``next_attempt_at`` past a lease (so concurrent workers never pick the same
+row) and sends them over one SMTP connection. Failures are retried with
+exponential backoff (CONTACT_OUTBOX_RETRY_DELAY doubled per attempt, capped
+at CONTACT_OUTBOX_MAX_DELAY); after CONTACT_OUTBOX_MAX_ATTEMPTS the message
+is marked failed, keeping its last error for the admin.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import BadHeaderError, EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed message stays invisible to other workers
+LEASE = timedelta(minutes=5)
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def enqueue(name, email, message, recipients):
+    """Store a contact message and schedule its delivery once the transaction commits."""
+    contact = ContactMessage.objects.create(name=name, email=email, message=message, recipients=recipients)
+    transaction.on_commit(notify)
+    return contact
+
+
+def notify():
+    mode = settings.CONTACT_DELIVERY
+    if mode == 'inline':
+        deliver_pending()
+    elif mode == 'thread':
+        start_worker()
+        _wakeup.set()
+
+
+def start_drain():
+    """Start draining the outbox in this process (``thread`` mode only)."""
+    if settings.CONTACT_DELIVERY == 'thread':
+        start_worker()
+
+
+def build_email(contact, connection=None):
+    return EmailMessage(
+        subject=f"Contact form message from {contact.name} <{contact.email}>",
+        body=f"From: {contact.name} <{contact.email}>\n\n{contact.message}",
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@localhost'),
+        to=contact.recipients,
+        reply_to=[contact.email],
+        connection=connection,
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before attempt ``attempts + 1``."""
+    delay = settings.CONTACT_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.CONTACT_OUTBOX_MAX_DELAY))
+
+
+def claim(batch_size):
+    """Lease the next due messages to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            ContactMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=ContactMessage.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+        )
+        ids = list(due.values_list('pk', flat=True)[:batch_size])
+        ContactMessage.objects.filter(pk__in=ids).update(next_attempt_at=now + LEASE)
+    return list(ContactMessage.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def mark_sent(contact):
+    ContactMessage.objects.filter(pk=contact.pk).update(
+        status=ContactMessage.SENT, attempts=contact.attempts + 1, sent_at=timezone.now(), last_error='',
+    )
+
+
+def mark_failed(contact, error, permanent=False):
+    attempts = contact.attempts + 1
+    update = {'attempts': attempts, 'last_error': f'{type(error).__name__}: {error}'}
+    if permanent or attempts >= settings.CONTACT_OUTBOX_MAX_ATTEMPTS:
+        update['status'] = ContactMessage.FAILED
+        logger.error('Giving up on contact message %s: %s', contact.pk, update['last_error'])
+    else:
+        update['next_attempt_at'] = timezone.now() + retry_delay(attempts)
+    ContactMessage.objects.filter(pk=contact.pk).update(**update)
+
+
+def send_batch(contacts):
+    """Send ``contacts`` over one connection; returns how many were delivered."""
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        for contact in contacts:
+            mark_failed(contact, exc)
+        return 0
+
+    sent = 0
+    try:
+        for contact in contacts:
+            try:
+                connection.send_messages([build_email(contact, connection)])
+            except BadHeaderError as exc:
+                mark_failed(contact, exc, permanent=True)
+            except Exception as exc:
+                mark_failed(contact, exc)
+            else:
+                mark_sent(contact)
+                sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def deliver_pending(batch_size=None):
+    """Send every due message, batch by batch; returns how many were delivered."""
+    batch_size = batch_size or settings.CONTACT_OUTBOX_BATCH_SIZE
+    sent = 0
+    while True:
+        contacts = claim(batch_size)
+        if contacts:
+            sent += send_batch(contacts)
+        if len(contacts) < batch_size:
+            return sent
+
+
+def seconds_until_due():
+    """Seconds until the next pending message falls due, or None when the outbox is empty."""
+    due = ContactMessage.objects.filter(status=ContactMessage.PENDING).aggregate(due=Min('next_attempt_at'))['due']
+    if due is None:
+        return None
+    return max(0.0, (due - timezone.now()).total_seconds())
+
+
+def _work():
+    while True:
+        timeout = None
+        try:
+            deliver_pending()
+            timeout = seconds_until_due()
+        except Exception:
+            logger.exception('Contact outbox delivery failed')
+            timeout = settings.CONTACT_OUTBOX_RETRY_DELAY
+        finally:
+            connections.close_all()
+        _wakeup.wait(timeout)
+        _wakeup.clear()
+
+
+def start_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='contact-outbox', daemon=True)
+            _worker.start()
@@ -0,0 +1,45 @@
+from django.db.models import Count, Prefetch
+
+from core.projection import FieldSpec, load_only, project_language
+from .models import Page, PageSection, PageSectionItem, PageSectionItemImage
+from .serializers import (
+    PageSectionItemImageSerializer, PageSectionItemSerializer, PageSectionSerializer, PageSerializer,
+)
+
+
+def page_tree_prefetches(lang=None, fallback=True, spec=None):
+    """
+    Prefetch plan for a full page tree: Page -> sections -> items -> images.
+    Each level is loaded with one ordered query, so serializing a page costs
+    a fixed number of queries no matter how many sections or items it has.
+    With ``lang`` only that language's columns are loaded at every level;
+    with a FieldSpec collapsed levels are skipped and the rest use only().
+    """
+    spec = spec or FieldSpec()
+    levels = [
+        ('sections', PageSection, PageSectionSerializer, 'page'),
+        ('items', PageSectionItem, PageSectionItemSerializer, 'section'),
+        ('images', PageSectionItemImage, PageSectionItemImageSerializer, 'item'),
+    ]
+    prefetches, path, node = [], [], spec
+    for relation, model, serializer_class, parent in levels:
+        if not (node.includes(relation) and node.expands(relation)):
+            break
+        node = node.child(relation)
+        path.append(relation)
+        queryset = load_only(model.objects.order_by('order', 'id'), node, serializer_class, required=(parent,))
+        queryset = project_language(queryset, lang, fallback, node)
+        prefetches.append(Prefetch('__'.join(path), queryset=queryset))
+    return prefetches
+
+
+def with_page_tree(queryset, lang=None, fallback=True, spec=None, required=()):
+    """Attach the page tree prefetch plan to a Page queryset."""
+    queryset = load_only(queryset, spec, PageSerializer, required)
+    queryset = project_language(queryset, lang, fallback, spec)
+    return queryset.prefetch_related(*page_tree_prefetches(lang, fallback, spec))
+
+
+def with_section_count(queryset):
+    """Annotate Page rows with ``section_count`` in the same query."""
+    return queryset.annotate(section_count=Count('sections'))
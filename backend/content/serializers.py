@@ -1,89 +1,71 @@
 from rest_framework import serializers
+from core.projection import ProjectionMixin
+from uploads.fields import DocumentInfoField, ImageInfoField, MediaUrlField, SrcsetField, VideoInfoField
+from uploads.media import MediaUrlMixin
 from .models import PageContent, Page, PageSection, PageSectionItem, PageSectionItemImage
 
-class PageContentSerializer(serializers.ModelSerializer):
-    image_url = serializers.SerializerMethodField()
+class PageContentSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
+    image_url = MediaUrlField('image', absolute=True)
+    image_srcset = SrcsetField('image')
+    image_info = ImageInfoField('image')
     
     class Meta:
         model = PageContent
-        fields = '__all__'
-    
-    def get_image_url(self, obj):
-        """Return absolute URL for image"""
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            # Fallback for when request context is not available
-            from django.conf import settings
-            return f"{getattr(settings, 'SITE_URL', 'http://localhost:8000')}{obj.image.url}"
-        return None
-
-    def get_file_url(self, obj):
-        if obj.file:
-            return obj.file.url
-        return None
+        exclude = ['image_meta']
+        column_sources = {'image_url': 'image', 'image_srcset': 'image_meta', 'image_info': 'image_meta'}
 
-class PageSectionItemImageSerializer(serializers.ModelSerializer):
+class PageSectionItemImageSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Serializer for multiple images (gallery) of an item"""
-    image_url = serializers.SerializerMethodField()
+    image_url = MediaUrlField('image')
+    image_srcset = SrcsetField('image')
+    image_info = ImageInfoField('image')
     
     class Meta:
         model = PageSectionItemImage
-        fields = ['id', 'image_url', 'order']
+        fields = ['id', 'image_url', 'image_srcset', 'image_info', 'order']
+        column_sources = {'image_url': 'image', 'image_srcset': 'image_meta', 'image_info': 'image_meta'}
         
-    def get_image_url(self, obj):
-        if obj.image:
-            return obj.image.url
-        return None
-
-class PageSectionItemSerializer(serializers.ModelSerializer):
+class PageSectionItemSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Serializer for items within a section (e.g., cards in a grid)"""
-    image_url = serializers.SerializerMethodField()
-    file_url = serializers.SerializerMethodField()
+    image_url = MediaUrlField('image')
+    image_srcset = SrcsetField('image')
+    image_info = ImageInfoField('image')
+    file_url = MediaUrlField('file')
+    file_preview = SrcsetField('file')
+    file_info = DocumentInfoField('file')
     images = PageSectionItemImageSerializer(many=True, read_only=True)
     
     class Meta:
         model = PageSectionItem
         fields = ['id', 'item_type', 'title_uk', 'title_en', 'description_uk', 'description_en', 
-                  'content_uk', 'content_en', 'image_url', 'file_url', 'images', 
+                  'content_uk', 'content_en', 'image_url', 'image_srcset', 'image_info', 'file_url', 'file_preview', 'file_info', 'images', 
                   'button_text_uk', 'button_text_en', 'order']
+        column_sources = {
+            'image_url': 'image', 'image_srcset': 'image_meta', 'image_info': 'image_meta',
+            'file_url': 'file', 'file_preview': 'file_meta', 'file_info': 'file_meta',
+        }
 
-    def get_image_url(self, obj):
-        if obj.image:
-            return obj.image.url
-        return None
-        
-    def get_file_url(self, obj):
-        if obj.file:
-            return obj.file.url
-        return None
-
-class PageSectionSerializer(serializers.ModelSerializer):
+class PageSectionSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Serializer for page sections with media URLs and nested items"""
-    image_url = serializers.SerializerMethodField()
-    video_url = serializers.SerializerMethodField()
+    image_url = MediaUrlField('image')
+    image_srcset = SrcsetField('image')
+    image_info = ImageInfoField('image')
+    video_url = MediaUrlField('video')
+    video_poster = SrcsetField('video')
+    video_info = VideoInfoField('video')
     items = PageSectionItemSerializer(many=True, read_only=True)
     
     class Meta:
         model = PageSection
         fields = ['id', 'section_type', 'title_uk', 'title_en', 'content_uk', 
-                  'content_en', 'image_url', 'video_url', 'embed_code', 'chart_data', 'items', 'order']
-    
-    def get_image_url(self, obj):
-        """Return Cloudinary image URL"""
-        if obj.image:
-            return obj.image.url
-        return None
-    
-    def get_video_url(self, obj):
-        """Return Cloudinary video URL"""
-        if obj.video:
-            return obj.video.url
-        return None
+                  'content_en', 'image_url', 'image_srcset', 'image_info', 'video_url', 'video_poster', 'video_info', 'embed_code', 'chart_data', 'items', 'order']
+        column_sources = {
+            'image_url': 'image', 'image_srcset': 'image_meta', 'image_info': 'image_meta',
+            'video_url': 'video', 'video_poster': 'video_meta', 'video_info': 'video_meta',
+        }
 
 
-class PageSerializer(serializers.ModelSerializer):
+class PageSerializer(ProjectionMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Serializer for dynamic pages with nested sections"""
     sections = PageSectionSerializer(many=True, read_only=True)
     
@@ -94,7 +76,7 @@ class PageSerializer(serializers.ModelSerializer):
                   'sections', 'created_at', 'updated_at']
 
 
-class PageListSerializer(serializers.ModelSerializer):
+class PageListSerializer(ProjectionMixin, serializers.ModelSerializer):
     """Lightweight serializer for page list (without sections)"""
     section_count = serializers.SerializerMethodField()
     
@@ -105,4 +87,9 @@ class PageListSerializer(serializers.ModelSerializer):
                   'section_count']
     
     def get_section_count(self, obj):
-        return obj.sections.count()
+        # Views annotate the count (see content.queries.with_section_count);
+        # fall back to a per-row query for plain instances.
+        count = getattr(obj, 'section_count', None)
+        if count is None:
+            count = obj.sections.count()
+        return count
@@ -0,0 +1,79 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_on_commit
+from .models import Page, PageContent, PageSection, PageSectionItem, PageSectionItemImage
+from .snapshots import schedule_rebuild
+
+# Admin edits of legacy content go through the proxy models (SummaryPage,
+# ...), and signals are sent with the proxy class as sender.
+PAGE_CONTENT_MODELS = [
+    model for model in apps.get_app_config('content').get_models() if issubclass(model, PageContent)
+]
+
+
+def page_id_for(instance):
+    """Resolve the owning Page id for any row of a page tree."""
+    if isinstance(instance, Page):
+        return instance.pk
+    if isinstance(instance, PageSection):
+        return instance.page_id
+    if isinstance(instance, PageSectionItem):
+        return PageSection.objects.filter(pk=instance.section_id).values_list('page_id', flat=True).first()
+    if isinstance(instance, PageSectionItemImage):
+        return PageSectionItem.objects.filter(pk=instance.item_id).values_list('section__page_id', flat=True).first()
+    return None
+
+
+def page_slugs_for(instance):
+    """Slugs whose cached responses depend on this row (old and new for renames)."""
+    if isinstance(instance, Page):
+        return {instance.slug, getattr(instance, '_previous_slug', instance.slug)}
+    page_id = page_id_for(instance)
+    return set(Page.objects.filter(pk=page_id).values_list('slug', flat=True))
+
+
+def refresh_page_tree(instance):
+    """Rebuild the snapshot and drop cached responses of the page owning ``instance``."""
+    # The snapshot rebuild is queued first so it has run by the time the
+    # cached responses are invalidated (on_commit callbacks run in order).
+    schedule_rebuild(page_id_for(instance))
+    invalidate_on_commit('pages', *(f'page:{slug}' for slug in page_slugs_for(instance)))
+
+
+@receiver(pre_save, sender=Page)
+def remember_previous_slug(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._previous_slug = (
+        sender._base_manager.filter(pk=instance.pk).values_list('slug', flat=True).first() or instance.slug
+    )
+
+
+for model in PAGE_CONTENT_MODELS:
+    pre_save.connect(remember_previous_slug, sender=model)
+
+
+@receiver([post_save, post_delete], sender=Page)
+@receiver([post_save, post_delete], sender=PageSection)
+@receiver([post_save, post_delete], sender=PageSectionItem)
+@receiver([post_save, post_delete], sender=PageSectionItemImage)
+def page_tree_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_page_tree(instance)
+    if sender is Page:
+        invalidate_on_commit('navigation')
+
+
+def page_content_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slugs = {instance.slug, getattr(instance, '_previous_slug', instance.slug)}
+    invalidate_on_commit('content', 'navigation', *(f'content:{slug}' for slug in slugs))
+
+
+for model in PAGE_CONTENT_MODELS:
+    post_save.connect(page_content_changed, sender=model)
+    post_delete.connect(page_content_changed, sender=model)
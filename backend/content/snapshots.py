@@ -0,0 +1,84 @@
+"""
+Materialized JSON for /api/pages/<slug>/.
+
+Page trees change a few times a week but are read on every visit, so the
+rendered payload is stored in PageSnapshot and rebuilt by content.signals
+whenever a row of the tree is saved, deleted or reordered. Besides the
+bilingual payload, the ``?lang=uk|en`` projections (with the default
+fallback setting) are stored too.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from core.projection import LANGUAGES
+from core.renderers import FastJSONRenderer
+from .models import Page, PageSnapshot
+from .queries import with_page_tree
+from .serializers import PageSerializer
+
+_pending = threading.local()
+
+
+def render_page(page, lang=None):
+    """Render a page (with its prefetched tree) exactly like PageDetailView."""
+    context = {'lang': lang, 'fallback': settings.API_LANGUAGE_FALLBACK}
+    return FastJSONRenderer().render(PageSerializer(page, context=context).data)
+
+
+def snapshot_fields(page):
+    fields = {'slug': page.slug, 'payload': render_page(page)}
+    for lang in LANGUAGES:
+        fields[f'payload_{lang}'] = render_page(page, lang)
+    return fields
+
+
+def get_page_snapshot(slug, lang=None):
+    """Return stored payload bytes for an active page, or None."""
+    column = f'payload_{lang}' if lang else 'payload'
+    payload = PageSnapshot.objects.filter(slug=slug).values_list(column, flat=True).first()
+    return bytes(payload) if payload is not None else None
+
+
+def rebuild_page_snapshot(page_id):
+    """Re-render one page; drop its snapshot if it is gone or inactive."""
+    page = with_page_tree(Page.objects.filter(pk=page_id, is_active=True)).first()
+    if page is None:
+        PageSnapshot.objects.filter(page_id=page_id).delete()
+        return None
+    PageSnapshot.objects.filter(slug=page.slug).exclude(page_id=page.pk).delete()
+    snapshot, _ = PageSnapshot.objects.update_or_create(page=page, defaults=snapshot_fields(page))
+    return snapshot
+
+
+def rebuild_all_snapshots():
+    """Rebuild snapshots for every active page and drop stale ones."""
+    pages = with_page_tree(Page.objects.filter(is_active=True))
+    count = 0
+    for page in pages:
+        PageSnapshot.objects.update_or_create(page=page, defaults=snapshot_fields(page))
+        count += 1
+    PageSnapshot.objects.exclude(page__is_active=True).delete()
+    return count
+
+
+def schedule_rebuild(page_id):
+    """
+    Rebuild a page snapshot once the current transaction commits.
+    Saving a page with inlines touches many rows; pending ids are
+    collected per thread so each page is rendered only once.
+    """
+    if page_id is None:
+        return
+    pending = getattr(_pending, 'page_ids', None)
+    if pending is None:
+        pending = _pending.page_ids = set()
+    pending.add(page_id)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    page_ids = getattr(_pending, 'page_ids', None)
+    _pending.page_ids = None
+    for page_id in page_ids or ():
+        rebuild_page_snapshot(page_id)
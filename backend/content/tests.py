@@ -1,16 +1,939 @@
+import gzip
+import hashlib
+import io
+import json
+import re
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import cache as api_cache, shell
+from core.authentication import token_cache
+from core.compiled import compile_serializer
+from core.renderers import FastJSONRenderer
+from core.models import ThrottleBucket
+from core.pagination import encode_cursor
+from . import outbox
+from .serializers import PageListSerializer
+from .models import ContactMessage, Page, PageContent, PageSection, PageSectionItem, PageSectionItemImage, PageSnapshot, SummaryPage
+
+# Keeps the shared throttle's queries out of assertNumQueries
+LOCAL_THROTTLE_STORE = 'core.throttling.LocalBucketStore'
 
 
 class ContactAPITest(TestCase):
-	@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', CONTACT_RECIPIENTS=['test@example.com'])
+	@override_settings(
+		EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', CONTACT_RECIPIENTS=['test@example.com'],
+		CONTACT_DELIVERY='inline',
+	)
 	def test_contact_endpoint_sends_email(self):
 		url = reverse('contact')
 		data = {'name': 'Tester', 'email': 'tester@example.com', 'message': 'Hello world'}
-		response = self.client.post(url, data, content_type='application/json')
-		self.assertEqual(response.status_code, 200)
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self.client.post(url, data, content_type='application/json')
+		self.assertEqual(response.status_code, 202)
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].to, ['test@example.com'])
+		self.assertEqual(mail.outbox[0].reply_to, ['tester@example.com'])
+		self.assertEqual(ContactMessage.objects.get().status, ContactMessage.SENT)
+
+	@override_settings(CONTACT_DELIVERY='command')
+	def test_contact_is_acknowledged_before_delivery(self):
+		data = {'name': 'Tester', 'email': 'tester@example.com', 'message': 'Hello world'}
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self.client.post(reverse('contact'), data, content_type='application/json')
+		self.assertEqual(response.status_code, 202)
+		self.assertEqual(len(mail.outbox), 0)
+		self.assertEqual(ContactMessage.objects.get().status, ContactMessage.PENDING)
+
+	def test_contact_rejects_header_injection(self):
+		data = {'name': 'Tester\nBcc: x@example.com', 'email': 'tester@example.com', 'message': 'Hi'}
+		response = self.client.post(reverse('contact'), data, content_type='application/json')
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(ContactMessage.objects.exists())
 
 	def test_contact_requires_fields(self):
 		url = reverse('contact')
 		response = self.client.post(url, {'name': '', 'email': '', 'message': ''}, content_type='application/json')
 		self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+	EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', CONTACT_DELIVERY='command',
+	CONTACT_OUTBOX_BATCH_SIZE=2, CONTACT_OUTBOX_MAX_ATTEMPTS=3, CONTACT_OUTBOX_RETRY_DELAY=60,
+)
+class ContactOutboxTest(TestCase):
+	def _enqueue(self, count=1):
+		return [outbox.enqueue(f'Sender {n}', f'sender{n}@example.com', 'Hello', ['team@example.com']) for n in range(count)]
+
+	def test_batches_share_one_connection(self):
+		self._enqueue(5)
+		with mock.patch('content.outbox.get_connection', wraps=outbox.get_connection) as get_connection:
+			self.assertEqual(outbox.deliver_pending(), 5)
+		self.assertEqual(get_connection.call_count, 3)
+		self.assertEqual(len(mail.outbox), 5)
+		self.assertFalse(ContactMessage.objects.exclude(status=ContactMessage.SENT).exists())
+
+	def test_serving_processes_start_draining(self):
+		with mock.patch('content.outbox.start_worker') as start_worker:
+			outbox.start_drain()
+			start_worker.assert_not_called()
+			with self.settings(CONTACT_DELIVERY='thread'):
+				outbox.start_drain()
+			start_worker.assert_called_once_with()
+
+	def test_failures_are_retried_with_backoff(self):
+		contact, = self._enqueue()
+		with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('timeout')):
+			self.assertEqual(outbox.deliver_pending(), 0)
+			contact.refresh_from_db()
+			self.assertEqual((contact.status, contact.attempts), (ContactMessage.PENDING, 1))
+			self.assertEqual(contact.last_error, 'OSError: timeout')
+			self.assertAlmostEqual(outbox.seconds_until_due(), 60, delta=5)
+			# Not due yet
+			self.assertEqual(outbox.deliver_pending(), 0)
+			contact.refresh_from_db()
+			self.assertEqual(contact.attempts, 1)
+
+			ContactMessage.objects.update(next_attempt_at=timezone.now())
+			outbox.deliver_pending()
+			contact.refresh_from_db()
+			self.assertEqual(contact.attempts, 2)
+			self.assertAlmostEqual(outbox.seconds_until_due(), 120, delta=5)
+
+			ContactMessage.objects.update(next_attempt_at=timezone.now())
+			with self.assertLogs('content.outbox', 'ERROR'):
+				outbox.deliver_pending()
+			contact.refresh_from_db()
+			self.assertEqual(contact.attempts, 3)
+		self.assertEqual(contact.status, ContactMessage.FAILED)
+		self.assertEqual(len(mail.outbox), 0)
+
+	def test_claimed_messages_are_skipped_by_other_workers(self):
+		self._enqueue(2)
+		claimed = outbox.claim(batch_size=1)
+		self.assertEqual(len(claimed), 1)
+		self.assertEqual([c.pk for c in outbox.claim(batch_size=5)], [ContactMessage.objects.exclude(pk=claimed[0].pk).get().pk])
+		self.assertEqual(outbox.claim(batch_size=5), [])
+
+	@override_settings(CONTACT_DELIVERY='inline')
+	def test_admin_retry_delivers(self):
+		ContactMessage.objects.create(name='Sender', email='sender@example.com', message='Hello',
+			recipients=['team@example.com'], status=ContactMessage.FAILED, attempts=3)
+		self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password'))
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(reverse('admin:content_contactmessage_changelist'), {
+				'action': 'retry_now', '_selected_action': list(ContactMessage.objects.values_list('pk', flat=True)),
+			})
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(ContactMessage.objects.get().status, ContactMessage.SENT)
+
+	def test_delivery_command(self):
+		self._enqueue(3)
+		out = io.StringIO()
+		call_command('deliver_contact_messages', stdout=out)
+		self.assertIn('Sent 3 contact message(s)', out.getvalue())
+		self.assertEqual(len(mail.outbox), 3)
+
+
+@override_settings(
+	API_CACHE_TIMEOUT=0, CONTACT_DELIVERY='command',
+	API_THROTTLE_STORE='core.throttling.DatabaseBucketStore', API_THROTTLE_SCOPE_STORES={},
+	REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'read': '3/min', 'contact': '1/min'}},
+)
+class TokenBucketThrottleTest(TestCase):
+	def test_bucket_is_shared_and_refills(self):
+		url = reverse('page_list')
+		with mock.patch('core.throttling.time.time', return_value=1000.0):
+			self.assertEqual([self.client.get(url).status_code for _ in range(4)], [200, 200, 200, 429])
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, 429)
+			self.assertEqual(response['Retry-After'], '20')
+		self.assertEqual(ThrottleBucket.objects.get().key, f"read:{hashlib.sha256(b'127.0.0.1').hexdigest()}")
+		with mock.patch('core.throttling.time.time', return_value=1020.0):
+			self.assertEqual([self.client.get(url).status_code for _ in range(2)], [200, 429])
+
+	def test_scopes_have_their_own_buckets(self):
+		data = {'name': 'Tester', 'email': 'tester@example.com', 'message': 'Hello'}
+		self.assertEqual(self.client.post(reverse('contact'), data, content_type='application/json').status_code, 202)
+		self.assertEqual(self.client.post(reverse('contact'), data, content_type='application/json').status_code, 429)
+		self.assertEqual(self.client.get(reverse('page_list')).status_code, 200)
+		self.assertEqual(ThrottleBucket.objects.count(), 2)
+
+	def test_forwarded_for_header_is_hashed_into_the_key(self):
+		url = reverse('page_list')
+		forged = ', '.join(f'10.0.{n // 256}.{n % 256}' for n in range(100))
+		with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': None}):
+			# Without a proxy count the whole header is the ident
+			self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR=forged).status_code, 200)
+		self.assertLessEqual(len(ThrottleBucket.objects.get().key), 255)
+		ThrottleBucket.objects.all().delete()
+
+		self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR=forged).status_code, 200)
+		# Only the address appended by the proxy counts
+		self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.99').status_code, 200)
+		bucket = ThrottleBucket.objects.get()
+		self.assertEqual(bucket.key, f"read:{hashlib.sha256(b'10.0.0.99').hexdigest()}")
+
+	def test_one_query_per_allowed_request(self):
+		self.client.get(reverse('page_list'))
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get(reverse('page_list'))
+		self.assertEqual(len([q for q in queries if 'core_throttlebucket' in q['sql']]), 1)
+
+	def test_reads_can_use_a_local_store(self):
+		with self.settings(API_THROTTLE_SCOPE_STORES={'read': LOCAL_THROTTLE_STORE}):
+			with mock.patch('core.throttling.time.time', return_value=1000.0):
+				with CaptureQueriesContext(connection) as queries:
+					statuses = [self.client.get(reverse('page_list')).status_code for _ in range(4)]
+				self.assertEqual(statuses, [200, 200, 200, 429])
+				self.assertFalse([q for q in queries if 'core_throttlebucket' in q['sql']])
+				data = {'name': 'Tester', 'email': 'tester@example.com', 'message': 'Hello'}
+				self.client.post(reverse('contact'), data, content_type='application/json')
+		self.assertEqual(list(ThrottleBucket.objects.values_list('key', flat=True)),
+			[f"contact:{hashlib.sha256(b'127.0.0.1').hexdigest()}"])
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class JWTAuthenticationTest(TestCase):
+	def setUp(self):
+		token_cache.clear()
+		self.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+		self.auth = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+	def test_public_reads_ignore_credentials(self):
+		Page.objects.create(slug='about', title_uk='Про нас', title_en='About')
+		for url in (reverse('page_list'), reverse('page_detail', args=['about']), reverse('catalog-items-list')):
+			with CaptureQueriesContext(connection) as queries:
+				response = self.client.get(url, HTTP_AUTHORIZATION='Bearer not-a-token')
+			self.assertEqual(response.status_code, 200)
+			self.assertFalse([q for q in queries if 'auth_user' in q['sql']])
+
+	def test_validated_tokens_are_cached(self):
+		url = reverse('cache_stats')
+		self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=self.auth).status_code, 200)
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=self.auth).status_code, 200)
+		self.assertFalse([q for q in queries if 'auth_user' in q['sql']])
+		self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer not-a-token').status_code, 401)
+
+	def test_saving_the_user_drops_cached_tokens(self):
+		url = reverse('cache_stats')
+		self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=self.auth).status_code, 200)
+		self.user.is_staff = False
+		self.user.save()
+		self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=self.auth).status_code, 403)
+
+	def test_entries_expire(self):
+		url = reverse('cache_stats')
+		self.client.get(url, HTTP_AUTHORIZATION=self.auth)
+		later = timezone.now().timestamp() + settings.JWT_USER_CACHE_TTL + 1
+		with mock.patch('core.authentication.time.time', return_value=later), CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=self.auth).status_code, 200)
+		self.assertTrue([q for q in queries if 'auth_user' in q['sql']])
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class PageDetailQueryCountTest(TestCase):
+	def _build_page(self, slug, sections, items, images):
+		page = Page.objects.create(slug=slug, title_uk=slug, title_en=slug)
+		for s in range(sections):
+			section = PageSection.objects.create(page=page, section_type='grid', order=s)
+			for i in range(items):
+				item = PageSectionItem.objects.create(section=section, title_uk=f'{s}-{i}', order=i)
+				for g in range(images):
+					PageSectionItemImage.objects.create(item=item, image=f'item_gallery/{s}-{i}-{g}.jpg', order=g)
+		return page
+
+	def test_query_count_does_not_grow_with_tree_size(self):
+		self._build_page('small', sections=1, items=1, images=1)
+		self._build_page('large', sections=10, items=20, images=2)
+
+		# validator + snapshot miss + page + sections + items + images
+		with self.assertNumQueries(6):
+			small = self.client.get(reverse('page_detail', args=['small']))
+		with self.assertNumQueries(6):
+			large = self.client.get(reverse('page_detail', args=['large']))
+
+		self.assertEqual(small.status_code, 200)
+		self.assertEqual(large.status_code, 200)
+		sections = large.json()['sections']
+		self.assertEqual(len(sections), 10)
+		self.assertEqual(len(sections[0]['items']), 20)
+		self.assertEqual([i['order'] for i in sections[0]['items']], list(range(20)))
+		self.assertEqual(len(sections[0]['items'][0]['images']), 2)
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class PageListSectionCountTest(TestCase):
+	def test_section_count_is_annotated(self):
+		for n in range(3):
+			page = Page.objects.create(slug=f'page-{n}', title_uk=f'Page {n}', title_en=f'Page {n}', order=n)
+			for s in range(n):
+				PageSection.objects.create(page=page, order=s)
+
+		# validator + annotated list
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse('page_list'), {'menu': 1})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual([p['section_count'] for p in response.json()['results']], [0, 1, 2])
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class PageSnapshotTest(TestCase):
+	def setUp(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.page = Page.objects.create(slug='snap', title_uk='Знімок', title_en='Snapshot')
+			self.section = PageSection.objects.create(page=self.page, section_type='grid', title_en='Docs')
+			self.item = PageSectionItem.objects.create(section=self.section, title_en='First')
+
+	def test_detail_is_served_from_snapshot(self):
+		# validator + snapshot
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse('page_detail', args=['snap']))
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()['sections'][0]['items'][0]['title_en'], 'First')
+
+	def test_snapshot_matches_live_serializer(self):
+		snapshot = PageSnapshot.objects.get(page=self.page)
+		stored = {'': snapshot.payload, 'uk': snapshot.payload_uk, 'en': snapshot.payload_en}
+		url = reverse('page_detail', args=['snap'])
+		served = {lang: self.client.get(url, {'lang': lang}).content for lang in stored}
+		PageSnapshot.objects.all().delete()
+		for lang, payload in stored.items():
+			live = self.client.get(url, {'lang': lang}).content
+			self.assertEqual(live, bytes(payload))
+			self.assertEqual(live, served[lang])
+
+	def test_snapshot_rebuilt_on_nested_save_and_delete(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.item.title_en = 'Renamed'
+			self.item.save()
+		data = self.client.get(reverse('page_detail', args=['snap'])).json()
+		self.assertEqual(data['sections'][0]['items'][0]['title_en'], 'Renamed')
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.section.delete()
+		data = self.client.get(reverse('page_detail', args=['snap'])).json()
+		self.assertEqual(data['sections'], [])
+
+	def test_snapshot_dropped_for_inactive_page(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.page.is_active = False
+			self.page.save()
+		self.assertFalse(PageSnapshot.objects.exists())
+		self.assertEqual(self.client.get(reverse('page_detail', args=['snap'])).status_code, 404)
+
+
+class APIResponseCacheTest(TestCase):
+	def setUp(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.page = Page.objects.create(slug='cached', title_uk='Кеш', title_en='Cached')
+			self.content = PageContent.objects.create(slug='about-summary', title_uk='Огляд', title_en='Summary')
+
+	def test_second_request_is_a_hit(self):
+		url = reverse('page_detail', args=['cached'])
+		self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+		response = self.client.get(url)
+		self.assertEqual(response['X-Cache'], 'HIT')
+		self.assertEqual(response.json()['title_en'], 'Cached')
+
+	def test_query_params_are_part_of_the_key(self):
+		url = reverse('page_content_list')
+		self.client.get(url, {'section': 'about'})
+		self.assertEqual(self.client.get(url, {'section': 'economy'})['X-Cache'], 'MISS')
+		self.assertEqual(self.client.get(url, {'section': 'about'})['X-Cache'], 'HIT')
+
+	@override_settings(ALLOWED_HOSTS=['a.example', 'b.example'])
+	def test_origin_is_part_of_the_key_and_etag(self):
+		# No save(): that would schedule derivatives of a file that does not exist
+		PageContent.objects.filter(pk=self.content.pk).update(image='content/summary.jpg')
+		url = reverse('page_content', args=['about-summary'])
+		first = self.client.get(url, HTTP_HOST='a.example')
+		self.assertTrue(first.json()['image_url'].startswith('http://a.example/'))
+		other = self.client.get(url, HTTP_HOST='b.example')
+		self.assertEqual(other['X-Cache'], 'MISS')
+		self.assertTrue(other.json()['image_url'].startswith('http://b.example/'))
+		self.assertNotEqual(other['ETag'], first['ETag'])
+		secure = self.client.get(url, HTTP_HOST='a.example', secure=True)
+		self.assertTrue(secure.json()['image_url'].startswith('https://a.example/'))
+		self.assertEqual(self.client.get(url, HTTP_HOST='a.example')['X-Cache'], 'HIT')
+
+	def test_nested_save_invalidates_page_and_list(self):
+		detail = reverse('page_detail', args=['cached'])
+		self.client.get(detail)
+		self.client.get(reverse('page_list'))
+		with self.captureOnCommitCallbacks(execute=True):
+			PageSection.objects.create(page=self.page, title_en='New section')
+
+		response = self.client.get(detail)
+		self.assertEqual(response['X-Cache'], 'MISS')
+		self.assertEqual(response.json()['sections'][0]['title_en'], 'New section')
+		response = self.client.get(reverse('page_list'))
+		self.assertEqual(response['X-Cache'], 'MISS')
+		self.assertEqual(response.json()['results'][0]['section_count'], 1)
+
+	def test_legacy_content_rename_invalidates_old_slug(self):
+		old = reverse('page_content', args=['about-summary'])
+		self.assertEqual(self.client.get(old).status_code, 200)
+		with self.captureOnCommitCallbacks(execute=True):
+			self.content.slug = 'about-overview'
+			self.content.save()
+		self.assertEqual(self.client.get(old).status_code, 404)
+
+	def test_proxy_admin_save_invalidates_content(self):
+		# Admin edits save through the proxy models (SummaryPage, ...)
+		url = reverse('page_content', args=['about-summary'])
+		self.client.get(url)
+		with self.captureOnCommitCallbacks(execute=True):
+			proxy = SummaryPage.objects.get(pk=self.content.pk)
+			proxy.title_en = 'Overview'
+			proxy.save()
+		response = self.client.get(url)
+		self.assertEqual(response['X-Cache'], 'MISS')
+		self.assertEqual(response.json()['title_en'], 'Overview')
+
+	def test_stats_are_staff_only(self):
+		before = api_cache.cache_stats()
+		self.client.get(reverse('page_detail', args=['cached']))
+		self.client.get(reverse('page_detail', args=['cached']))
+		self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 401)
+
+		user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+		token = RefreshToken.for_user(user).access_token
+		stats = self.client.get(reverse('cache_stats'), HTTP_AUTHORIZATION=f'Bearer {token}').json()
+		self.assertEqual(stats['hits'] - before['hits'], 1)
+		self.assertEqual(stats['misses'] - before['misses'], 1)
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class ConditionalGetTest(TestCase):
+	def setUp(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.page = Page.objects.create(slug='etag', title_uk='Тег', title_en='Tag')
+			self.section = PageSection.objects.create(page=self.page)
+			self.item = PageSectionItem.objects.create(section=self.section)
+		self.url = reverse('page_detail', args=['etag'])
+
+	def test_matching_etag_returns_304_without_serializing(self):
+		etag = self.client.get(self.url)['ETag']
+		with self.assertNumQueries(1):
+			response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.content, b'')
+
+	def test_if_modified_since(self):
+		last_modified = self.client.get(self.url)['Last-Modified']
+		response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+		self.assertEqual(response.status_code, 304)
+
+	def test_nested_delete_moves_last_modified(self):
+		# Rendered a while ago
+		PageSnapshot.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+		last_modified = self.client.get(self.url)['Last-Modified']
+		with self.captureOnCommitCallbacks(execute=True):
+			self.item.delete()
+		self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+	def test_lists_have_no_last_modified(self):
+		# Deleting a row would not move it
+		for url in (reverse('page_list'), reverse('page_content_list'), reverse('catalog-items-list')):
+			response = self.client.get(url)
+			self.assertIn('ETag', response)
+			self.assertNotIn('Last-Modified', response)
+
+	def test_nested_delete_changes_etag(self):
+		etag = self.client.get(self.url)['ETag']
+		with self.captureOnCommitCallbacks(execute=True):
+			self.item.delete()
+		response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response['ETag'], etag)
+
+	def test_query_params_change_etag(self):
+		self.assertNotEqual(self.client.get(self.url)['ETag'], self.client.get(self.url, {'x': 1})['ETag'])
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class LanguageProjectionTest(TestCase):
+	def setUp(self):
+		self.page = Page.objects.create(slug='lang', title_uk='Сторінка', title_en='Page', description_uk='Опис')
+		section = PageSection.objects.create(page=self.page, title_uk='Секція', content_uk='<p>uk</p>', content_en='<p>en</p>')
+		PageSectionItem.objects.create(section=section, title_uk='Картка', title_en='', button_text_en='Open')
+		PageSectionItem.objects.create(section=section, title_en='Card', button_text_uk='Детальніше', order=1)
+		self.url = reverse('page_detail', args=['lang'])
+
+	def test_only_requested_language_is_emitted(self):
+		data = self.client.get(self.url, {'lang': 'en'}).json()
+		self.assertEqual(data['title_en'], 'Page')
+		self.assertNotIn('title_uk', data)
+		section = data['sections'][0]
+		self.assertEqual(section['content_en'], '<p>en</p>')
+		self.assertNotIn('content_uk', section)
+		self.assertFalse([key for key in data if key.endswith('_uk')])
+
+	def test_empty_translation_falls_back(self):
+		data = self.client.get(self.url, {'lang': 'en'}).json()
+		self.assertEqual(data['description_en'], 'Опис')
+		self.assertEqual(data['sections'][0]['items'][0]['title_en'], 'Картка')
+		# Empty button labels are left to the frontend's default
+		self.assertEqual(data['sections'][0]['items'][1]['button_text_en'], '')
+		self.assertEqual(self.client.get(self.url, {'lang': 'uk'}).json()['sections'][0]['items'][0]['button_text_uk'], '')
+
+		data = self.client.get(self.url, {'lang': 'en', 'fallback': '0'}).json()
+		self.assertEqual(data['description_en'], '')
+		self.assertEqual(data['sections'][0]['items'][0]['title_en'], '')
+
+	def test_other_language_columns_are_not_loaded(self):
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get(self.url, {'lang': 'en', 'fallback': '0'})
+		tree_sql = [q['sql'] for q in queries.captured_queries if 'content_pagesection' in q['sql'] and 'MAX(' not in q['sql']]
+		self.assertTrue(tree_sql)
+		for sql in tree_sql:
+			self.assertNotIn('_uk"', sql)
+
+	def test_legacy_content_projection(self):
+		PageContent.objects.create(slug='economy-main', title_uk='Економіка', title_en='Economy', content_uk='<p>uk</p>')
+		data = self.client.get(reverse('page_content', args=['economy-main']), {'lang': 'uk'}).json()
+		self.assertEqual((data['title_uk'], data['content_uk']), ('Економіка', '<p>uk</p>'))
+		self.assertNotIn('title_en', data)
+		self.assertNotIn('content_en', data)
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class SparseFieldsetTest(TestCase):
+	def setUp(self):
+		page = Page.objects.create(slug='sparse', title_uk='Сторінка', title_en='Page')
+		for s in range(3):
+			section = PageSection.objects.create(page=page, section_type='grid', title_en=f'S{s}', content_en='<p>long</p>', order=s)
+			item = PageSectionItem.objects.create(section=section, title_en=f'I{s}', content_en='<p>long</p>')
+			PageSectionItemImage.objects.create(item=item, image='item_gallery/a.jpg')
+		self.url = reverse('page_detail', args=['sparse'])
+
+	def test_fields_limit_keys_per_level(self):
+		data = self.client.get(self.url, {'fields': 'slug,title_en,sections.section_type,sections.title_en'}).json()
+		self.assertEqual(set(data), {'slug', 'title_en', 'sections'})
+		self.assertEqual(data['sections'][0], {'section_type': 'grid', 'title_en': 'S0'})
+
+	def test_items_without_content(self):
+		data = self.client.get(self.url, {'fields': 'id,sections.id,sections.items.id,sections.items.title_en'}).json()
+		self.assertEqual(data['sections'][2]['items'], [{'id': data['sections'][2]['items'][0]['id'], 'title_en': 'I2'}])
+
+	def test_expand_collapses_relations_and_skips_their_queries(self):
+		# validator + page + sections; items and images are never loaded
+		with self.assertNumQueries(3):
+			data = self.client.get(self.url, {'expand': 'sections'}).json()
+		self.assertEqual(len(data['sections']), 3)
+		self.assertNotIn('items', data['sections'][0])
+		self.assertIn('content_en', data['sections'][0])
+
+		data = self.client.get(self.url, {'expand': ''}).json()
+		self.assertNotIn('sections', data)
+
+	def test_excluded_columns_are_not_loaded(self):
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get(self.url, {'fields': 'title_en,sections.title_en', 'lang': 'en'})
+		section_sql = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "content_pagesection"."id"')]
+		self.assertEqual(len(section_sql), 1)
+		self.assertNotIn('content_en', section_sql[0])
+		self.assertNotIn('embed_code', section_sql[0])
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class KeysetPaginationTest(TestCase):
+	def setUp(self):
+		# Equal "order" values force the title/id tie-breakers to be used
+		for n in range(7):
+			Page.objects.create(slug=f'page-{n}', title_uk=f'Сторінка {n % 3}', title_en=f'Page {n}', order=n % 2)
+
+	def _walk(self, url, params):
+		seen, pages = [], 0
+		response = self.client.get(url, params)
+		while True:
+			data = response.json()
+			seen += [row['slug'] for row in data['results']]
+			pages += 1
+			if not data['next']:
+				return seen, pages
+			response = self.client.get(data['next'])
+
+	def test_cursor_walks_every_row_once_in_order(self):
+		seen, pages = self._walk(reverse('page_list'), {'page_size': 3})
+		expected = list(Page.objects.order_by('order', 'title_uk', 'id').values_list('slug', flat=True))
+		self.assertEqual(seen, expected)
+		self.assertEqual(pages, 3)
+
+	def test_deep_page_is_a_single_range_query(self):
+		first = self.client.get(reverse('page_list'), {'page_size': 2}).json()
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get(first['next'])
+		list_sql = queries.captured_queries[-1]['sql']
+		self.assertNotIn('OFFSET', list_sql)
+		self.assertIn('LIMIT 3', list_sql)
+
+	def test_page_size_is_capped_and_invalid_cursor_is_404(self):
+		with self.settings(API_MAX_PAGE_SIZE=4):
+			data = self.client.get(reverse('page_list'), {'page_size': 1000}).json()
+		self.assertEqual(len(data['results']), 4)
+		self.assertEqual(self.client.get(reverse('page_list'), {'cursor': 'garbage'}).status_code, 404)
+
+	def test_tampered_cursor_is_404(self):
+		for position in (['abc', 'x', 1], [None, 'x', 1], [[1], 'x', 1], [0, 'x', {'id': 1}]):
+			response = self.client.get(reverse('page_list'), {'cursor': encode_cursor(position)})
+			self.assertEqual(response.status_code, 404, position)
+
+	def test_legacy_content_is_paginated_by_slug(self):
+		for slug in ('c', 'a', 'b'):
+			PageContent.objects.create(slug=slug, title_uk=slug, title_en=slug)
+		seen, _ = self._walk(reverse('page_content_list'), {'page_size': 2})
+		self.assertEqual(seen, ['a', 'b', 'c'])
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class BatchFetchTest(TestCase):
+	def setUp(self):
+		for n in range(3):
+			page = Page.objects.create(slug=f'page-{n}', title_uk=f'Сторінка {n}', title_en=f'Page {n}')
+			section = PageSection.objects.create(page=page, section_type='text', title_en=f'S{n}')
+			PageSectionItem.objects.create(section=section, title_en=f'I{n}')
+			PageContent.objects.create(slug=f'block-{n}', title_uk=f'Блок {n}', title_en=f'Block {n}')
+		Page.objects.create(slug='hidden', title_uk='x', title_en='x', is_active=False)
+		self.url = reverse('batch')
+
+	def test_one_query_per_model_and_null_for_missing(self):
+		# page, sections, items, images + content
+		with self.assertNumQueries(5):
+			data = self.client.get(self.url, {'pages': 'page-2,page-0,hidden,nope', 'content': 'block-1,block-0,gone'}).json()
+		self.assertEqual(list(data['pages']), ['page-2', 'page-0', 'hidden', 'nope'])
+		self.assertEqual(data['pages']['page-2']['sections'][0]['items'][0]['title_en'], 'I2')
+		self.assertIsNone(data['pages']['hidden'])
+		self.assertIsNone(data['pages']['nope'])
+		self.assertEqual(data['content']['block-0']['title_en'], 'Block 0')
+		self.assertIsNone(data['content']['gone'])
+
+	def test_matches_single_endpoints_and_honours_projection(self):
+		data = self.client.get(self.url, {'pages': 'page-1', 'content': 'block-1'}).json()
+		self.assertEqual(data['pages']['page-1'], self.client.get(reverse('page_detail', args=['page-1'])).json())
+		self.assertEqual(data['content']['block-1'], self.client.get(reverse('page_content', args=['block-1'])).json())
+
+		data = self.client.get(self.url, {'pages': 'page-1', 'content': 'block-1', 'lang': 'en', 'fields': 'title_en'}).json()
+		self.assertEqual(data, {'pages': {'page-1': {'title_en': 'Page 1'}}, 'content': {'block-1': {'title_en': 'Block 1'}}})
+
+	def test_slug_limit(self):
+		with self.settings(API_BATCH_MAX_SLUGS=2):
+			response = self.client.get(self.url, {'pages': 'a,b,c'})
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(self.client.get(self.url).json(), {'pages': {}, 'content': {}})
+
+	@override_settings(API_CACHE_TIMEOUT=60)
+	def test_cached_batch_is_invalidated_by_any_member(self):
+		params = {'pages': 'page-0', 'content': 'block-0'}
+		self.client.get(self.url, params)
+		self.assertEqual(self.client.get(self.url, params)['X-Cache'], 'HIT')
+		with self.captureOnCommitCallbacks(execute=True):
+			PageContent.objects.filter(slug='block-0').get().save()
+		self.assertEqual(self.client.get(self.url, params)['X-Cache'], 'MISS')
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class CompiledSerializerTest(TestCase):
+	def setUp(self):
+		variants = [
+			{'name': 'derived/a/640.webp', 'format': 'webp', 'width': 640, 'height': 427},
+			{'name': 'derived/a/320.jpeg', 'format': 'jpeg', 'width': 320, 'height': 213},
+			{'name': 'derived/a/320.webp', 'format': 'webp', 'width': 320, 'height': 213},
+		]
+		image_meta = {'version': 2, 'width': 1200, 'height': 800, 'bytes': 51234, 'color': '#336699',
+			'placeholder': 'data:image/webp;base64,AAAA', 'variants': variants}
+		page = Page.objects.create(slug='about', title_uk='Про край', title_en='About', description_uk='Опис',
+			show_in_menu=True, menu_category='about')
+		Page.objects.create(slug='economy', title_uk='Економіка', title_en='', order=1)
+		hero = PageSection.objects.create(page=page, section_type='hero', title_uk='Герой', order=0,
+			image='section_images/hero.jpg', image_meta=image_meta, video='section_videos/hero.mp4',
+			video_meta={'bytes': 1024, 'duration': 4.2, 'width': 1280, 'height': 720, 'variants': variants},
+			chart_data={'labels': ['Jan', 'Feb'], 'datasets': [{'data': [1.5, 2]}]})
+		PageSection.objects.create(page=page, section_type='text', title_uk='Текст', title_en='Text', order=1)
+		item = PageSectionItem.objects.create(section=hero, title_uk='Картка', file='item_files/plan.pdf',
+			file_meta={'bytes': 2048, 'pages': 3}, order=0)
+		PageSectionItem.objects.create(section=hero, title_uk='Друга', title_en='Second', order=1)
+		for order in (1, 0):
+			PageSectionItemImage.objects.create(item=item, image=f'item_gallery/{order}.jpg', image_meta=image_meta, order=order)
+		PageContent.objects.create(slug='summary', title_uk='Підсумок', title_en='Summary', section='about',
+			image='page_images/summary.jpg', image_meta=image_meta, chart_data={'rows': []})
+		PageContent.objects.create(slug='energy', title_uk='Енергетика', title_en='Energy', section='economy')
+
+	def _assert_identical(self, url, params=None):
+		with self.settings(API_COMPILED_SERIALIZERS=False):
+			expected = self.client.get(url, params)
+		# Every key has to come from the compiled plan: DRF serializers must not run
+		with mock.patch.object(serializers.Serializer, 'to_representation', side_effect=AssertionError):
+			compiled = self.client.get(url, params)
+		self.assertEqual(expected.status_code, 200)
+		self.assertEqual(compiled.status_code, 200)
+		self.assertEqual(compiled.content, expected.content)
+
+	def test_page_detail_is_byte_identical(self):
+		url = reverse('page_detail', args=['about'])
+		for params in (
+			None, {'lang': 'en'}, {'lang': 'uk', 'fallback': '0'},
+			{'fields': 'slug,sections.title_en,sections.items.images.image_srcset', 'lang': 'en'},
+			{'expand': 'sections'},
+		):
+			with self.subTest(params=params):
+				self._assert_identical(url, params)
+
+	def test_lists_and_batches_are_byte_identical(self):
+		for url, params in (
+			(reverse('page_list'), None),
+			(reverse('page_list'), {'lang': 'en', 'page_size': 1}),
+			(reverse('page_list'), {'fields': 'slug,title_en'}),
+			(reverse('page_content_list'), None),
+			(reverse('page_content_list'), {'section': 'about', 'lang': 'en'}),
+			(reverse('page_content', args=['summary']), {'lang': 'uk'}),
+			(reverse('batch'), {'pages': 'about,missing,economy', 'content': 'summary', 'lang': 'en'}),
+		):
+			with self.subTest(url=url, params=params):
+				self._assert_identical(url, params)
+
+	def test_cursor_pagination(self):
+		data = self.client.get(reverse('page_list'), {'page_size': 1}).json()
+		self.assertEqual([page['slug'] for page in data['results']], ['about'])
+		self.assertEqual([page['slug'] for page in self.client.get(data['next']).json()['results']], ['economy'])
+
+	def test_method_fields_need_their_annotation(self):
+		plan = compile_serializer(PageListSerializer, {})
+		self.assertIsNone(plan.values(Page.objects.all()))
+		rows = plan.values(Page.objects.annotate(section_count=Count('sections')).order_by('order'))
+		self.assertEqual([page['section_count'] for page in plan.render(rows)], [2, 0])
+
+
+class FastJSONRendererTest(TestCase):
+	data = {
+		'title': 'Закарпаття\u2028', 'html': '<p>"a" & b</p>', 7: 'int key',
+		'when': datetime(2026, 10, 18, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+		'price': Decimal('1.50'), 'rows': [{'n': 1, 'f': 0.1, 'none': None, 'flag': True}],
+	}
+
+	def test_matches_drf_renderer(self):
+		expected = JSONRenderer().render(self.data)
+		self.assertEqual(FastJSONRenderer().render(self.data), expected)
+		with mock.patch('core.renderers.orjson', None):
+			self.assertEqual(FastJSONRenderer().render(self.data), expected)
+		self.assertEqual(FastJSONRenderer().render(None), b'')
+
+	def test_indent_is_honoured(self):
+		content = FastJSONRenderer().render(self.data, 'application/json; indent=4')
+		self.assertEqual(content, JSONRenderer().render(self.data, 'application/json; indent=4'))
+
+
+@override_settings(API_CACHE_TIMEOUT=60, API_STREAM_CHUNK_SIZE=2, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class StreamingListTest(TestCase):
+	def setUp(self):
+		for n in range(5):
+			PageContent.objects.create(slug=f'block-{n}', title_uk=f'Блок {n}', title_en=f'Block {n}',
+				section='about' if n % 2 else 'economy')
+		self.url = reverse('page_content_list')
+
+	def _stream(self, params):
+		response = self.client.get(self.url, {'stream': '1', **params})
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		self.assertEqual(response['Content-Type'], 'application/json')
+		return b''.join(response.streaming_content)
+
+	def test_stream_is_one_unpaginated_page(self):
+		# Shaped like a last page holding every row
+		expected = self.client.get(self.url, {'lang': 'en', 'page_size': 100}).content
+		self.assertEqual(self._stream({'lang': 'en'}), expected)
+		with self.settings(API_COMPILED_SERIALIZERS=False):
+			self.assertEqual(self._stream({'lang': 'en'}), expected)
+		data = json.loads(self._stream({'section': 'about', 'fields': 'slug'}))
+		self.assertEqual(data, {'next': None, 'results': [{'slug': 'block-1'}, {'slug': 'block-3'}]})
+		self.assertEqual(json.loads(self._stream({'section': 'investment'})), {'next': None, 'results': []})
+
+	def test_streams_are_not_cached(self):
+		self._stream({})
+		self._stream({})
+		self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+		self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+
+class NavigationTest(TestCase):
+	def setUp(self):
+		PageContent.objects.create(slug='about-summary', title_uk='Огляд регіону', title_en='Region overview')
+		Page.objects.create(slug='wine', title_uk='Вино', title_en='Wine', menu_category='economy', order=2)
+		Page.objects.create(slug='cheese', title_uk='Сир', title_en='Cheese', menu_category='economy', order=1)
+		Page.objects.create(slug='hidden', title_uk='x', title_en='x', menu_category='economy', show_in_menu=False)
+		Page.objects.create(slug='loose', title_uk='y', title_en='y')
+		self.url = reverse('navigation')
+
+	def _children(self, data, key):
+		return next(category['children'] for category in data['categories'] if category['key'] == key)
+
+	def test_menu_is_grouped_and_ordered(self):
+		data = self.client.get(self.url).json()
+		self.assertEqual([category['key'] for category in data['categories']], ['about', 'economy', 'investment'])
+		about = self._children(data, 'about')
+		self.assertEqual(about[0], {
+			'slug': 'about-summary', 'title_uk': 'Огляд регіону', 'title_en': 'Region overview',
+			'path': '/summary', 'source': 'content',
+		})
+		# Proxy pages without a row fall back to their admin label and the English menu label
+		self.assertEqual((about[1]['title_uk'], about[1]['title_en']), ('Переваги', 'Advantages'))
+		investment = {entry['path']: entry['title_en'] for entry in self._children(data, 'investment')}
+		self.assertEqual(investment['/parks'], 'Industrial Parks')
+		economy = [entry['slug'] for entry in self._children(data, 'economy') if entry['source'] == 'page']
+		self.assertEqual(economy, ['cheese', 'wine'])
+
+	def test_cached_until_page_or_proxy_content_changes(self):
+		self.client.get(self.url)
+		self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+		with self.captureOnCommitCallbacks(execute=True):
+			Page.objects.filter(slug='loose').update(menu_category='about')
+			Page.objects.get(slug='loose').save()
+		response = self.client.get(self.url)
+		self.assertEqual(response['X-Cache'], 'MISS')
+		self.assertIn('loose', [entry['slug'] for entry in self._children(response.json(), 'about')])
+
+		with self.captureOnCommitCallbacks(execute=True):
+			proxy = SummaryPage.objects.get(slug='about-summary')
+			proxy.title_en = 'Overview'
+			proxy.save()
+		response = self.client.get(self.url)
+		self.assertEqual(response['X-Cache'], 'MISS')
+		self.assertEqual(self._children(response.json(), 'about')[0]['title_en'], 'Overview')
+
+
+class SpaShellTest(TestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		self.index = Path(tmp.name) / 'index.html'
+		self.index.write_text('<html><head><title>App</title></head><body><div id="root"></div></body></html>')
+		override = self.settings(SPA_INDEX_HTML=self.index)
+		override.enable()
+		self.addCleanup(override.disable)
+		with self.captureOnCommitCallbacks(execute=True):
+			page = Page.objects.create(slug='wine', title_uk='Вино', title_en='Wine </script>', menu_category='economy')
+			PageSection.objects.create(page=page, title_en='Cellars')
+
+	def _bootstrap(self, path):
+		html = self.client.get(path).content.decode()
+		match = re.search(r'<script id="bootstrap-data" type="application/json">(.*?)</script>', html)
+		self.assertTrue(html.startswith('<html><head><title>App</title><script'))
+		return json.loads(match.group(1))
+
+	def test_page_payload_and_menu_are_inlined(self):
+		data = self._bootstrap('/pages/wine')
+		self.assertEqual(data['page']['slug'], 'wine')
+		self.assertEqual(data['page']['data'], self.client.get(reverse('page_detail', args=['wine'])).json())
+		self.assertIsNone(data['catalogItem'])
+		economy = next(c for c in data['navigation']['categories'] if c['key'] == 'economy')
+		self.assertEqual(economy['children'][-1]['path'], '/pages/wine')
+
+	def test_unknown_routes_still_get_the_shell(self):
+		data = self._bootstrap('/pages/missing')
+		self.assertIsNone(data['page'])
+		self.assertEqual(self._bootstrap('/contacts')['path'], '/contacts')
+
+	def test_shell_is_read_once(self):
+		shell._split_shell.cache_clear()
+		self.client.get('/contacts')
+		self.client.get('/pages/wine')
+		self.assertEqual(shell._split_shell.cache_info().misses, 1)
+
+
+class ExportSiteTest(TestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		self.root = Path(tmp.name)
+		index = self.root / 'index.html'
+		index.write_text('<html><head></head><body></body></html>')
+		override = self.settings(
+			SPA_INDEX_HTML=index, SITE_EXPORT_DIR=str(self.root / 'export'), SITE_URL='http://testserver',
+		)
+		override.enable()
+		self.addCleanup(override.disable)
+		with self.captureOnCommitCallbacks(execute=True):
+			Page.objects.create(slug='wine', title_uk='Вино', title_en='Wine')
+			PageContent.objects.create(slug='about-summary', title_uk='Огляд', title_en='Summary')
+
+	def _export(self):
+		call_command('export_site', workers=1, stdout=io.StringIO())
+		return json.loads((self.root / 'export' / 'manifest.json').read_text())['entries']
+
+	def test_export_writes_hashed_compressed_files(self):
+		entries = self._export()
+		entry = entries['/api/pages/wine/?lang=en']
+		self.assertRegex(entry['file'], r'^api/pages/wine/en\.[0-9a-f]{12}\.json$')
+		exported = (self.root / 'export' / entry['file']).read_bytes()
+		# ?fallback=1 is the default, but keeps the request off the export
+		self.assertEqual(json.loads(exported), self.client.get('/api/pages/wine/', {'lang': 'en', 'fallback': '1'}).json())
+		gz = (self.root / 'export' / f"{entry['file']}.gz").read_bytes()
+		self.assertEqual(gzip.decompress(gz), exported)
+		self.assertIn('/api/content/about-summary/', entries)
+		for url in ('/api/pages/', '/api/content/?lang=uk', '/api/catalog/catalog-items/?lang=en'):
+			self.assertIn(url, entries)
+		self.assertEqual(entries['/api/catalog/catalog-items/']['tags'].keys(), {'catalog'})
+		self.assertEqual(entries['/pages/wine']['content_type'], 'text/html')
+		self.assertIn('/industry', entries)
+
+	def test_middleware_serves_export_until_content_changes(self):
+		self._export()
+		response = self.client.get('/api/pages/wine/', HTTP_ACCEPT_ENCODING='gzip')
+		self.assertEqual(response['X-Export'], 'HIT')
+		self.assertEqual(response['Content-Encoding'], 'gzip')
+		self.assertEqual(json.loads(gzip.decompress(b''.join(response.streaming_content)))['slug'], 'wine')
+		etag = response['ETag']
+		self.assertEqual(self.client.get('/api/pages/wine/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+		self.assertEqual(self.client.get('/api/pages/')['X-Export'], 'HIT')
+		# Rendered for SITE_URL: other origins get the live views
+		self.assertNotIn('X-Export', self.client.get('/api/pages/', secure=True))
+
+		with self.captureOnCommitCallbacks(execute=True):
+			Page.objects.get(slug='wine').save()
+		response = self.client.get('/api/pages/wine/')
+		self.assertNotIn('X-Export', response)
+		self.assertEqual(response.json()['slug'], 'wine')
+		response = self.client.get('/api/pages/')
+		self.assertNotIn('X-Export', response)
+		self.assertEqual([page['slug'] for page in response.json()['results']], ['wine'])
+
+	def test_prune_only_removes_files_of_the_previous_export(self):
+		export = self.root / 'export'
+		export.mkdir()
+		(export / 'notes.txt').write_text('not part of the export')
+		old = self._export()['/api/pages/wine/']['file']
+		with self.captureOnCommitCallbacks(execute=True):
+			Page.objects.filter(slug='wine').update(title_en='Wines')
+			Page.objects.get(slug='wine').save()
+		new = self._export()['/api/pages/wine/']['file']
+		self.assertNotEqual(old, new)
+		self.assertFalse((export / old).exists())
+		self.assertFalse((export / f'{old}.gz').exists())
+		self.assertTrue((export / new).exists())
+		self.assertTrue((export / 'notes.txt').exists())
+
+	def test_empty_output_is_refused(self):
+		with self.settings(SITE_EXPORT_DIR=''):
+			with self.assertRaises(CommandError):
+				call_command('export_site', workers=1, stdout=io.StringIO())
@@ -1,35 +1,57 @@
 from rest_framework import generics
-from .models import PageContent, Page
+from .models import PageContent, Page, PageSnapshot
 from .serializers import PageContentSerializer, PageSerializer, PageListSerializer
+from .queries import with_page_tree, with_section_count
+from .navigation import build_navigation
+from .snapshots import get_page_snapshot
+from .outbox import enqueue
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail, BadHeaderError
 from django.conf import settings
-from rest_framework.throttling import AnonRateThrottle
+from django.http import HttpResponse
+from rest_framework.exceptions import ValidationError
+from django.db.models import Count, Max
+from core.cache import CachedResponseMixin
+from core.compiled import CompiledSerializerMixin, compile_serializer
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from core.streaming import StreamingListMixin
+from core.projection import ProjectionViewMixin, load_only, project_language
 
-class PageContentListView(generics.ListAPIView):
+class PageContentListView(ProjectionViewMixin, ConditionalGetMixin, CachedResponseMixin, StreamingListMixin,
+                          CompiledSerializerMixin, generics.ListAPIView):
     """
     List all page content or filter by section.
-    Query params: ?section=economy|about|investment
+    Query params: ?section=economy|about|investment, ?lang=uk|en,
+    ?page_size=, ?cursor=, ?stream=1 (everything, streamed)
     """
     serializer_class = PageContentSerializer
     permission_classes = [AllowAny]
-    
+    authentication_classes = []
+    pagination_class = KeysetPagination
+    keyset_ordering = ('slug',)
+    cache_tags = ('content',)
+
     def get_queryset(self):
         queryset = PageContent.objects.all()
         section = self.request.query_params.get('section', None)
         if section:
             queryset = queryset.filter(section=section)
-        return queryset.order_by('slug')
+        queryset = load_only(queryset, self.get_field_spec(), self.serializer_class)
+        return project_language(queryset, spec=self.get_field_spec(), **self.get_language_options()).order_by('slug')
+
+    def get_validator_state(self):
+        # No Last-Modified: a deleted row leaves Max(updated_at) as it was, only the count changes
+        return None, PageContent.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
-class PageContentView(generics.RetrieveAPIView):
+class PageContentView(ProjectionViewMixin, ConditionalGetMixin, CachedResponseMixin, CompiledSerializerMixin, generics.RetrieveAPIView):
     """
     Retrieve specific page content by slug.
     """
@@ -37,6 +59,18 @@ class PageContentView(generics.RetrieveAPIView):
     serializer_class = PageContentSerializer
     lookup_field = 'slug'
     permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get_queryset(self):
+        queryset = load_only(super().get_queryset(), self.get_field_spec(), self.serializer_class)
+        return project_language(queryset, spec=self.get_field_spec(), **self.get_language_options())
+
+    def get_cache_tags(self):
+        return (f"content:{self.kwargs['slug']}",)
+
+    def get_validator_state(self):
+        updated = PageContent.objects.filter(slug=self.kwargs['slug']).values_list('updated_at', flat=True).first()
+        return (updated, updated) if updated else None
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -48,13 +82,17 @@ class PageContentView(generics.RetrieveAPIView):
 # NEW DYNAMIC PAGE API VIEWS
 # ===========================================
 
-class PageListView(generics.ListAPIView):
+class PageListView(ProjectionViewMixin, ConditionalGetMixin, CachedResponseMixin, CompiledSerializerMixin, generics.ListAPIView):
     """
     List all active dynamic pages.
     Returns lightweight list without sections.
     """
     serializer_class = PageListSerializer
     permission_classes = [AllowAny]
+    authentication_classes = []
+    pagination_class = KeysetPagination
+    keyset_ordering = ('order', 'title_uk', 'id')
+    cache_tags = ('pages',)
     
     def get_queryset(self):
         # Only return active pages, ordered by order field
@@ -65,23 +103,135 @@ class PageListView(generics.ListAPIView):
         if menu_only:
             queryset = queryset.filter(show_in_menu=True)
         
-        return queryset.order_by('order', 'title_uk')
+        spec = self.get_field_spec()
+        queryset = load_only(queryset, spec, self.serializer_class)
+        queryset = project_language(queryset, spec=spec, **self.get_language_options())
+        if spec.includes('section_count'):
+            queryset = with_section_count(queryset)
+        return queryset.order_by(*self.keyset_ordering)
 
+    def get_validator_state(self):
+        # section_count is part of every row, so sections count as well. No
+        # Last-Modified: deletions only show in the counts
+        return None, Page.objects.filter(is_active=True).aggregate(
+            pages_updated=Max('updated_at'),
+            sections_updated=Max('sections__updated_at'),
+            page_count=Count('id', distinct=True),
+            section_count=Count('sections', distinct=True),
+        )
 
-class PageDetailView(generics.RetrieveAPIView):
+
+class PageDetailView(ProjectionViewMixin, ConditionalGetMixin, CachedResponseMixin, CompiledSerializerMixin, generics.RetrieveAPIView):
     """
     Retrieve specific dynamic page by slug with all sections.
+    JSON requests are answered from the stored PageSnapshot; the live
+    serializer (with a fixed number of queries) handles snapshot misses,
+    ?fields=/?expand= and non-default ?fallback= values.
     """
     queryset = Page.objects.filter(is_active=True)
     serializer_class = PageSerializer
     lookup_field = 'slug'
     permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get_queryset(self):
+        return with_page_tree(super().get_queryset(), spec=self.get_field_spec(), **self.get_language_options())
+
+    def get_cache_tags(self):
+        return (f"page:{self.kwargs['slug']}",)
+
+    def get_validator_state(self):
+        # The snapshot is re-rendered on every change of the tree, deletions
+        # included, so its own timestamp validates without touching the tree.
+        # Pages without one (inactive, unknown, not rendered yet) get no validators.
+        updated = PageSnapshot.objects.filter(slug=self.kwargs['slug']).values_list('updated_at', flat=True).first()
+        return (updated, updated) if updated is not None else None
+
+    def retrieve(self, request, *args, **kwargs):
+        options = self.get_language_options()
+        if request.accepted_renderer.format == 'json' and self.get_field_spec().is_default and (
+            not options['lang'] or options['fallback'] == settings.API_LANGUAGE_FALLBACK
+        ):
+            payload = get_page_snapshot(kwargs[self.lookup_field], options['lang'])
+            if payload:
+                return HttpResponse(payload, content_type='application/json')
+        return super().retrieve(request, *args, **kwargs)
+
+
+class BatchView(ProjectionViewMixin, CachedResponseMixin, generics.ListAPIView):
+    """
+    Several pages and legacy content blocks in one response.
+    Query params: ?pages=slug,slug&content=slug,slug (plus ?lang=, ?fields=,
+    ?expand=). Each kind costs one query per model no matter how many slugs
+    are asked for; unknown or inactive slugs map to null.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get_slugs(self, param):
+        slugs = []
+        for slug in self.request.query_params.get(param, '').split(','):
+            slug = slug.strip()
+            if slug and slug not in slugs:
+                slugs.append(slug)
+        if len(slugs) > settings.API_BATCH_MAX_SLUGS:
+            raise ValidationError({param: f'At most {settings.API_BATCH_MAX_SLUGS} slugs per request.'})
+        return slugs
+
+    def get_cache_tags(self):
+        return (
+            *(f'page:{slug}' for slug in self.get_slugs('pages')),
+            *(f'content:{slug}' for slug in self.get_slugs('content')),
+        )
+
+    def get_pages(self, slugs):
+        queryset = Page.objects.filter(is_active=True, slug__in=slugs)
+        return with_page_tree(queryset, spec=self.get_field_spec(), required=('slug',), **self.get_language_options())
+
+    def get_contents(self, slugs):
+        spec = self.get_field_spec()
+        queryset = load_only(PageContent.objects.filter(slug__in=slugs), spec, PageContentSerializer, required=('slug',))
+        return project_language(queryset, spec=spec, **self.get_language_options())
+
+    def render_by_slug(self, queryset, serializer_class, context):
+        """``{slug: representation}`` of ``queryset``, compiled when possible (see core.compiled)."""
+        plan = compile_serializer(serializer_class, context)
+        rows = plan.values(queryset, extra=('slug',)) if plan else None
+        if rows is None:
+            return {obj.slug: serializer_class(obj, context=context).data for obj in queryset}
+        rows = list(rows)
+        return {row['slug']: data for row, data in zip(rows, plan.render(rows, queryset, self.request))}
+
+    def list(self, request, *args, **kwargs):
+        context = self.get_serializer_context()
+        batch = {}
+        for param, fetch, serializer_class in (
+            ('pages', self.get_pages, PageSerializer),
+            ('content', self.get_contents, PageContentSerializer),
+        ):
+            slugs = self.get_slugs(param)
+            found = self.render_by_slug(fetch(slugs), serializer_class, context) if slugs else {}
+            batch[param] = {slug: found.get(slug) for slug in slugs}
+        return Response(batch)
+
+
+class NavigationView(CachedResponseMixin, generics.ListAPIView):
+    """
+    The site menu, grouped by category (about/economy/investment), with the
+    legacy proxy pages and the dynamic pages shown in the menu.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    cache_tags = ('navigation',)
+
+    def list(self, request, *args, **kwargs):
+        return Response(build_navigation())
 
 
 class ContactAPIView(APIView):
-    """Simple contact endpoint to forward messages to configured recipients."""
+    """Contact endpoint: queues messages for the configured recipients (see content.outbox)."""
     permission_classes = [AllowAny]
-    throttle_classes = [AnonRateThrottle]
+    throttle_scope = 'contact'
 
     def post(self, request, *args, **kwargs):
         name = request.data.get('name', '').strip()
@@ -91,8 +241,8 @@ class ContactAPIView(APIView):
         if not name or not email or not message:
             return Response({'detail': 'name, email and message are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        subject = f"Contact form message from {name} <{email}>"
-        body = f"From: {name} <{email}>\n\n{message}"
+        if any(char in value for value in (name, email) for char in '\r\n'):
+            return Response({'detail': 'Invalid header found.'}, status=status.HTTP_400_BAD_REQUEST)
 
         recipients = getattr(settings, 'CONTACT_RECIPIENTS', [])
         if not recipients:
@@ -102,11 +252,6 @@ class ContactAPIView(APIView):
         if not recipients:
             return Response({'detail': 'No contact recipients configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        try:
-            send_mail(subject, body, getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@localhost'), recipients, fail_silently=False)
-        except BadHeaderError:
-            return Response({'detail': 'Invalid header found.'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response({'detail': 'Failed to send message.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        return Response({'detail': 'Message sent successfully.'}, status=status.HTTP_200_OK)
+        # Delivered off the request path, so a slow SMTP server never holds a worker
+        enqueue(name, email, message, recipients)
+        return Response({'detail': 'Message received.'}, status=status.HTTP_202_ACCEPTED)
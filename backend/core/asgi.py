@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Serving processes send what earlier ones left in the contact outbox
+from content.outbox import start_drain  # noqa: E402
+
+start_drain()
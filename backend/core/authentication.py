@@ -0,0 +1,84 @@
+"""
+JWT authentication with an in-process cache of validated tokens.
+
+Public read views set ``authentication_classes = []`` and never look at the
+Authorization header. Views that do authenticate would otherwise decode
+the token and fetch the user from ``auth_user`` on every request; here the
+result is kept per raw token for at most JWT_USER_CACHE_TTL seconds (never
+past the token's own expiry) in a bounded LRU. Saving or deleting a user
+drops their entries, so deactivation and permission changes apply at once
+within this process (other workers catch up within the TTL).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+class TokenUserCache:
+    """Thread-safe LRU of ``raw token -> (user, validated token, expires at)``."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw_token, now):
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry[2] <= now:
+                del self._entries[raw_token]
+                return None
+            self._entries.move_to_end(raw_token)
+            return entry[0], entry[1]
+
+    def set(self, raw_token, user, validated_token, expires_at):
+        with self._lock:
+            self._entries[raw_token] = (user, validated_token, expires_at)
+            self._entries.move_to_end(raw_token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def forget_user(self, pk):
+        with self._lock:
+            for raw_token in [key for key, entry in self._entries.items() if entry[0].pk == pk]:
+                del self._entries[raw_token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenUserCache(maxsize=1000)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _forget_user(sender, instance, **kwargs):
+    token_cache.forget_user(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        now = time.time()
+        cached = token_cache.get(raw_token, now)
+        if cached is not None:
+            return cached
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        expires_at = min(now + settings.JWT_USER_CACHE_TTL, validated_token.get('exp', now))
+        token_cache.set(raw_token, user, validated_token, expires_at)
+        return user, validated_token
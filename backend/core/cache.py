@@ -0,0 +1,177 @@
+"""
+Shared response cache for the public read API.
+
+Rendered JSON is stored in the ``API_CACHE_ALIAS`` cache (database-backed by
+default, Redis when REDIS_URL is set) so every gunicorn worker sees the same
+entries. Keys are built from the endpoint, the origin (scheme and host,
+which absolute media and pagination URLs embed), query string, language and
+the current version of each tag the response depends on (``page:<slug>``,
+``catalog``, ...). Invalidating a tag just stores a new version, which makes
+every key built from the old one unreachable.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+STATS_KEY = 'api-cache-stats'
+
+_stats_lock = threading.Lock()
+_local_stats = Counter()
+_last_flush = time.monotonic()
+
+
+def api_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def tag_versions(tags):
+    """Return the current version of each tag, creating missing ones."""
+    cache = api_cache()
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    """Drop every cached response that depends on any of ``tags``."""
+    if tags:
+        api_cache().set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def invalidate_on_commit(*tags):
+    """Invalidate after the surrounding transaction commits, so a concurrent
+    request cannot re-cache data that is about to change."""
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+def request_language(request):
+    return request.query_params.get('lang', '')
+
+
+def request_origin(request):
+    """``scheme://host`` of a request, part of every absolute URL a response carries."""
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def build_cache_key(endpoint, request, tags):
+    query = sorted(request.query_params.lists())
+    parts = [endpoint, request_origin(request), repr(query), request_language(request), *tag_versions(tags)]
+    digest = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    return f'api:{endpoint}:{digest}'
+
+
+def cached_payload(name, tags, build):
+    """
+    Rendered bytes of ``build()`` cached like an API response, for payloads
+    served outside a DRF view (e.g. the data inlined into the SPA shell).
+    """
+    timeout = settings.API_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+    digest = hashlib.md5('|'.join([name, *tag_versions(tags)]).encode('utf-8')).hexdigest()
+    key = f'payload:{name}:{digest}'
+    cache = api_cache()
+    content = cache.get(key)
+    if content is None:
+        content = build()
+        cache.set(key, content, timeout)
+    return content
+
+
+def record(endpoint, outcome):
+    """
+    Count a hit or miss. Counters are kept per process and folded into the
+    shared cache every API_CACHE_STATS_FLUSH_INTERVAL seconds, so monitoring
+    does not add a cache write to every request.
+    """
+    global _last_flush
+    with _stats_lock:
+        _local_stats[(endpoint, outcome)] += 1
+        if time.monotonic() - _last_flush < settings.API_CACHE_STATS_FLUSH_INTERVAL:
+            return
+        pending = dict(_local_stats)
+        _local_stats.clear()
+        _last_flush = time.monotonic()
+    flush_stats(pending)
+
+
+def flush_stats(pending):
+    cache = api_cache()
+    stats = cache.get(STATS_KEY) or {}
+    for (endpoint, outcome), count in pending.items():
+        entry = stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        entry[outcome] += count
+    cache.set(STATS_KEY, stats, timeout=None)
+
+
+def cache_stats():
+    """Hit/miss counters for every endpoint, including this process' unflushed counts."""
+    with _stats_lock:
+        pending = dict(_local_stats)
+    stats = api_cache().get(STATS_KEY) or {}
+    for (endpoint, outcome), count in pending.items():
+        entry = stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        entry[outcome] += count
+    hits = sum(entry['hits'] for entry in stats.values())
+    misses = sum(entry['misses'] for entry in stats.values())
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+        'endpoints': stats,
+    }
+
+
+class CachedResponseMixin:
+    """
+    Cache successful JSON responses of a read-only DRF view.
+    Views declare the tags their output depends on via ``get_cache_tags``.
+    """
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def get(self, request, *args, **kwargs):
+        timeout = settings.API_CACHE_TIMEOUT
+        if not timeout or request.accepted_renderer.format != 'json':
+            return super().get(request, *args, **kwargs)
+
+        endpoint = request.resolver_match.url_name if request.resolver_match else type(self).__name__
+        key = build_cache_key(endpoint, request, self.get_cache_tags())
+        cache = api_cache()
+        content = cache.get(key)
+        if content is not None:
+            record(endpoint, 'hits')
+            response = HttpResponse(content, content_type='application/json')
+            response['X-Cache'] = 'HIT'
+            patch_vary_headers(response, ('Accept',))
+            return response
+
+        record(endpoint, 'misses')
+        response = super().get(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        if response.status_code == 200 and not response.streaming:
+            def store(rendered):
+                cache.set(key, rendered.content, timeout)
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,311 @@
+"""
+Compiled serializers for the read API.
+
+Rendering a page tree or a catalog list through ModelSerializer costs a
+field lookup, ``get_attribute`` and ``to_representation`` dispatch per key
+per object, on model instances built for nothing else. A Plan is compiled
+once per serializer class and projection (``lang``, ``fallback`` and the
+FieldSpec, see core.projection) from the serializer's own bound fields, so
+projection, field order and conversions are exactly the serializer's. It
+then renders plain dicts straight from ``.values()`` rows:
+
+* columns DRF returns unchanged are copied, other fields keep their
+  ``to_representation`` (dates, choices);
+* nested ``many=True`` serializers become one ``.values()`` query per level,
+  reusing the queryset's Prefetch querysets (ordering, language annotations);
+* media URLs of each level are resolved in one ``url_cache.prime`` call.
+
+Serializers using a field the plan cannot reproduce (or method fields that
+are not backed by an annotation of the same name, like ``section_count``)
+are not compiled and keep going through DRF; API_COMPILED_SERIALIZERS turns
+the compiled path off altogether.
+"""
+import functools
+import threading
+from collections import defaultdict
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.signals import setting_changed
+from django.db.models import Prefetch
+from django.dispatch import receiver
+from django.utils.encoding import is_protected_type
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from uploads.fields import ImageMetaField, MediaUrlField, SrcsetField
+from uploads.media import concrete, url_cache
+from .projection import TranslatedField, other_language, resolved_name
+
+# DRF fields whose to_representation() returns database values unchanged
+PASSTHROUGH_FIELDS = {
+    serializers.CharField, serializers.SlugField, serializers.EmailField, serializers.URLField,
+    serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField,
+}
+
+MAX_PLANS = 256
+
+# How a key is computed: from a column value, from the whole row, from a
+# file name and the request, or from the rows of a nested level
+VALUE, ROW, URL, NESTED = range(4)
+
+
+class NotCompilable(Exception):
+    """The serializer uses a field the compiled path cannot reproduce."""
+
+
+def translated_getter(base, lang, fallback):
+    resolved, own, other = resolved_name(base), f'{base}_{lang}', f'{base}_{other_language(lang)}'
+
+    def get(row):
+        # Same rules as TranslatedField, on a row instead of an instance
+        if resolved in row:
+            return row[resolved]
+        value = row[own]
+        if not value and fallback:
+            value = row[other]
+        return value
+    return get
+
+
+def model_field_value(model_field, value):
+    """DRF ModelField output (fields without a serializer mapping) for a column value."""
+    if is_protected_type(value):
+        return value
+    return model_field.value_to_string(SimpleNamespace(**{model_field.attname: value}))
+
+
+def file_url(storage, use_url, name, request=None):
+    """DRF FileField/ImageField output for a stored file name."""
+    if not name:
+        return None
+    if not use_url:
+        return name
+    url = url_cache.url(storage, name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class Plan:
+    """Columns to select for one serializer level and how each key is computed."""
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = {self.pk: None}
+        self.fields = []  # (key, how, column, convert)
+        self.translated = []  # (resolved annotation, own column, other column, fallback)
+        self.annotations = []
+        self.media = []  # (column, storage, holds derivative metadata)
+        self.children = {}  # key -> (relation, parent foreign key, related model, Plan)
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.add(field)
+
+    def select(self, column):
+        self.columns[column] = None
+        return column
+
+    def model_field(self, name):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise NotCompilable(f'{self.model.__name__}.{name} is not a model field')
+        if not field.concrete:
+            raise NotCompilable(f'{self.model.__name__}.{name} is not a column')
+        return field
+
+    def add(self, field):
+        key, source = field.field_name, field.source
+        if isinstance(field, serializers.ListSerializer):
+            relation = self.model._meta.fields_map.get(source)
+            if relation is None or not relation.one_to_many:
+                raise NotCompilable(f'{key} is not a reverse foreign key')
+            child = Plan(field.child)
+            if child.annotations:
+                raise NotCompilable(f'{key} needs annotations a prefetch cannot provide')
+            self.children[key] = (source, relation.field.name, relation.related_model, child)
+            self.fields.append((key, NESTED, None, None))
+        elif isinstance(field, serializers.BaseSerializer):
+            raise NotCompilable(f'{key} is a nested single object')
+        elif isinstance(field, TranslatedField):
+            own, other = f'{field.base}_{field.lang}', f'{field.base}_{other_language(field.lang)}'
+            self.translated.append((resolved_name(field.base), own, other, field.fallback))
+            self.fields.append((key, ROW, None, translated_getter(field.base, field.lang, field.fallback)))
+        elif isinstance(field, MediaUrlField):
+            self.media.append((self.select(source), field.storage, False))
+            self.fields.append((key, URL, source, field.url))
+        elif isinstance(field, ImageMetaField):
+            if isinstance(field, SrcsetField):
+                self.media.append((source, field.storage, True))
+            self.fields.append((key, VALUE, self.select(source), field.to_representation))
+        elif isinstance(field, serializers.FileField):
+            storage = concrete(self.model_field(source).storage)
+            use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+            self.media.append((self.select(source), storage, False))
+            self.fields.append((key, URL, source, functools.partial(file_url, storage, use_url)))
+        elif isinstance(field, serializers.SerializerMethodField):
+            self.annotations.append(key)
+            self.fields.append((key, VALUE, key, None))
+        elif isinstance(field, serializers.ModelField):
+            model_field = self.model_field(field.model_field.name)
+            convert = functools.partial(model_field_value, model_field)
+            self.fields.append((key, VALUE, self.select(model_field.name), convert))
+        elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            self.fields.append((key, VALUE, self.select(self.model_field(source).name), None))
+        elif isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+            raise NotCompilable(f'{key} renders related objects')
+        elif source == '*' or '.' in source:
+            raise NotCompilable(f'{key} is computed from {source!r}')
+        else:
+            convert = None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+            self.fields.append((key, VALUE, self.select(self.model_field(source).name), convert))
+
+    def values(self, queryset, extra=()):
+        """
+        ``queryset`` as rows holding everything the plan reads (plus
+        ``extra`` columns); None when it lacks an annotation the plan needs.
+        """
+        annotations = queryset.query.annotations
+        if any(name not in annotations for name in self.annotations):
+            return None
+        columns = dict.fromkeys([*self.columns, *extra, *self.annotations])
+        for resolved, own, other, fallback in self.translated:
+            if resolved in annotations:
+                columns[resolved] = None
+            else:
+                columns[own] = None
+                if fallback:
+                    columns[other] = None
+        return queryset.prefetch_related(None).values(*columns)
+
+    def render(self, rows, queryset=None, request=None):
+        """Representations of ``rows``, with nested levels loaded like ``queryset`` prefetches them."""
+        lookups = []
+        for lookup in getattr(queryset, '_prefetch_related_lookups', ()):
+            if not isinstance(lookup, Prefetch):
+                lookup = Prefetch(lookup)
+            lookups.append((lookup.prefetch_to, lookup.queryset))
+        return self._render(list(rows), lookups, request)
+
+    def _render(self, rows, lookups, request):
+        nested = {key: self.fetch_children(key, rows, lookups, request) for key in self.children}
+        url_cache.prime(self.media_keys(rows))
+
+        bound = []
+        for key, how, column, convert in self.fields:
+            if how == URL:
+                bound.append((key, column, functools.partial(convert, request=request)))
+            elif how == NESTED:
+                groups = nested[key]
+                bound.append((key, None, lambda row, groups=groups: groups.get(row[self.pk], [])))
+            else:
+                bound.append((key, column, convert))
+
+        data = []
+        for row in rows:
+            item = {}
+            for key, column, convert in bound:
+                if column is None:
+                    item[key] = convert(row)
+                else:
+                    value = row[column]
+                    item[key] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    def fetch_children(self, key, rows, lookups, request):
+        """``{parent pk: [child representations]}`` for one nested level."""
+        relation, parent, model, plan = self.children[key]
+        if not rows:
+            return {}
+        queryset = next((qs for path, qs in lookups if path == relation and qs is not None), None)
+        if queryset is None:
+            queryset = model._default_manager.all()
+        queryset = queryset.filter(**{f'{parent}__in': [row[self.pk] for row in rows]})
+        child_rows = list(plan.values(queryset, extra=(parent,)))
+        prefix = f'{relation}__'
+        child_lookups = [(path[len(prefix):], qs) for path, qs in lookups if path.startswith(prefix)]
+
+        groups = defaultdict(list)
+        for row, item in zip(child_rows, plan._render(child_rows, child_lookups, request)):
+            groups[row[parent]].append(item)
+        return groups
+
+    def media_keys(self, rows):
+        for column, storage, is_meta in self.media:
+            for row in rows:
+                value = row[column]
+                if is_meta:
+                    for variant in (value or {}).get('variants', ()):
+                        yield storage, variant['name']
+                elif value:
+                    yield storage, value
+
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+@receiver(setting_changed)
+def _reset_plans(setting, **kwargs):
+    # Plans hold the storages their fields were bound to
+    if setting in ('STORAGES', 'MEDIA_URL'):
+        with _plans_lock:
+            _plans.clear()
+
+
+def compile_serializer(serializer_class, context):
+    """The (cached) Plan of ``serializer_class`` under the projection in ``context``, or None."""
+    if not settings.API_COMPILED_SERIALIZERS:
+        return None
+    spec = context.get('field_spec')
+    key = (serializer_class, context.get('lang'), context.get('fallback', True), spec.key() if spec else None)
+    with _plans_lock:
+        if key in _plans:
+            return _plans[key]
+    # Only the projection shapes the plan; the request is passed to render()
+    projection = {name: context[name] for name in ('lang', 'fallback', 'field_spec') if name in context}
+    try:
+        plan = Plan(serializer_class(context=projection))
+    except NotCompilable:
+        plan = None
+    with _plans_lock:
+        if len(_plans) >= MAX_PLANS:
+            _plans.clear()
+        _plans[key] = plan
+    return plan
+
+
+class CompiledSerializerMixin:
+    """
+    Generic view mixin: ``list`` and ``retrieve`` render through the compiled
+    plan of the view's serializer when there is one, through DRF otherwise.
+    """
+
+    def get_compiled_plan(self):
+        return compile_serializer(self.get_serializer_class(), self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_compiled_plan()
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = plan.values(queryset) if plan else None
+        if rows is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page, queryset, request))
+        return Response(plan.render(rows, queryset, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.get_compiled_plan()
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = plan.values(queryset) if plan else None
+        if rows is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(plan.render([row], queryset, request)[0])
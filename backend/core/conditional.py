@@ -0,0 +1,53 @@
+"""
+Conditional GET (ETag / Last-Modified) for read-only API views.
+
+Views describe the state their response is built from with one cheap
+query: usually an aggregate of max ``updated_at`` plus row counts, so that
+deletions change the ETag. Last-Modified is only sent when it moves on
+deletions as well (e.g. a page snapshot's own timestamp); a Max() over
+rows that can disappear would keep answering If-Modified-Since with 304.
+When the client's validators still match, a 304 is returned before the
+cache, the snapshot or any serializer is touched.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .cache import request_origin
+
+
+class ConditionalGetMixin:
+    """
+    Subclasses implement ``get_validator_state`` returning
+    ``(last_modified, token)`` or None when the object does not exist.
+    ``token`` is any value that changes whenever the response would.
+    """
+
+    def get_validator_state(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        state = self.get_validator_state()
+        if state is None:
+            return super().get(request, *args, **kwargs)
+
+        last_modified, token = state
+        # Absolute URLs in the body depend on the origin as well as the path
+        representation = (
+            f'{request_origin(request)}|{request.get_full_path()}|{request.accepted_renderer.format}|{token!r}'
+        )
+        digest = hashlib.md5(representation.encode('utf-8')).hexdigest()
+        etag = quote_etag(digest)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Clients must revalidate, but may keep the body around
+            response.setdefault('Cache-Control', 'no-cache')
+        return response
@@ -0,0 +1,297 @@
+"""
+Static export of the public site (``manage.py export_site``).
+
+The default response of every list endpoint (its first page), every detail
+response of the read API (bilingual and per ``?lang=``), the menu and the
+SPA shell of every content route are rendered through the regular views and written under SITE_EXPORT_DIR with content-hashed names,
+next to precompressed ``.gz`` (and ``.br`` when Brotli is installed)
+variants. ``manifest.json`` maps each URL to its files and records the
+cache tag versions (see core.cache) the response was built from.
+
+The directory can be synced to a CDN as is. ExportMiddleware also serves
+it from Django: an entry is used only while its tags still have the
+recorded versions, so any edit after the export falls through to the live
+views until the next export.
+"""
+import functools
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils.cache import patch_vary_headers
+
+from catalog.models import CatalogItem
+from content.models import Page, PageContent
+from content.navigation import LEGACY_ROUTES
+from .cache import request_origin, tag_versions
+from .projection import LANGUAGES
+from .shell import PAGE_ROUTES
+
+try:
+    import brotli
+except ImportError:  # optional: .br variants are skipped without it
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+EXTENSIONS = {'application/json': 'json', 'text/html': 'html'}
+
+
+def export_targets():
+    """``(url, path, params, tags)`` for everything the export contains."""
+    targets = []
+
+    def api(path, tags):
+        targets.append((path, path, {}, tags))
+        for lang in LANGUAGES:
+            targets.append((f'{path}?lang={lang}', path, {'lang': lang}, tags))
+
+    def shell(path, tags):
+        if os.path.exists(settings.SPA_INDEX_HTML):
+            targets.append((path, path, {}, ('navigation', *tags)))
+
+    api('/api/navigation/', ('navigation',))
+    # Further pages (?cursor=) and ?stream=1 are left to the live views
+    api('/api/pages/', ('pages',))
+    api('/api/content/', ('content',))
+    api('/api/catalog/catalog-items/', ('catalog',))
+    for slug in Page.objects.filter(is_active=True).values_list('slug', flat=True):
+        api(f'/api/pages/{slug}/', (f'page:{slug}',))
+        shell(f'/pages/{slug}', (f'page:{slug}',))
+    for slug in PageContent.objects.values_list('slug', flat=True):
+        api(f'/api/content/{slug}/', (f'content:{slug}',))
+    for slug in CatalogItem.objects.filter(is_active=True).values_list('slug', flat=True):
+        api(f'/api/catalog/catalog-items/{slug}/', (f'catalog:{slug}',))
+        shell(f'/catalog/{slug}', (f'catalog:{slug}',))
+    for path, slug in PAGE_ROUTES.items():
+        shell(path, (f'page:{slug}',))
+    for path in sorted({path for path, _ in LEGACY_ROUTES.values()}):
+        shell(path, ())
+    return targets
+
+
+def render(path, params):
+    """Render ``path`` through its view; ``(content, content_type)`` or None unless 200."""
+    site = urlsplit(settings.SITE_URL)
+    request = RequestFactory().get(
+        path, params, HTTP_HOST=site.netloc, HTTP_ACCEPT='application/json', secure=site.scheme == 'https',
+    )
+    match = request.resolver_match = resolve(path)
+    view = match.func
+    if hasattr(view, 'cls'):
+        # An export renders thousands of URLs from one address
+        view = view.cls.as_view(throttle_classes=[])
+    try:
+        response = view(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return None
+    return bytes(response.content), response['Content-Type'].split(';')[0]
+
+
+def file_name(url, digest, extension):
+    """``api/pages/wine/en.<hash>.json`` for ``/api/pages/wine/?lang=en``."""
+    path, _, query = url.partition('?')
+    stem = query.replace('lang=', '') or 'index'
+    return str(Path(path.strip('/')) / f'{stem}.{digest[:12]}.{extension}')
+
+
+def write_variants(root, name, content):
+    """Write the file and its compressed variants; returns the encodings written."""
+    target = Path(root) / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(content)
+    target.with_name(target.name + '.gz').write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+    encodings = ['gzip']
+    if brotli is not None:
+        target.with_name(target.name + '.br').write_bytes(brotli.compress(content))
+        encodings.append('br')
+    return encodings
+
+
+def export_chunk(root, targets):
+    """Worker: render and write a batch of targets, returning their manifest entries."""
+    entries = {}
+    for url, path, params, tags in targets:
+        # Versions are read first: a change while rendering makes the entry stale, not wrong
+        versions = dict(zip(tags, tag_versions(tags)))
+        rendered = render(path, params)
+        if rendered is None:
+            continue
+        content, content_type = rendered
+        digest = hashlib.sha256(content).hexdigest()
+        name = file_name(url, digest, EXTENSIONS.get(content_type, 'bin'))
+        entries[url] = {
+            'file': name,
+            'content_type': content_type,
+            'etag': digest[:32],
+            'size': len(content),
+            'encodings': write_variants(root, name, content),
+            'tags': versions,
+        }
+    return entries
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def export_site(root, workers=1, chunk_size=50):
+    """Export into ``root`` and return the manifest. ``workers > 1`` uses a process pool."""
+    if not root:
+        # Path('') is the working directory, which prune would then clear
+        raise ValueError('No export directory given')
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = read_entries(root / MANIFEST_NAME)
+    targets = export_targets()
+    chunks = [targets[i:i + chunk_size] for i in range(0, len(targets), chunk_size)]
+    entries = {}
+    if workers > 1 and len(chunks) > 1:
+        # Children must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for result in pool.map(export_chunk, [root] * len(chunks), chunks):
+                entries.update(result)
+    else:
+        for chunk in chunks:
+            entries.update(export_chunk(root, chunk))
+
+    manifest = {'generated_at': int(time.time()), 'entries': entries}
+    temporary = root / f'{MANIFEST_NAME}.tmp'
+    temporary.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding='utf-8')
+    os.replace(temporary, root / MANIFEST_NAME)
+    prune(root, previous, entries)
+    return manifest
+
+
+def read_entries(path):
+    """Entries of the manifest at ``path``; empty when there is none."""
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)['entries']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def exported_files(entries):
+    """Relative names of the files (and compressed variants) behind manifest entries."""
+    files = set()
+    for entry in entries.values():
+        files.add(entry['file'])
+        files.update(f"{entry['file']}.{suffix}" for suffix in ('gz', 'br'))
+    return files
+
+
+def prune(root, previous, entries):
+    """
+    Delete the files of the previous export that the new one no longer
+    references. Only names recorded in the previous manifest are touched,
+    anything else in ``root`` is left alone.
+    """
+    root = Path(root).resolve()
+    for name in exported_files(previous) - exported_files(entries):
+        path = (root / name).resolve()
+        if path.is_relative_to(root) and path.is_file():
+            path.unlink()
+
+
+@functools.lru_cache(maxsize=2)
+def _read_manifest(path, mtime):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)['entries']
+
+
+def load_manifest():
+    """Entries of the current export, or None when there is none (re-read on change)."""
+    if not settings.SITE_EXPORT_DIR:
+        return None
+    path = os.path.join(settings.SITE_EXPORT_DIR, MANIFEST_NAME)
+    try:
+        return _read_manifest(path, os.stat(path).st_mtime_ns)
+    except (OSError, ValueError):
+        return None
+
+
+def site_origin():
+    """``scheme://host`` of SITE_URL, the origin every export is rendered for."""
+    site = urlsplit(settings.SITE_URL)
+    return f'{site.scheme}://{site.netloc}'
+
+
+def export_key(request):
+    """Manifest key of a request, or None when its query string is not exported."""
+    params = request.GET
+    if not params:
+        return request.path
+    if list(params) == ['lang'] and params['lang'] in LANGUAGES:
+        return f'{request.path}?{urlencode({"lang": params["lang"]})}'
+    return None
+
+
+class ExportMiddleware:
+    """Serve GET requests from the static export while its entries are current."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.serve(request) or self.get_response(request)
+
+    def serve(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if request_origin(request) != site_origin():
+            return None  # absolute URLs in the export point at SITE_URL
+        entries = load_manifest()
+        key = export_key(request) if entries else None
+        entry = entries.get(key) if key else None
+        if entry is None:
+            return None
+        if entry['content_type'] != 'text/html' and 'text/html' in request.headers.get('Accept', ''):
+            return None  # browsable API
+        if entry['tags'] and tag_versions(list(entry['tags'])) != list(entry['tags'].values()):
+            return None  # edited since the export
+
+        etag = f'"{entry["etag"]}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, entry)
+            if response is None:
+                return None
+        response['ETag'] = etag
+        response['X-Export'] = 'HIT'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
+
+    def file_response(self, request, entry):
+        accepted = request.headers.get('Accept-Encoding', '')
+        path = Path(settings.SITE_EXPORT_DIR) / entry['file']
+        for encoding, suffix in (('br', 'br'), ('gzip', 'gz')):
+            if encoding in entry['encodings'] and encoding in accepted:
+                path, content_encoding = path.with_name(f'{path.name}.{suffix}'), encoding
+                break
+        else:
+            content_encoding = None
+        try:
+            response = FileResponse(open(path, 'rb'), content_type=entry['content_type'])
+        except FileNotFoundError:
+            return None  # pruned by a newer export
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        del response['Content-Disposition']
+        return response
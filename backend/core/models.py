@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class ThrottleBucket(models.Model):
+    """Token bucket of one client and throttle scope (see core.throttling)"""
+    key = models.CharField(max_length=255, unique=True)
+    tokens = models.FloatField()
+    # Unix time of the last refill, kept as a float so SQL can do the refill arithmetic
+    updated_at = models.FloatField()
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,263 @@
+"""
+Response projection for the read API: single-language output
+(``?lang=uk|en``) and sparse fieldsets (``?fields=`` / ``?expand=``).
+
+Models list their bilingual columns in ``TRANSLATED_FIELDS`` (base names,
+e.g. ``'title'`` for ``title_uk``/``title_en``). With ``?lang=en`` the
+serializers emit only ``title_en`` and the queryset never loads
+``title_uk``. When fallback is on (``API_LANGUAGE_FALLBACK``, overridable
+with ``?fallback=0|1``) an empty translation is replaced by the other
+language inside SQL, so only one value per column crosses the wire.
+Fields listed in ``NO_FALLBACK_FIELDS`` are projected but never filled in:
+an empty value there means "use the client's default", not "untranslated".
+
+``?fields=slug,title_en,sections.title_en`` limits the keys emitted at each
+level (dotted paths address nested serializers) and ``?expand=sections``
+limits which nested relations are embedded at all; without ``expand`` every
+relation is embedded as before. Querysets are narrowed to match with
+``only()`` and by skipping the prefetches of collapsed relations.
+"""
+from django.conf import settings
+from django.db.models import F, TextField, Value
+from django.db.models.functions import Coalesce, NullIf
+from rest_framework import serializers
+
+LANGUAGES = ('uk', 'en')
+
+
+def other_language(lang):
+    return 'en' if lang == 'uk' else 'uk'
+
+
+def translated_fields(model):
+    return getattr(model, 'TRANSLATED_FIELDS', ())
+
+
+def falls_back(model, base):
+    """Whether an empty ``base`` translation is replaced by the other language."""
+    return base not in getattr(model, 'NO_FALLBACK_FIELDS', ())
+
+
+def resolved_name(base):
+    """Annotation holding the already-resolved value of a translated field."""
+    return f'resolved_{base}'
+
+
+def language_options(request):
+    """``{'lang': ..., 'fallback': ...}`` for a request; lang is None when not projecting."""
+    params = getattr(request, 'query_params', {}) if request is not None else {}
+    lang = params.get('lang')
+    if lang not in LANGUAGES:
+        lang = None
+    fallback = params.get('fallback')
+    if fallback is None:
+        fallback = settings.API_LANGUAGE_FALLBACK
+    else:
+        fallback = fallback not in ('0', 'false', 'False')
+    return {'lang': lang, 'fallback': fallback}
+
+
+def project_language(queryset, lang=None, fallback=True, spec=None):
+    """
+    Restrict ``queryset`` to the columns of one language (and, with a
+    FieldSpec, to the translated fields that level actually emits).
+    """
+    fields = translated_fields(queryset.model)
+    if spec is not None:
+        fields = [base for base in fields if spec.includes(f'{base}_{lang}')]
+    if not lang or not fields:
+        return queryset
+    other = other_language(lang)
+    own_only = [base for base in fields if not fallback or not falls_back(queryset.model, base)]
+    if own_only:
+        queryset = queryset.defer(*(f'{base}_{other}' for base in own_only))
+    fields = [base for base in fields if base not in own_only]
+    if not fields:
+        return queryset
+    annotations = {
+        # NULLIF turns an empty translation into NULL so COALESCE picks the other one
+        resolved_name(base): Coalesce(
+            NullIf(F(f'{base}_{lang}'), Value(''), output_field=TextField()),
+            F(f'{base}_{other}'),
+            output_field=TextField(),
+        )
+        for base in fields
+    }
+    deferred = [f'{base}_{code}' for base in fields for code in LANGUAGES]
+    return queryset.annotate(**annotations).defer(*deferred)
+
+
+class TranslatedField(serializers.Field):
+    """Value of ``<base>_<lang>``, using the SQL-resolved annotation when present."""
+
+    def __init__(self, base, lang, fallback, **kwargs):
+        self.base, self.lang, self.fallback = base, lang, fallback
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        resolved = resolved_name(self.base)
+        if hasattr(instance, resolved):
+            return getattr(instance, resolved)
+        value = getattr(instance, f'{self.base}_{self.lang}')
+        if not value and self.fallback:
+            value = getattr(instance, f'{self.base}_{other_language(self.lang)}')
+        return value
+
+
+class FieldSpec:
+    """
+    Requested shape of one serializer level.
+    ``only``: keys to emit (None = all); ``expanded``: nested relations to
+    embed (None = all); ``children``: specs of nested levels.
+    """
+
+    def __init__(self, restrict_expansion=False):
+        self.only = None
+        self.expanded = set() if restrict_expansion else None
+        self.children = {}
+        self._restrict_expansion = restrict_expansion
+
+    def child(self, name):
+        if name not in self.children:
+            self.children[name] = FieldSpec(self._restrict_expansion)
+        return self.children[name]
+
+    def resolve(self, path):
+        node = self
+        for name in path:
+            node = node.child(name)
+        return node
+
+    def select(self, name):
+        if self.only is None:
+            self.only = set()
+        self.only.add(name)
+
+    def expand(self, name):
+        if self.expanded is not None:
+            self.expanded.add(name)
+
+    def includes(self, name):
+        return self.only is None or name in self.only
+
+    def expands(self, name):
+        return self.expanded is None or name in self.expanded
+
+    def key(self):
+        """Hashable form of the tree, e.g. for caching what was built from it."""
+        return (
+            None if self.only is None else frozenset(self.only),
+            None if self.expanded is None else frozenset(self.expanded),
+            tuple(sorted((name, child.key()) for name, child in self.children.items())),
+        )
+
+    @property
+    def is_default(self):
+        return self.only is None and self.expanded is None and all(
+            child.is_default for child in self.children.values()
+        )
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def parse_field_spec(fields=None, expand=None):
+    """Build the FieldSpec tree from the ``fields`` and ``expand`` query values."""
+    root = FieldSpec(restrict_expansion=expand is not None)
+    for path in _split(expand or ''):
+        node = root
+        for name in path.split('.'):
+            node.expand(name)
+            node = node.child(name)
+    for path in _split(fields or ''):
+        node = root
+        *parents, leaf = path.split('.')
+        for name in parents:
+            # Asking for a nested key implies embedding its relation
+            node.select(name)
+            node.expand(name)
+            node = node.child(name)
+        node.select(leaf)
+    return root
+
+
+def field_spec(request):
+    params = getattr(request, 'query_params', {}) if request is not None else {}
+    return parse_field_spec(params.get('fields'), params.get('expand'))
+
+
+def load_only(queryset, spec, serializer_class, required=()):
+    """
+    Narrow ``queryset`` to the columns behind the keys ``spec`` asks for.
+    Serializers map computed keys to their columns in ``Meta.column_sources``
+    (e.g. ``'image_url': 'image'``); ``required`` holds columns needed for
+    joins, such as the parent foreign key of a prefetched level.
+    """
+    if spec is None or spec.only is None:
+        return queryset
+    model = queryset.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    sources = getattr(serializer_class.Meta, 'column_sources', {})
+    columns = {model._meta.pk.name, *required}
+    for name in spec.only:
+        source = sources.get(name, name)
+        if source in concrete:
+            columns.add(source)
+    return queryset.only(*columns)
+
+
+class ProjectionMixin:
+    """
+    Serializer mixin applying the request's projection: with ``lang`` in
+    the context the other language's fields are dropped (so deferred
+    columns are never touched); with a ``field_spec`` only the requested
+    keys and expanded relations are kept.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        lang = self.context.get('lang')
+        if lang:
+            fallback = self.context.get('fallback', True)
+            for base in translated_fields(self.Meta.model):
+                fields.pop(f'{base}_{other_language(lang)}', None)
+                name = f'{base}_{lang}'
+                if name in fields:
+                    fields[name] = TranslatedField(base, lang, fallback and falls_back(self.Meta.model, base))
+
+        spec = self.context.get('field_spec')
+        if spec is not None:
+            node = spec.resolve(self._projection_path())
+            for name, field in list(fields.items()):
+                is_relation = isinstance(field, serializers.BaseSerializer)
+                if not node.includes(name) or (is_relation and not node.expands(name)):
+                    del fields[name]
+        return fields
+
+    def _projection_path(self):
+        path, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return list(reversed(path))
+
+
+class ProjectionViewMixin:
+    """View mixin passing ``lang``/``fallback`` and the field spec to serializers."""
+
+    def get_language_options(self):
+        return language_options(self.request)
+
+    def get_field_spec(self):
+        if not hasattr(self, '_field_spec'):
+            self._field_spec = field_spec(self.request)
+        return self._field_spec
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(self.get_language_options())
+        context['field_spec'] = self.get_field_spec()
+        return context
@@ -0,0 +1,46 @@
+"""
+JSON rendering for the API.
+
+FastJSONRenderer writes what DRF's JSONRenderer writes (compact UTF-8,
+U+2028/U+2029 escaped, dates and decimals through DRF's encoder) using
+orjson when it is installed and the stdlib encoder otherwise. Only the
+spelling of floats in exponent notation may differ (``1e20`` instead of
+``1e+20``). Pretty-printed output (``; indent=`` in the Accept header, the
+browsable API) and non-default UNICODE_JSON/COMPACT_JSON settings always use
+the stdlib path.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_stdlib = JSONRenderer()
+_encoder = encoders.JSONEncoder()
+
+
+def dumps(data):
+    """``data`` as compact JSON bytes, exactly like the API renders it."""
+    if orjson is None:
+        return _stdlib.render(data)
+    try:
+        # Datetimes go through DRF's encoder, which formats them differently
+        content = orjson.dumps(
+            data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits
+        return _stdlib.render(data)
+    return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
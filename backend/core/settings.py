@@ -26,18 +26,22 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'core',
     'django_ckeditor_5',
     'cloudinary_storage',
     'cloudinary',
     'adminsortable2',  # Drag-and-drop ordering
     'content',
     "catalog",
+    "uploads",
+    "search",
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files on Render
+    'core.export.ExportMiddleware',  # Serves manage.py export_site output when present
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +67,12 @@ TEMPLATES = [
     },
 ]
 
+# React shell served for every SPA route (see core.shell)
+SPA_INDEX_HTML = PROJECT_ROOT / 'build' / 'index.html'
+
+# Output of manage.py export_site, served by core.export.ExportMiddleware
+SITE_EXPORT_DIR = config('SITE_EXPORT_DIR', default=str(PROJECT_ROOT / 'export'))
+
 WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
@@ -84,6 +94,29 @@ else:
         }
     }
 
+# Caches
+# "default" stays per-process; "api" holds rendered API responses and has to
+# be shared by all gunicorn workers: database-backed unless REDIS_URL is set.
+REDIS_URL = config('REDIS_URL', default=None)
+if REDIS_URL:
+    _api_cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    _api_cache = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'api': _api_cache,
+}
+API_CACHE_ALIAS = 'api'
+API_CACHE_TIMEOUT = config('API_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)  # 0 disables
+API_CACHE_STATS_FLUSH_INTERVAL = 30  # seconds
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -107,7 +140,6 @@ STATICFILES_DIRS = [
 _react_static_dir = PROJECT_ROOT / 'build/static'
 if _react_static_dir.exists():
     STATICFILES_DIRS.append(_react_static_dir)
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files - Cloudinary for production
 if config('CLOUDINARY_CLOUD_NAME', default=None):
@@ -128,13 +160,43 @@ if config('CLOUDINARY_CLOUD_NAME', default=None):
         secure=True
     )
     
-    DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+    MEDIA_STORAGE_BACKEND = 'cloudinary_storage.storage.MediaCloudinaryStorage'
     MEDIA_URL = '/media/'  # Cloudinary handles the actual URLs
 else:
     # Development: Local storage
+    MEDIA_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads with identical content share one stored file (see uploads.storage)
+STORAGES = {
+    'default': {
+        'BACKEND': 'uploads.storage.DedupStorage',
+        'OPTIONS': {'backend': MEDIA_STORAGE_BACKEND},
+    },
+    'staticfiles': {
+        # Plain storage: the whitenoise manifest storage was only ever named in
+        # STATICFILES_STORAGE, which Django ignores since 5.1
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Local media is served by uploads.views.MediaView (streamed, with byte ranges)
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365  # content-hashed derivatives, cached as immutable
+MEDIA_ORIGINAL_MAX_AGE = 60 * 60  # originals, whose names can be reused once deleted
+
+# Responsive image derivatives (see uploads.derivatives)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+MEDIA_WORKERS = config('MEDIA_WORKERS', default=2, cast=int)  # background threads; 0 = inline
+MEDIA_URL_CACHE_SIZE = 10000  # memoized storage URLs per process (see uploads.media)
+
+# First-page previews of uploaded PDFs (see uploads.previews)
+PDF_PREVIEW_WIDTHS = (320, 640)
+PDF_PREVIEW_TIMEOUT = 30  # seconds per poppler call
+
+# Poster frames of uploaded videos, via ffprobe/ffmpeg when installed (see uploads.posters)
+VIDEO_POSTER_TIMEOUT = 60  # seconds per ffprobe/ffmpeg call
+
 # CORS settings
 if DEBUG:
     CORS_ALLOWED_ORIGINS = [
@@ -149,16 +211,52 @@ if not DEBUG:
     CSRF_TRUSTED_ORIGINS = [f"https://{host}" for host in ALLOWED_HOSTS if host != 'localhost']
 
 # REST Framework
+# Public read views skip authentication altogether (authentication_classes = []);
+# the others cache validated tokens in-process (see core.authentication)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'core.authentication.CachedJWTAuthentication',
+    ),
+    # orjson-backed, same bytes as DRF's JSONRenderer (see core.renderers)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Client address for throttling: the entry Render's load balancer appends
+    # to X-Forwarded-For, not whatever the client sent in front of it
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
 }
+JWT_USER_CACHE_TTL = 60  # seconds, never beyond the token's expiry
+
+# List endpoints (keyset pagination, see core.pagination)
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)
+API_MAX_PAGE_SIZE = 200
+API_BATCH_MAX_SLUGS = 50  # per kind on /api/batch/
+API_STREAM_CHUNK_SIZE = 500  # rows per fetch for ?stream=1 lists (see core.streaming)
+
+# Read endpoints render from .values() rows through compiled serializer plans (see core.compiled)
+API_COMPILED_SERIALIZERS = True
+
+# /api/search/ (see search.backends)
+API_SEARCH_LIMIT = 20  # results per query by default
+API_SEARCH_MAX_LIMIT = 50
+API_SEARCH_MAX_TERMS = 8  # words of a query beyond this are ignored
+
+# ?lang=uk|en responses fill empty translations from the other language
+API_LANGUAGE_FALLBACK = config('API_LANGUAGE_FALLBACK', default=True, cast=bool)
 
 # Site and contact settings
 SITE_URL = config('SITE_URL', default='http://localhost:8000')
 CONTACT_RECIPIENTS = [r.strip() for r in config('CONTACT_RECIPIENTS', default='').split(',') if r.strip()]
 
+# Contact messages go through an outbox (see content.outbox):
+# "thread" delivers in-process, "command" leaves it to manage.py deliver_contact_messages
+CONTACT_DELIVERY = config('CONTACT_DELIVERY', default='thread')
+CONTACT_OUTBOX_BATCH_SIZE = 50  # messages per SMTP connection
+CONTACT_OUTBOX_MAX_ATTEMPTS = 8
+CONTACT_OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+CONTACT_OUTBOX_MAX_DELAY = 60 * 60
+
 # Development defaults: when DEBUG=True provide a safe email backend and a
 # recipient so the contact endpoint can be tested locally without extra env vars.
 if DEBUG:
@@ -170,15 +268,24 @@ if DEBUG:
 else:
     EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 
-# Throttling for public endpoints (e.g., contact form)
+# Throttling for anonymous clients: token buckets shared by all workers (see core.throttling)
 REST_FRAMEWORK.update({
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
+        'core.throttling.TokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/min',
+        'read': '100/min',
+        'write': '30/min',
+        'contact': '5/min',
     }
 })
+if REDIS_URL:
+    API_THROTTLE_STORE = 'core.throttling.RedisBucketStore'
+    API_THROTTLE_SCOPE_STORES = {}
+else:
+    API_THROTTLE_STORE = 'core.throttling.DatabaseBucketStore'
+    # Public reads stay per process: no write transaction per cached GET
+    API_THROTTLE_SCOPE_STORES = {'read': 'core.throttling.LocalBucketStore'}
 
 # CKEditor 5 Configuration (django-ckeditor-5)
 CKEDITOR_5_CONFIGS = {
@@ -0,0 +1,98 @@
+"""
+The React shell (build/index.html) with the first screen's data inlined.
+
+Without it the browser loads the shell, boots the bundle and only then asks
+/api/pages/<slug>/ for content. The shell view resolves the URL to the page
+or catalog item the SPA is going to render and embeds its JSON payload,
+plus the menu tree, in a ``<script type="application/json">`` element that
+the frontend reads instead of fetching.
+
+The shell file is read and split once per process (and again only when the
+build replaces it); payloads come from the page snapshots and the API cache.
+"""
+import functools
+import os
+import re
+
+from django.conf import settings
+
+from catalog.models import CatalogItem
+from catalog.serializers import CatalogItemDetailSerializer
+from content.navigation import build_navigation
+from content.snapshots import get_page_snapshot
+from .cache import cached_payload
+from .renderers import FastJSONRenderer
+
+BOOTSTRAP_ELEMENT_ID = 'bootstrap-data'
+
+# Fixed SPA routes that render a dynamic page
+PAGE_ROUTES = {'/': 'home', '/summary': 'about-summary'}
+
+ROUTES = [
+    (re.compile(r'^/pages/(?P<slug>[-\w]+)/?$'), 'page'),
+    (re.compile(r'^/catalog/(?P<slug>[-\w]+)/?$'), 'catalogItem'),
+]
+
+# Same escapes as django.utils.html.json_script; they are valid inside JSON
+# strings and keep "</script>" in content from closing the element.
+_SCRIPT_ESCAPES = {ord('<'): '\\u003C', ord('>'): '\\u003E', ord('&'): '\\u0026'}
+
+
+@functools.lru_cache(maxsize=4)
+def _split_shell(path, mtime):
+    with open(path, encoding='utf-8') as fh:
+        html = fh.read()
+    head, marker, tail = html.partition('</head>')
+    if not marker:
+        return html, ''
+    return head, marker + tail
+
+
+def load_shell():
+    """``(before, after)`` halves of index.html around the injection point."""
+    path = os.fspath(settings.SPA_INDEX_HTML)
+    return _split_shell(path, os.stat(path).st_mtime_ns)
+
+
+def resolve_route(path):
+    """``(kind, slug)`` of the object rendered at ``path``, or None."""
+    slug = PAGE_ROUTES.get(path.rstrip('/') or '/')
+    if slug:
+        return 'page', slug
+    for pattern, kind in ROUTES:
+        match = pattern.match(path)
+        if match:
+            return kind, match.group('slug')
+    return None
+
+
+def catalog_item_payload(slug):
+    def build():
+        item = CatalogItem.objects.filter(is_active=True, slug=slug).prefetch_related('gallery').first()
+        return FastJSONRenderer().render(CatalogItemDetailSerializer(item).data) if item else b'null'
+    return cached_payload(f'catalog-item:{slug}', (f'catalog:{slug}',), build)
+
+
+def navigation_payload():
+    return cached_payload('navigation', ('navigation',), lambda: FastJSONRenderer().render(build_navigation()))
+
+
+def bootstrap_json(path):
+    """The inlined document: ``{"path", "navigation", "page", "catalogItem"}``."""
+    entries = {'page': b'null', 'catalogItem': b'null'}
+    route = resolve_route(path)
+    if route is not None:
+        kind, slug = route
+        payload = get_page_snapshot(slug) if kind == 'page' else catalog_item_payload(slug)
+        if payload and payload != b'null':
+            entries[kind] = b'{"slug":%s,"data":%s}' % (FastJSONRenderer().render(slug), payload)
+    parts = [b'"path":' + FastJSONRenderer().render(path), b'"navigation":' + navigation_payload()]
+    parts += [FastJSONRenderer().render(key) + b':' + value for key, value in entries.items()]
+    return (b'{' + b','.join(parts) + b'}').decode('utf-8')
+
+
+def render_shell(path):
+    before, after = load_shell()
+    data = bootstrap_json(path).translate(_SCRIPT_ESCAPES)
+    script = f'<script id="{BOOTSTRAP_ELEMENT_ID}" type="application/json">{data}</script>'
+    return before + script + after
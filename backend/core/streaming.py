@@ -0,0 +1,64 @@
+"""
+Streamed list responses.
+
+With ``?stream=1`` a list view returns every row in one response shaped
+like its last page (``{"next": null, "results": [...]}``). Rows are read
+from a server-side cursor (``QuerySet.iterator``, a named cursor on
+PostgreSQL) in chunks of API_STREAM_CHUNK_SIZE, serialized chunk by chunk
+(through the compiled plan when the view has one, see core.compiled) and
+sent as they are ready, so worker memory stays flat however many rows there
+are. Streamed responses bypass the response cache.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .renderers import dumps
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def stream_results(pages):
+    """JSON bytes of ``{"next": null, "results": [...]}`` from lists of representations."""
+    yield b'{"next":null,"results":['
+    separator = b''
+    for page in pages:
+        if page:
+            # Each page is rendered as an array; only its items are sent
+            yield separator + dumps(page)[1:-1]
+            separator = b','
+    yield b']}'
+
+
+class StreamingListMixin:
+    """List view mixin answering ``?stream=1`` with a streamed, unpaginated response."""
+    stream_query_param = 'stream'
+
+    def wants_stream(self, request):
+        return (
+            request.query_params.get(self.stream_query_param) in ('1', 'true')
+            and request.accepted_renderer.format == 'json'
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.keyset_ordering)
+        size = settings.API_STREAM_CHUNK_SIZE
+
+        # Everything that can fail runs before the status line is sent
+        plan = self.get_compiled_plan() if hasattr(self, 'get_compiled_plan') else None
+        rows = plan.values(queryset) if plan else None
+        if rows is not None:
+            pages = (plan.render(chunk, queryset, request) for chunk in chunked(rows.iterator(chunk_size=size), size))
+        else:
+            pages = (
+                self.get_serializer(chunk, many=True).data
+                for chunk in chunked(queryset.iterator(chunk_size=size), size)
+            )
+        return StreamingHttpResponse(stream_results(pages), content_type='application/json')
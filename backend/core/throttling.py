@@ -0,0 +1,167 @@
+"""
+Token-bucket throttling shared by all workers.
+
+DRF's rate throttles keep a list of request timestamps per client in the
+"default" cache, which is per-process: with N gunicorn workers the real
+limit is N times the configured one, and a restart forgets it. Here each
+client/scope pair has one bucket in a shared store holding ``capacity``
+tokens (the number of a DRF-style rate such as ``100/min``) that refill
+continuously at ``capacity / period``; every request takes one token with a
+single atomic operation.
+
+Views pick a rate from DEFAULT_THROTTLE_RATES with ``throttle_scope``
+(default: ``read`` for safe methods, ``write`` otherwise). The store is
+API_THROTTLE_STORE: DatabaseBucketStore (one conditional UPDATE per
+request) or RedisBucketStore (one Lua script call) when REDIS_URL is set;
+LocalBucketStore keeps per-process buckets for development and tests.
+API_THROTTLE_SCOPE_STORES overrides the store of single scopes. Without
+Redis the ``read`` scope uses LocalBucketStore: a write transaction per
+public GET would cost more than the cached response it guards, and on
+SQLite it locks the whole database.
+"""
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models import ThrottleBucket
+
+# Buckets idle for this long are full again, i.e. the same as no bucket
+BUCKET_TTL = 60 * 60 * 24
+PRUNE_PROBABILITY = 0.01
+
+
+class DatabaseBucketStore:
+    """Buckets in the ThrottleBucket table of the default database."""
+
+    def consume(self, key, capacity, rate, now):
+        """Take one token; returns the tokens left, or a negative number of tokens missing."""
+        refilled = Least(Value(float(capacity)), F('tokens') + (Value(now) - F('updated_at')) * Value(rate))
+        taken = ThrottleBucket.objects.filter(GreaterThanOrEqual(refilled, 1), key=key).update(
+            tokens=refilled - 1, updated_at=now,
+        )
+        if taken:
+            return 0.0
+        bucket = ThrottleBucket.objects.filter(key=key).values_list('tokens', 'updated_at').first()
+        if bucket is not None:
+            tokens, updated_at = bucket
+            return min(capacity, tokens + (now - updated_at) * rate) - 1
+        try:
+            with transaction.atomic():
+                ThrottleBucket.objects.create(key=key, tokens=capacity - 1, updated_at=now)
+        except IntegrityError:
+            # Created concurrently by another worker: take from that one
+            return self.consume(key, capacity, rate, now)
+        if random.random() < PRUNE_PROBABILITY:
+            ThrottleBucket.objects.filter(updated_at__lt=now - BUCKET_TTL).delete()
+        return capacity - 1.0
+
+
+class LocalBucketStore:
+    """Buckets in process memory: not shared between workers, no database queries."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        with self.lock:
+            tokens, updated_at = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated_at) * rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+            return tokens - 1
+
+
+# KEYS[1]: bucket; ARGV: capacity, refill rate per second, now
+REDIS_CONSUME = """
+local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+if tokens >= 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+end
+return tostring(tokens - 1)
+"""
+
+
+class RedisBucketStore:
+    """Buckets as Redis hashes updated by a Lua script (atomic on the server)."""
+
+    def __init__(self):
+        import redis
+
+        self.script = redis.Redis.from_url(settings.REDIS_URL).register_script(REDIS_CONSUME)
+
+    def consume(self, key, capacity, rate, now):
+        return float(self.script(keys=[f'throttle:{key}'], args=[capacity, rate, now]))
+
+
+_stores = {}
+
+
+def get_store(scope=None):
+    """Bucket store of ``scope`` (API_THROTTLE_SCOPE_STORES, else API_THROTTLE_STORE)."""
+    path = settings.API_THROTTLE_SCOPE_STORES.get(scope, settings.API_THROTTLE_STORE)
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = import_string(path)()
+    return store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    if setting in ('API_THROTTLE_STORE', 'API_THROTTLE_SCOPE_STORES', 'REDIS_URL'):
+        _stores.clear()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Per-client token bucket for anonymous requests (authenticated staff
+    are not throttled, as with AnonRateThrottle).
+    """
+    scope = None
+
+    def __init__(self):
+        # The rate depends on the view, see allow_request
+        pass
+
+    def allow_request(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return True
+        default = 'read' if request.method in ('GET', 'HEAD', 'OPTIONS') else 'write'
+        self.scope = getattr(view, 'throttle_scope', default)
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.refill = self.num_requests / self.duration
+        self.remaining = get_store(self.scope).consume(self.bucket_key(request), self.num_requests, self.refill, time.time())
+        return self.remaining >= 0
+
+    def bucket_key(self, request):
+        # The ident can be a client-supplied X-Forwarded-For value of any
+        # length: hashing keeps keys short and fixed-size
+        ident = hashlib.sha256(self.get_ident(request).encode('utf-8')).hexdigest()
+        return f'{self.scope}:{ident}'
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def wait(self):
+        # Time until the missing token has been refilled
+        return -self.remaining / self.refill
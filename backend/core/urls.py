@@ -1,16 +1,19 @@
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 
 from django.urls import path, include, re_path
-from django.views.generic import TemplateView
 from django.views.static import serve
 
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from content.views import PageContentView, PageContentListView, PageListView, PageDetailView, ContactAPIView
+from content.views import PageContentView, PageContentListView, PageListView, PageDetailView, BatchView, NavigationView, ContactAPIView
+from core.views import CacheStatsView, SpaShellView
+from search.views import SearchView
+from uploads.views import MediaView
 
 # Update site_url for production
 if settings.DEBUG:
@@ -34,10 +37,18 @@ urlpatterns = [
     # New Dynamic Pages API
     path('api/pages/', PageListView.as_view(), name='page_list'),
     path('api/pages/<slug:slug>/', PageDetailView.as_view(), name='page_detail'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('api/navigation/', NavigationView.as_view(), name='navigation'),
     path('api/contact/', ContactAPIView.as_view(), name='contact'),
 
     # Catalog API
     path('api/catalog/', include('catalog.urls')),
+
+    # Full-text search
+    path('api/search/', SearchView.as_view(), name='search'),
+
+    # Monitoring
+    path('api/cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
     
     # Serve React static assets from build root
     re_path(r'^(?P<path>manifest\.json)$', serve, {'document_root': settings.BASE_DIR.parent / 'build'}),
@@ -49,12 +60,14 @@ urlpatterns = [
     
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media from local storage (Cloudinary deployments serve their own URLs)
+if settings.MEDIA_ROOT:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), MediaView.as_view(), name='media'),
+    ]
 
 urlpatterns += [
     # Serve React frontend for all other routes (catch-all for SPA)
     # Exclude admin, api, static, locales, and media to allow Django to handle/redirect them correctly
-    re_path(r'^(?!admin|api|static|locales|media).*$', TemplateView.as_view(template_name='index.html')),
+    re_path(r'^(?!admin|api|static|locales|media).*$', SpaShellView.as_view()),
 ]
@@ -0,0 +1,27 @@
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import cache_stats
+from .shell import render_shell
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the API response cache (staff only)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats())
+
+
+class SpaShellView(View):
+    """index.html of the React build with the route's data inlined (see core.shell)."""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            html = render_shell(request.path)
+        except FileNotFoundError:
+            raise Http404('Frontend build not found')
+        return HttpResponse(html)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Serving processes send what earlier ones left in the contact outbox
+from content.outbox import start_drain  # noqa: E402
+
+start_drain()
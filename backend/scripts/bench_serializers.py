@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Compare DRF serializers with the compiled plans of core.compiled.
+
+Builds a synthetic page tree and catalog inside a transaction that is rolled
+back, renders both through each path (checking the JSON is byte-identical)
+and prints the best time of several runs.
+
+Usage: bench_serializers.py [sections] [items per section] [images per item] [catalog items]
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from catalog.models import CatalogItem
+from catalog.serializers import CatalogItemListSerializer
+from content.models import Page, PageSection, PageSectionItem, PageSectionItemImage
+from content.queries import with_page_tree
+from content.serializers import PageSerializer
+from core.compiled import compile_serializer
+
+REPEAT = 5
+
+VARIANTS = [
+    {'name': f'derived/bench/{width}.{fmt}', 'format': fmt, 'width': width, 'height': width * 2 // 3}
+    for fmt in ('webp', 'jpeg') for width in (320, 640, 1280)
+]
+META = {'version': 2, 'width': 1920, 'height': 1280, 'bytes': 123456, 'color': '#446688', 'variants': VARIANTS}
+
+
+def build(sections, items, images, catalog):
+    page = Page.objects.create(slug='bench', title_uk='Тест', title_en='Bench')
+    PageSection.objects.bulk_create(
+        PageSection(page=page, title_uk=f'Секція {s}', order=s, image=f'bench/{s}.jpg', image_meta=META)
+        for s in range(sections)
+    )
+    PageSectionItem.objects.bulk_create(
+        PageSectionItem(section=section, title_uk=f'Картка {i}', order=i, image=f'bench/{section.pk}-{i}.jpg', image_meta=META)
+        for section in page.sections.all() for i in range(items)
+    )
+    PageSectionItemImage.objects.bulk_create(
+        PageSectionItemImage(item=item, image=f'bench/{item.pk}-{g}.jpg', image_meta=META, order=g)
+        for item in PageSectionItem.objects.filter(section__page=page) for g in range(images)
+    )
+    CatalogItem.objects.bulk_create(
+        CatalogItem(slug=f'bench-{n}', title_uk=f'Товар {n}', cover_image=f'bench/c{n}.jpg', cover_image_meta=META)
+        for n in range(catalog)
+    )
+
+
+def best(render):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        payload = render()
+        timings.append(time.perf_counter() - started)
+    return min(timings), payload
+
+
+def compare(label, queryset, serializer_class, many):
+    context = {'lang': None, 'fallback': True}
+    renderer = JSONRenderer()
+
+    def drf():
+        return renderer.render(serializer_class(list(queryset.all()) if many else queryset.get(), many=many, context=context).data)
+
+    def compiled():
+        plan = compile_serializer(serializer_class, context)
+        data = plan.render(plan.values(queryset.all()), queryset)
+        return renderer.render(data if many else data[0])
+
+    drf_time, expected = best(drf)
+    compiled_time, payload = best(compiled)
+    status = 'identical' if payload == expected else 'DIFFERENT'
+    print(f'{label}: DRF {drf_time * 1000:.1f} ms, compiled {compiled_time * 1000:.1f} ms '
+          f'({drf_time / compiled_time:.1f}x), {len(payload)} bytes, {status}')
+    return payload == expected
+
+
+if __name__ == '__main__':
+    defaults = [10, 20, 3, 500]
+    sections, items, images, catalog = [int(arg) for arg in sys.argv[1:5]] + defaults[len(sys.argv[1:5]):]
+    ok = True
+    with transaction.atomic():
+        build(sections, items, images, catalog)
+        ok &= compare(f'Page tree ({sections}x{items}x{images})',
+                      with_page_tree(Page.objects.filter(slug='bench')), PageSerializer, many=False)
+        ok &= compare(f'Catalog list ({catalog} items)',
+                      CatalogItem.objects.filter(slug__startswith='bench-').order_by('id'), CatalogItemListSerializer, many=True)
+        transaction.set_rollback(True)
+    sys.exit(0 if ok else 1)
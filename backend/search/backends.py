@@ -0,0 +1,131 @@
+"""
+Full-text queries over SearchDocument, one backend per database vendor.
+
+Both backends take the same parsed query: the words of ``q``, every one of
+which has to match, as a prefix, in the title or body of one language
+(``lang`` picks the language, otherwise either will do). Titles weigh more
+than bodies.
+
+* PostgreSQL: ``vector_uk``/``vector_en`` tsvector columns generated from the
+  document and GIN-indexed; Ukrainian text uses the ``simple`` configuration
+  (PostgreSQL ships no Ukrainian stemmer), English text ``english``. Ranked
+  by ``ts_rank``, snippets from ``ts_headline``.
+* SQLite: the ``search_fts`` FTS5 table, kept in sync by triggers. Ranked by
+  ``bm25``, snippets from ``snippet``.
+
+Snippets are plain text of the body around the matches, HTML-escaped, with
+the matches wrapped in ``<mark>``.
+"""
+import re
+
+from django.conf import settings
+from django.db import NotSupportedError, connection
+from django.utils.html import escape
+
+from core.projection import LANGUAGES
+from .index import MARK_END, MARK_START
+from .models import SearchDocument
+
+_word = re.compile(r'\w+')
+
+
+def parse_query(q):
+    """The (lower-cased, de-duplicated) words of a search query."""
+    terms = dict.fromkeys(word.lower() for word in _word.findall(q))
+    return list(terms)[:settings.API_SEARCH_MAX_TERMS]
+
+
+def highlight(snippet):
+    if not snippet:
+        return ''
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def hit(row, languages):
+    _, kind, slug, rank, *texts = row
+    result = {'kind': kind, 'slug': slug, 'rank': round(rank, 6)}
+    for lang, (title, snippet) in zip(languages, zip(texts[::2], texts[1::2])):
+        result[f'title_{lang}'] = title
+        result[f'snippet_{lang}'] = highlight(snippet)
+    return result
+
+
+class PostgresBackend:
+    CONFIGS = {'uk': 'simple', 'en': 'english'}
+    HEADLINE_OPTIONS = (
+        f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=30, MinWords=10, '
+        f'MaxFragments=2, FragmentDelimiter=" … "'
+    )
+
+    def search(self, terms, languages, kinds, limit):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        queries = ', '.join(f"to_tsquery('{self.CONFIGS[lang]}', %s) AS {lang}" for lang in languages)
+        matches = ' OR '.join(f'd.vector_{lang} @@ q.{lang}' for lang in languages)
+        ranks = ', '.join(f'ts_rank(d.vector_{lang}, q.{lang})' for lang in languages)
+        texts = ', '.join(
+            f"d.title_{lang}, ts_headline('{self.CONFIGS[lang]}', d.body_{lang}, q.{lang}, %s)" for lang in languages
+        )
+        # Headlines are the expensive part: only built for the rows returned
+        sql = f"""
+            WITH q AS (SELECT {queries}),
+            hits AS (
+                SELECT d.id, GREATEST({ranks}) AS rank
+                FROM search_searchdocument d, q
+                WHERE ({matches}) AND d.kind = ANY(%s)
+                ORDER BY rank DESC, d.id
+                LIMIT %s
+            )
+            SELECT d.id, d.kind, d.slug, hits.rank, {texts}
+            FROM hits JOIN search_searchdocument d ON d.id = hits.id, q
+            ORDER BY hits.rank DESC, d.id
+        """
+        params = [query] * len(languages) + [list(kinds), limit] + [self.HEADLINE_OPTIONS] * len(languages)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [hit(row, languages) for row in cursor.fetchall()]
+
+
+class SQLiteBackend:
+    COLUMNS = ('title_uk', 'body_uk', 'title_en', 'body_en')
+    WEIGHTS = (10.0, 1.0, 10.0, 1.0)
+    SNIPPET_TOKENS = 24
+
+    def search(self, terms, languages, kinds, limit):
+        phrase = ' '.join('"%s"*' % term for term in terms)
+        match = ' OR '.join(f'{{title_{lang} body_{lang}}} : ({phrase})' for lang in languages)
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        texts = ', '.join(
+            f"d.title_{lang}, snippet(search_fts, {self.COLUMNS.index(f'body_{lang}')}, %s, %s, '…', "
+            f"{self.SNIPPET_TOKENS})"
+            for lang in languages
+        )
+        sql = f"""
+            SELECT d.id, d.kind, d.slug, -bm25(search_fts, {weights}) AS rank, {texts}
+            FROM search_fts JOIN search_searchdocument d ON d.id = search_fts.rowid
+            WHERE search_fts MATCH %s AND d.kind IN ({', '.join(['%s'] * len(kinds))})
+            ORDER BY rank DESC, d.id
+            LIMIT %s
+        """
+        params = [MARK_START, MARK_END] * len(languages) + [match, *kinds, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [hit(row, languages) for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'postgresql': PostgresBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def search(q, lang=None, kinds=None, limit=None):
+    """Ranked hits for ``q``: dicts of kind, slug, rank and per-language title and snippet."""
+    terms = parse_query(q)
+    if not terms:
+        return []
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None:
+        raise NotSupportedError(f'Full-text search is not available on {connection.vendor}')
+    languages = (lang,) if lang else LANGUAGES
+    kinds = kinds or [kind for kind, _ in SearchDocument.KIND_CHOICES]
+    return backend().search(terms, languages, kinds, limit or settings.API_SEARCH_LIMIT)
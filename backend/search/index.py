@@ -0,0 +1,159 @@
+"""
+Keeping SearchDocument rows in step with the content they describe.
+
+Each kind of searchable object has a builder returning its slug and the
+title/body text of both languages, or None when the object is gone or not
+public (the document is then dropped). Bodies are HTML-stripped: a page
+contributes its description and the titles and text of its sections and
+items, legacy content and catalog items their own text fields.
+search.signals calls ``schedule_reindex`` on every save and delete.
+"""
+import re
+import threading
+from html.parser import HTMLParser
+
+from django.db import transaction
+
+from catalog.models import CatalogItem
+from content.models import Page, PageContent, PageSection, PageSectionItem
+from core.projection import LANGUAGES
+from .models import SearchDocument
+
+# Private-use characters wrapped around matches in snippets (see search.backends)
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+_whitespace = re.compile(r'\s+')
+_pending = threading.local()
+
+
+class TextExtractor(HTMLParser):
+    """Text content of an HTML fragment, with tags turned into word breaks."""
+    SKIPPED = {'script', 'style', 'iframe'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self.skipping += 1
+        self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED and self.skipping:
+            self.skipping -= 1
+        self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def plain_text(*values):
+    """Whitespace-normalized text of ``values`` (HTML or plain), joined by spaces."""
+    extractor = TextExtractor()
+    for value in values:
+        if value:
+            extractor.feed(value)
+            extractor.parts.append(' ')
+    extractor.close()
+    text = ''.join(extractor.parts).replace(MARK_START, '').replace(MARK_END, '')
+    return _whitespace.sub(' ', text).strip()
+
+
+def page_document(pk):
+    page = Page.objects.filter(pk=pk, is_active=True).values('slug', 'title_uk', 'title_en',
+                                                             'description_uk', 'description_en').first()
+    if page is None:
+        return None
+    sections = list(PageSection.objects.filter(page_id=pk).order_by('order', 'pk').values(
+        'title_uk', 'title_en', 'content_uk', 'content_en'))
+    items = list(PageSectionItem.objects.filter(section__page_id=pk).order_by('section__order', 'order', 'pk').values(
+        'title_uk', 'title_en', 'description_uk', 'description_en', 'content_uk', 'content_en'))
+    document = {'slug': page['slug']}
+    for lang in LANGUAGES:
+        document[f'title_{lang}'] = plain_text(page[f'title_{lang}'])
+        document[f'body_{lang}'] = plain_text(
+            page[f'description_{lang}'],
+            *(section[f'{field}_{lang}'] for section in sections for field in ('title', 'content')),
+            *(item[f'{field}_{lang}'] for item in items for field in ('title', 'description', 'content')),
+        )
+    return document
+
+
+def content_document(pk):
+    content = PageContent.objects.filter(pk=pk).values('slug', 'title_uk', 'title_en',
+                                                       'content_uk', 'content_en').first()
+    if content is None:
+        return None
+    document = {'slug': content['slug']}
+    for lang in LANGUAGES:
+        document[f'title_{lang}'] = plain_text(content[f'title_{lang}'])
+        document[f'body_{lang}'] = plain_text(content[f'content_{lang}'])
+    return document
+
+
+def catalog_document(pk):
+    item = CatalogItem.objects.filter(pk=pk, is_active=True).values(
+        'slug', 'title_uk', 'title_en', 'short_description_uk', 'short_description_en',
+        'content_uk', 'content_en').first()
+    if item is None:
+        return None
+    document = {'slug': item['slug']}
+    for lang in LANGUAGES:
+        document[f'title_{lang}'] = plain_text(item[f'title_{lang}'])
+        document[f'body_{lang}'] = plain_text(item[f'short_description_{lang}'], item[f'content_{lang}'])
+    return document
+
+
+# kind -> (queryset of the ids that should be indexed, document builder)
+SOURCES = {
+    'page': (lambda: Page.objects.filter(is_active=True), page_document),
+    'content': (lambda: PageContent.objects.all(), content_document),
+    'catalog': (lambda: CatalogItem.objects.filter(is_active=True), catalog_document),
+}
+
+
+def reindex(kind, pk):
+    """Bring the document of one object up to date; returns it, or None when dropped."""
+    document = SOURCES[kind][1](pk)
+    if document is None:
+        SearchDocument.objects.filter(kind=kind, object_id=pk).delete()
+        return None
+    indexed, _ = SearchDocument.objects.update_or_create(kind=kind, object_id=pk, defaults=document)
+    return indexed
+
+
+def rebuild_index():
+    """Reindex every searchable object and drop documents of anything else."""
+    count = 0
+    for kind, (queryset, _) in SOURCES.items():
+        ids = list(queryset().values_list('pk', flat=True))
+        for pk in ids:
+            reindex(kind, pk)
+        count += len(ids)
+        SearchDocument.objects.filter(kind=kind).exclude(object_id__in=ids).delete()
+    return count
+
+
+def schedule_reindex(kind, pk):
+    """
+    Reindex an object once the current transaction commits. An admin save
+    of a page with inlines touches many rows; pending objects are collected
+    per thread so each document is rebuilt only once.
+    """
+    if pk is None:
+        return
+    pending = getattr(_pending, 'objects', None)
+    if pending is None:
+        pending = _pending.objects = set()
+    pending.add((kind, pk))
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    objects = getattr(_pending, 'objects', None)
+    _pending.objects = None
+    for kind, pk in objects or ():
+        reindex(kind, pk)
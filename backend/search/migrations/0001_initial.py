@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('page', 'Page'), ('content', 'Page content'), ('catalog', 'Catalog item')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('slug', models.SlugField(max_length=255)),
+                ('title_uk', models.TextField(blank=True)),
+                ('title_en', models.TextField(blank=True)),
+                ('body_uk', models.TextField(blank=True)),
+                ('body_en', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Пошуковий документ',
+                'verbose_name_plural': 'Пошукові документи',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_object')],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Full-text index over SearchDocument, in the database's own flavour:
+# generated tsvector columns with GIN indexes on PostgreSQL, an external
+# content FTS5 table kept in sync by triggers on SQLite (see search.backends).
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE search_searchdocument
+        ADD COLUMN vector_uk tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', title_uk), 'A') || setweight(to_tsvector('simple', body_uk), 'B')
+        ) STORED,
+        ADD COLUMN vector_en tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title_en), 'A') || setweight(to_tsvector('english', body_en), 'B')
+        ) STORED
+    """,
+    "CREATE INDEX search_document_vector_uk ON search_searchdocument USING GIN (vector_uk)",
+    "CREATE INDEX search_document_vector_en ON search_searchdocument USING GIN (vector_en)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS search_document_vector_uk",
+    "DROP INDEX IF EXISTS search_document_vector_en",
+    "ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS vector_uk, DROP COLUMN IF EXISTS vector_en",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_fts USING fts5(
+        title_uk, body_uk, title_en, body_en,
+        content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER search_fts_insert AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_fts(rowid, title_uk, body_uk, title_en, body_en)
+        VALUES (new.id, new.title_uk, new.body_uk, new.title_en, new.body_en);
+    END
+    """,
+    """
+    CREATE TRIGGER search_fts_delete AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_fts(search_fts, rowid, title_uk, body_uk, title_en, body_en)
+        VALUES ('delete', old.id, old.title_uk, old.body_uk, old.title_en, old.body_en);
+    END
+    """,
+    """
+    CREATE TRIGGER search_fts_update AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_fts(search_fts, rowid, title_uk, body_uk, title_en, body_en)
+        VALUES ('delete', old.id, old.title_uk, old.body_uk, old.title_en, old.body_en);
+        INSERT INTO search_fts(rowid, title_uk, body_uk, title_en, body_en)
+        VALUES (new.id, new.title_uk, new.body_uk, new.title_en, new.body_en);
+    END
+    """,
+    "INSERT INTO search_fts(search_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS search_fts_insert",
+    "DROP TRIGGER IF EXISTS search_fts_delete",
+    "DROP TRIGGER IF EXISTS search_fts_update",
+    "DROP TABLE IF EXISTS search_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Plain text of one searchable object in both languages (see search.index).
+    The full-text index over these rows is created by the migrations: tsvector
+    columns with GIN indexes on PostgreSQL, an FTS5 table on SQLite.
+    """
+    KIND_CHOICES = [
+        ('page', 'Page'),
+        ('content', 'Page content'),
+        ('catalog', 'Catalog item'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    slug = models.SlugField(max_length=255)
+
+    title_uk = models.TextField(blank=True)
+    title_en = models.TextField(blank=True)
+    body_uk = models.TextField(blank=True)
+    body_en = models.TextField(blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Пошуковий документ"
+        verbose_name_plural = "Пошукові документи"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.slug}"
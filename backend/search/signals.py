@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import CatalogItem
+from content.models import Page, PageSection, PageSectionItem
+from content.signals import PAGE_CONTENT_MODELS, page_id_for
+from .index import schedule_reindex
+
+
+@receiver([post_save, post_delete], sender=Page)
+@receiver([post_save, post_delete], sender=PageSection)
+@receiver([post_save, post_delete], sender=PageSectionItem)
+def page_text_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_reindex('page', page_id_for(instance))
+
+
+def page_content_text_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_reindex('content', instance.pk)
+
+
+for model in PAGE_CONTENT_MODELS:
+    post_save.connect(page_content_text_changed, sender=model)
+    post_delete.connect(page_content_text_changed, sender=model)
+
+
+@receiver([post_save, post_delete], sender=CatalogItem)
+def catalog_text_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_reindex('catalog', instance.pk)
@@ -0,0 +1,130 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog.models import CatalogItem
+from content.models import Page, PageContent, PageSection, PageSectionItem, SummaryPage
+from .index import plain_text
+from .models import SearchDocument
+
+LOCAL_THROTTLE_STORE = 'core.throttling.LocalBucketStore'
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class SearchIndexTest(TestCase):
+    def save(self, create):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create()
+
+    def test_plain_text(self):
+        html = '<p>Виноробство&nbsp;та <strong>туризм</strong></p><p>Ужгород</p><script>alert(1)</script>'
+        self.assertEqual(plain_text(html, '', 'A &amp; B'), 'Виноробство та туризм Ужгород A & B')
+
+    def test_page_tree_is_one_document(self):
+        page = self.save(lambda: Page.objects.create(
+            slug='wine', title_uk='Вино', title_en='Wine', description_uk='<p>Опис</p>'))
+        section = self.save(lambda: PageSection.objects.create(
+            page=page, title_uk='Виноградники', content_uk='<p>Берегове</p>', content_en='<p>Berehove</p>'))
+        self.save(lambda: PageSectionItem.objects.create(section=section, title_en='Tasting', content_en='<b>Cellars</b>'))
+
+        document = SearchDocument.objects.get(kind='page', object_id=page.pk)
+        self.assertEqual(document.slug, 'wine')
+        self.assertEqual(document.title_uk, 'Вино')
+        self.assertEqual(document.body_uk, 'Опис Виноградники Берегове')
+        self.assertEqual(document.body_en, 'Berehove Tasting Cellars')
+
+        self.save(lambda: section.delete())
+        self.assertEqual(SearchDocument.objects.get(kind='page', object_id=page.pk).body_en, '')
+        page.is_active = False
+        self.save(lambda: page.save())
+        self.assertFalse(SearchDocument.objects.filter(kind='page').exists())
+
+    def test_content_and_catalog(self):
+        summary = self.save(lambda: SummaryPage.objects.create(
+            slug='summary', title_uk='Огляд', title_en='Summary', content_en='<p>Overview</p>'))
+        item = self.save(lambda: CatalogItem.objects.create(
+            slug='honey', title_uk='Мед', short_description_en='Mountain honey', content_en='<p>Raw</p>'))
+        self.assertEqual(SearchDocument.objects.get(kind='content', object_id=summary.pk).body_en, 'Overview')
+        self.assertEqual(SearchDocument.objects.get(kind='catalog', object_id=item.pk).body_en, 'Mountain honey Raw')
+
+        self.save(lambda: summary.delete())
+        item.is_active = False
+        self.save(lambda: item.save())
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_rebuild_command(self):
+        page = self.save(lambda: Page.objects.create(slug='wine', title_uk='Вино', title_en='Wine'))
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(kind='catalog', object_id=999, slug='gone')
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(list(SearchDocument.objects.values_list('kind', 'object_id')), [('page', page.pk)])
+
+
+@override_settings(API_CACHE_TIMEOUT=0, API_THROTTLE_STORE=LOCAL_THROTTLE_STORE)
+class SearchViewTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            page = Page.objects.create(slug='wine-tourism', title_uk='Винний туризм', title_en='Wine tourism',
+                                       description_en='Routes through the vineyards')
+            PageSection.objects.create(page=page, content_uk='<p>Дегустації в <strong>Берегові</strong></p>',
+                                       content_en='<p>Tastings in <strong>Berehove</strong> cellars</p>')
+            PageContent.objects.create(slug='economy', title_uk='Економіка', title_en='Economy',
+                                       content_en='<p>Wine exports & tourism <grow></p>')
+            CatalogItem.objects.create(slug='cabernet', title_uk='Каберне', title_en='Cabernet',
+                                       short_description_en='Dry red wine from Berehove')
+        self.url = reverse('search')
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_results_in_both_languages(self):
+        data = self.search(q='wine')
+        self.assertEqual(data['query'], 'wine')
+        results = data['results']
+        # The title match ranks first
+        self.assertEqual(results[0]['slug'], 'wine-tourism')
+        self.assertEqual({result['kind'] for result in results}, {'page', 'content', 'catalog'})
+        self.assertEqual(set(results[0]), {'kind', 'slug', 'rank', 'title_uk', 'snippet_uk', 'title_en', 'snippet_en'})
+        self.assertEqual(results[0]['title_uk'], 'Винний туризм')
+        self.assertGreaterEqual(results[0]['rank'], results[-1]['rank'])
+
+        slugs = [result['slug'] for result in self.search(q='Берегові')['results']]
+        self.assertEqual(slugs, ['wine-tourism'])
+
+    def test_prefix_terms_and_language(self):
+        self.assertEqual([r['slug'] for r in self.search(q='берег')['results']], ['wine-tourism'])
+        self.assertEqual([r['slug'] for r in self.search(q='berehove cell')['results']], ['wine-tourism'])
+        # Every word has to match within one language
+        self.assertEqual(self.search(q='cabernet berehove')['results'][0]['slug'], 'cabernet')
+        self.assertEqual(self.search(q='каберне berehove')['results'], [])
+
+        data = self.search(q='berehove', lang='en')
+        self.assertEqual(set(data['results'][0]), {'kind', 'slug', 'rank', 'title_en', 'snippet_en'})
+        self.assertEqual(self.search(q='берег', lang='en')['results'], [])
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        result = self.search(q='exports', lang='en')['results'][0]
+        self.assertEqual(result['snippet_en'], 'Wine <mark>exports</mark> &amp; tourism')
+        # Markup of the source is not searchable
+        self.assertEqual(self.search(q='strong')['results'], [])
+
+    def test_filters_and_validation(self):
+        slugs = {r['slug'] for r in self.search(q='wine', kind='catalog,content')['results']}
+        self.assertEqual(slugs, {'economy', 'cabernet'})
+        self.assertEqual(len(self.search(q='wine', limit=1)['results']), 1)
+        self.assertEqual(self.search(q='"*:(')['results'], [])
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'wine', 'kind': 'user'}).status_code, 400)
+
+    @override_settings(API_CACHE_TIMEOUT=60)
+    def test_results_are_not_cached(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'honey'}).json()['results'], [])
+        self.assertNotIn('X-Cache', self.client.get(self.url, {'q': 'honey'}))
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogItem.objects.create(slug='honey', title_uk='Мед', title_en='Honey')
+        response = self.client.get(self.url, {'q': 'honey'})
+        self.assertEqual([r['slug'] for r in response.json()['results']], ['honey'])
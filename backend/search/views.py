@@ -0,0 +1,45 @@
+from django.conf import settings
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from core.projection import language_options
+from .backends import search
+from .models import SearchDocument
+
+
+class SearchView(generics.ListAPIView):
+    """
+    Full-text search across dynamic pages, legacy content and catalog items.
+    Query params: ?q= (required), ?lang=uk|en (search and return one
+    language), ?kind=page,content,catalog, ?limit=
+
+    Not cached: free-text queries rarely repeat, and caching them would push
+    page and catalog responses out of the shared cache.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get_kinds(self):
+        kinds = [kind for kind in self.request.query_params.get('kind', '').split(',') if kind]
+        known = {kind for kind, _ in SearchDocument.KIND_CHOICES}
+        unknown = [kind for kind in kinds if kind not in known]
+        if unknown:
+            raise ValidationError({'kind': f'Unknown kind(s): {", ".join(unknown)}.'})
+        return kinds
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', settings.API_SEARCH_LIMIT))
+        except (TypeError, ValueError):
+            limit = settings.API_SEARCH_LIMIT
+        return max(1, min(limit, settings.API_SEARCH_MAX_LIMIT))
+
+    def list(self, request, *args, **kwargs):
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            raise ValidationError({'q': 'This parameter is required.'})
+        lang = language_options(request)['lang']
+        results = search(q, lang=lang, kinds=self.get_kinds(), limit=self.get_limit())
+        return Response({'query': q, 'results': results})
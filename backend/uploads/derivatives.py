@@ -0,0 +1,247 @@
+"""
+Responsive image derivatives and image metadata.
+
+Models list their image fields in ``DERIVED_IMAGE_FIELDS`` (image field ->
+JSON metadata field, e.g. ``{'image': 'image_meta'}``); other uploads with
+generated previews are listed the same way under the attributes of
+PROCESSORS. After an upload is committed, every image field is resized to the IMAGE_DERIVATIVE_WIDTHS buckets
+that fit the original and encoded as AVIF (when Pillow can write it), WebP
+and JPEG. The files go to the field's own storage next to the original.
+The same pass measures the original, so clients can reserve its box and
+paint a placeholder before any image bytes arrive:
+
+    {"version": 2, "source": "item_gallery/a.jpg",
+     "width": 1600, "height": 1067, "bytes": 482113,
+     "color": "#6d7f52", "placeholder": "data:image/webp;base64,...",
+     "variants": [{"name": ..., "width": 320, "height": 213, "format": "webp"}, ...]}
+
+Encoding runs in a small thread pool (MEDIA_WORKERS; 0 runs it inline) so
+admin saves return immediately; ``manage.py build_image_derivatives``
+backfills rows that have no derivatives yet.
+"""
+import base64
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# format -> (Pillow format, extension, content type, save options), best first
+FORMATS = {
+    'avif': ('AVIF', 'avif', 'image/avif', {'quality': 55}),
+    'webp': ('WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Model attribute listing processed file fields -> metadata builder
+PROCESSORS = {
+    'DERIVED_IMAGE_FIELDS': 'uploads.derivatives.build_derivatives',
+    'PDF_PREVIEW_FIELDS': 'uploads.previews.build_pdf_preview',
+    'VIDEO_POSTER_FIELDS': 'uploads.posters.build_video_poster',
+}
+
+# Bumped when the metadata gains keys, so the backfill command refreshes old rows
+META_VERSION = 2
+PLACEHOLDER_SIZE = 16  # px, longest side
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def derived_image_fields(model):
+    return getattr(model, 'DERIVED_IMAGE_FIELDS', {})
+
+
+def processed_fields(model):
+    """``{file field: metadata field}`` of every processed upload of ``model``."""
+    fields = {}
+    for attribute in PROCESSORS:
+        fields.update(getattr(model, attribute, {}))
+    return fields
+
+
+def builder(model, field_name):
+    for attribute, path in PROCESSORS.items():
+        if field_name in getattr(model, attribute, {}):
+            return import_string(path)
+    raise KeyError(field_name)
+
+
+@functools.cache
+def available_formats():
+    Image.init()
+    return [key for key, (pil_format, *_) in FORMATS.items() if pil_format in Image.SAVE]
+
+
+def target_widths(width):
+    """Width buckets below the original, plus the original itself (capped at the largest bucket)."""
+    buckets = sorted(settings.IMAGE_DERIVATIVE_WIDTHS)
+    widths = [bucket for bucket in buckets if bucket < width]
+    if min(width, buckets[-1]) not in widths:
+        widths.append(min(width, buckets[-1]))
+    return widths
+
+
+def needs_processing(meta, name):
+    meta = meta or {}
+    return meta.get('source') != name or meta.get('version') != META_VERSION
+
+
+def dominant_color(image):
+    """Hex colour of the most common of a few representative colours."""
+    small = image.convert('RGB')
+    small.thumbnail((64, 64))
+    palette = small.quantize(colors=5)
+    _, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def placeholder(image):
+    """A tiny blurred-up preview as a data URI (typically 100-300 bytes)."""
+    key = 'webp' if 'webp' in available_formats() else 'jpeg'
+    small = image.copy()
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    data = base64.b64encode(_encode(small, key, quality=40)).decode('ascii')
+    return f'data:{FORMATS[key][2]};base64,{data}'
+
+
+def _encode(image, key, **overrides):
+    pil_format, _, _, options = FORMATS[key]
+    if pil_format == 'JPEG' and image.mode == 'RGBA':
+        # JPEG has no alpha channel: flatten onto white
+        flat = Image.new('RGB', image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel('A'))
+        image = flat
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **{**options, **overrides})
+    return buffer.getvalue()
+
+
+def describe(image):
+    """Size, dominant colour and placeholder of a decoded image."""
+    return {
+        'width': image.width, 'height': image.height,
+        'color': dominant_color(image), 'placeholder': placeholder(image),
+    }
+
+
+DERIVATIVE_NAME_RE = re.compile(r'^derivatives/.+-[0-9a-f]{10}/[^/]+$')
+
+
+def derivative_folder(name, data):
+    # The content hash keeps derivative URLs unique per upload (safe to cache forever)
+    return f"derivatives/{os.path.splitext(name)[0]}-{hashlib.sha256(data).hexdigest()[:10]}"
+
+
+def is_content_hashed(name):
+    """Whether ``name`` lies in a derivative folder, whose bytes never change."""
+    return DERIVATIVE_NAME_RE.match(name) is not None
+
+
+def encode_variants(storage, folder, image, widths):
+    """Save ``image`` resized to each of ``widths`` in every available format."""
+    variants = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for key in available_formats():
+            extension = FORMATS[key][1]
+            saved = storage.save(f'{folder}/{width}w.{extension}', ContentFile(_encode(resized, key)))
+            variants.append({'name': saved, 'width': width, 'height': height, 'format': key})
+    return variants
+
+
+def build_derivatives(storage, name):
+    """Encode every variant of the image ``name`` into ``storage``; returns its metadata."""
+    meta = {'version': META_VERSION, 'source': name, 'variants': []}
+    try:
+        with storage.open(name, 'rb') as fh:
+            data = fh.read()
+        image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    except (UnidentifiedImageError, OSError) as exc:
+        # Missing file or not a raster image (SVG, ...): recorded with no variants
+        logger.warning('Not generating derivatives for %s: %s', name, exc)
+        return meta
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    meta.update(describe(image), bytes=len(data))
+    meta['variants'] = encode_variants(storage, derivative_folder(name, data), image, target_widths(image.width))
+    return meta
+
+
+def delete_derivatives(storage, meta):
+    for variant in (meta or {}).get('variants', []):
+        try:
+            storage.delete(variant['name'])
+        except Exception:
+            logger.warning('Could not delete derivative %s', variant['name'], exc_info=True)
+
+
+def process(label, pk, field_name, name):
+    """Generate derivatives for ``<label>(pk).<field_name>`` if it still holds ``name``."""
+    model = apps.get_model(label)
+    meta_field = processed_fields(model)[field_name]
+    storage = model._meta.get_field(field_name).storage
+    meta = builder(model, field_name)(storage, name)
+    with transaction.atomic():
+        instance = model._base_manager.select_for_update().filter(pk=pk).first()
+        if instance is None or getattr(instance, field_name).name != name:
+            # Deleted or replaced while we were encoding
+            transaction.on_commit(lambda: delete_derivatives(storage, meta))
+            return None
+        previous = getattr(instance, meta_field)
+        setattr(instance, meta_field, meta)
+        # A regular save, so the model's signals refresh snapshots and caches
+        instance.save(update_fields=[meta_field, 'updated_at'])
+    if previous and previous.get('variants'):
+        delete_derivatives(storage, previous)
+    return meta
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.MEDIA_WORKERS, thread_name_prefix='media')
+        return _executor
+
+
+def _run_in_worker(task):
+    try:
+        task()
+    except Exception:
+        logger.exception('Background media task failed')
+    finally:
+        # Worker threads hold their own connections
+        connections.close_all()
+
+
+def run_in_background(task):
+    """Run ``task`` on the media thread pool, or inline when MEDIA_WORKERS is 0."""
+    if settings.MEDIA_WORKERS:
+        executor().submit(_run_in_worker, task)
+    else:
+        task()
+
+
+def schedule(instance, field_name):
+    """Generate derivatives for ``instance.<field_name>`` once the current transaction commits."""
+    task = functools.partial(
+        process, instance._meta.concrete_model._meta.label, instance.pk, field_name,
+        getattr(instance, field_name).name,
+    )
+    transaction.on_commit(lambda: run_in_background(task))
@@ -0,0 +1,101 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .derivatives import FORMATS, processed_fields
+from .media import concrete, url_cache
+
+
+class MediaUrlField(serializers.Field):
+    """
+    Memoized URL of a file field (see uploads.media), None when empty;
+    ``absolute`` prefixes the request's scheme and host (SITE_URL without one).
+    """
+
+    def __init__(self, file_field, absolute=False, **kwargs):
+        self.absolute = absolute
+        kwargs.update(source=file_field, read_only=True)
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        self.storage = concrete(parent.Meta.model._meta.get_field(self.source).storage)
+
+    def url(self, name, request=None):
+        if not name:
+            return None
+        url = url_cache.url(self.storage, name)
+        if not self.absolute:
+            return url
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return f"{getattr(settings, 'SITE_URL', 'http://localhost:8000')}{url}"
+
+    def to_representation(self, file):
+        return self.url(file.name, self.context.get('request'))
+
+
+class ImageMetaField(serializers.Field):
+    """Read-only field reading the metadata column behind a processed upload."""
+
+    def __init__(self, file_field, **kwargs):
+        self.file_field = file_field
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        model = parent.Meta.model
+        self.source = processed_fields(model)[self.file_field]
+        self.storage = concrete(model._meta.get_field(self.file_field).storage)
+        super().bind(field_name, parent)
+
+
+class SrcsetField(ImageMetaField):
+    """
+    Derivatives of an image field as ``[{url, width, height, type}, ...]``
+    (best format first, then by width), ready for ``<picture>``/``srcset``.
+    Empty until the derivatives have been generated.
+    """
+
+    def to_representation(self, meta):
+        order = list(FORMATS)
+        variants = sorted((meta or {}).get('variants', []), key=lambda v: (order.index(v['format']), v['width']))
+        return [
+            {
+                'url': url_cache.url(self.storage, variant['name']),
+                'width': variant['width'],
+                'height': variant['height'],
+                'type': FORMATS[variant['format']][2],
+            }
+            for variant in variants
+        ]
+
+
+class ImageInfoField(ImageMetaField):
+    """
+    ``{width, height, bytes, color, placeholder}`` of the original image, so
+    clients can size the box and paint a preview before loading it; None
+    until the image has been measured.
+    """
+    keys = ('width', 'height', 'bytes', 'color', 'placeholder')
+
+    def to_representation(self, meta):
+        if not meta or self.keys[0] not in meta:
+            return None
+        return {key: meta.get(key) for key in self.keys}
+
+
+class DocumentInfoField(ImageInfoField):
+    """
+    ``{bytes, pages, width, height, color, placeholder}`` of an uploaded
+    document; the image keys describe its first-page preview and stay None
+    when no preview could be rendered.
+    """
+    keys = ('bytes', 'pages', 'width', 'height', 'color', 'placeholder')
+
+
+class VideoInfoField(ImageInfoField):
+    """
+    ``{bytes, duration, width, height, bitrate, color, placeholder}`` of an
+    uploaded video; None values where ffprobe/ffmpeg were not available.
+    """
+    keys = ('bytes', 'duration', 'width', 'height', 'bitrate', 'color', 'placeholder')
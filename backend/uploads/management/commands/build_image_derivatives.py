@@ -0,0 +1,24 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from uploads.derivatives import processed_fields, needs_processing, process
+
+
+class Command(BaseCommand):
+    help = "Generate image derivatives, document previews, video posters and metadata for uploads that lack them or have outdated metadata"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate existing derivatives, previews and posters too")
+
+    def handle(self, *args, **options):
+        count = 0
+        for model in apps.get_models():
+            if model._meta.proxy:
+                continue
+            for field_name, meta_field in processed_fields(model).items():
+                rows = model._base_manager.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+                for pk, name, meta in rows.values_list("pk", field_name, meta_field).iterator():
+                    if options["force"] or needs_processing(meta, name):
+                        process(model._meta.label, pk, field_name, name)
+                        count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} upload(s)"))
@@ -0,0 +1,136 @@
+"""
+Memoized media URLs.
+
+``FieldFile.url`` asks the storage for a URL on every call; with
+MediaCloudinaryStorage that runs the Cloudinary SDK's URL builder per field,
+per object. The URL only depends on the storage and the file name, so it is
+kept in a bounded per-process LRU (MEDIA_URL_CACHE_SIZE entries).
+
+Serializers mixing in MediaUrlMixin batch-resolve every file of the tree
+they are about to render (the root instances, their prefetched relations and
+the derivatives and previews recorded in upload metadata) in one pass; the per-field
+lookups that follow only hit the memo.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import models
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+from rest_framework import serializers
+
+from .derivatives import processed_fields
+
+
+def concrete(storage):
+    """The storage behind a ``default_storage``-style proxy: hashing the proxy is slow."""
+    if isinstance(storage, LazyObject):
+        if storage._wrapped is empty:
+            storage._setup()
+        return storage._wrapped
+    return storage
+
+
+class UrlCache:
+    """Thread-safe LRU of ``(storage, name) -> url``."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._urls = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            url = self._urls.get(key)
+            if url is not None:
+                self._urls.move_to_end(key)
+            return url
+
+    def _store(self, items):
+        with self._lock:
+            self._urls.update(items)
+            for key in items:
+                self._urls.move_to_end(key)
+            while len(self._urls) > self.maxsize:
+                self._urls.popitem(last=False)
+
+    def url(self, storage, name):
+        storage = concrete(storage)
+        key = (storage, name)
+        url = self._lookup(key)
+        if url is None:
+            url = storage.url(name)
+            self._store({key: url})
+        return url
+
+    def prime(self, keys):
+        """Resolve every not yet cached ``(storage, name)`` in ``keys``."""
+        keys = {(concrete(storage), name) for storage, name in keys}
+        with self._lock:
+            missing = {key for key in keys if key not in self._urls}
+        if missing:
+            self._store({(storage, name): storage.url(name) for storage, name in missing})
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+
+    def __len__(self):
+        return len(self._urls)
+
+
+url_cache = UrlCache(settings.MEDIA_URL_CACHE_SIZE)
+
+
+@receiver(setting_changed)
+def _reset_url_cache(setting, **kwargs):
+    if setting in ('MEDIA_URL', 'STORAGES', 'MEDIA_URL_CACHE_SIZE'):
+        url_cache.maxsize = settings.MEDIA_URL_CACHE_SIZE
+        url_cache.clear()
+
+
+def _loaded_files(instance):
+    """``(storage, name)`` of the files (and their derivatives) loaded on ``instance``."""
+    model = type(instance)
+    loaded = instance.__dict__
+    derived = processed_fields(model)
+    for field in model._meta.concrete_fields:
+        if not isinstance(field, models.FileField) or not loaded.get(field.attname):
+            continue
+        name = str(loaded[field.attname])
+        yield field.storage, name
+        meta = loaded.get(derived.get(field.name)) or {}
+        for variant in meta.get('variants', ()):
+            yield field.storage, variant['name']
+
+
+def collect_files(instances):
+    """Files of ``instances`` and of everything prefetched below them."""
+    keys, pending = set(), list(instances)
+    while pending:
+        instance = pending.pop()
+        if not isinstance(instance, models.Model):
+            continue
+        keys.update(_loaded_files(instance))
+        for related in getattr(instance, '_prefetched_objects_cache', {}).values():
+            pending.extend(related)
+    return keys
+
+
+class MediaUrlMixin:
+    """
+    Serializer mixin: the root serializer (or the root list) resolves the
+    URLs of its whole tree at once before rendering the first object.
+    """
+
+    def to_representation(self, instance):
+        root = self.parent if isinstance(self.parent, serializers.ListSerializer) else self
+        if root.parent is None and not getattr(root, '_media_resolved', False):
+            root._media_resolved = True
+            instances = [instance] if root is self else root.instance
+            if isinstance(instances, models.Manager):
+                instances = instances.all()
+            url_cache.prime(collect_files(instances or ()))
+        return super().to_representation(instance)
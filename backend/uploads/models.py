@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class StoredBlob(models.Model):
+    """One stored file shared by every upload with the same content (see uploads.storage)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=500, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Збережений файл"
+        verbose_name_plural = "Збережені файли"
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,130 @@
+"""
+Poster frames and technical metadata of uploaded videos.
+
+Models list their video fields in ``VIDEO_POSTER_FIELDS`` (file field ->
+JSON metadata field). The upload pipeline of uploads.derivatives runs
+``build_video_poster`` in its worker pool after the upload is committed:
+``ffprobe`` reads duration, resolution and bitrate, ``ffmpeg`` grabs one
+frame shortly after the start, and the frame is encoded like an image
+derivative, so hero sections can paint a poster before the video streams:
+
+    {"version": 2, "source": "section_videos/hero.mp4", "bytes": 18233011,
+     "duration": 42.08, "bitrate": 3466112, "codec": "h264",
+     "width": 1920, "height": 1080, "color": "#29313a",
+     "placeholder": "data:image/webp;base64,...", "variants": [...]}
+
+Both binaries are optional: without ffprobe only the size is recorded,
+without ffmpeg there is no poster.
+"""
+import contextlib
+import json
+import logging
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+
+from .derivatives import META_VERSION, derivative_folder, describe, encode_variants, target_widths
+
+logger = logging.getLogger(__name__)
+
+POSTER_OFFSET = 1.0  # seconds into the video, or 10% of shorter ones
+
+TOOL_ERRORS = (OSError, ValueError, subprocess.SubprocessError)
+
+
+@contextlib.contextmanager
+def local_copy(storage, name):
+    """A filesystem path for ``name``: the file itself, or a temporary copy for remote storages."""
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix='-' + name.rsplit('/', 1)[-1]) as copy:
+        with storage.open(name, 'rb') as fh:
+            shutil.copyfileobj(fh, copy, 1024 * 1024)
+        copy.flush()
+        yield copy.name
+
+
+def parse_probe(output):
+    """Duration, bitrate, codec and display resolution from ``ffprobe -of json`` output."""
+    report = json.loads(output)
+    stream = next(s for s in report.get('streams', []) if s.get('codec_type') == 'video')
+    fmt = report.get('format', {})
+    width, height = int(stream['width']), int(stream['height'])
+    rotation = int(stream.get('tags', {}).get('rotate', 0))
+    for side_data in stream.get('side_data_list', []):
+        rotation = int(side_data.get('rotation', rotation))
+    if rotation % 180:
+        # Phone videos are stored sideways and rotated on playback
+        width, height = height, width
+    duration = fmt.get('duration') or stream.get('duration')
+    bitrate = fmt.get('bit_rate') or stream.get('bit_rate')
+    return {
+        'duration': round(float(duration), 3) if duration else None,
+        'bitrate': int(bitrate) if bitrate else None,
+        'codec': stream.get('codec_name'),
+        'width': width,
+        'height': height,
+    }
+
+
+def probe(path):
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-of', 'json', '-show_format', '-show_streams', path],
+        capture_output=True, check=True, timeout=settings.VIDEO_POSTER_TIMEOUT,
+    ).stdout
+    return parse_probe(output)
+
+
+def extract_frame(path, at):
+    """The frame at ``at`` seconds as a PIL image (ffmpeg applies the rotation)."""
+    png = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-ss', f'{at:.3f}', '-i', path, '-frames:v', '1',
+         '-f', 'image2pipe', '-c:v', 'png', '-'],
+        capture_output=True, check=True, timeout=settings.VIDEO_POSTER_TIMEOUT,
+    ).stdout
+    return Image.open(BytesIO(png)).convert('RGB')
+
+
+def poster_time(duration):
+    return min(POSTER_OFFSET, duration / 10) if duration else 0
+
+
+def build_video_poster(storage, name):
+    """Probe the video ``name`` and save its poster into ``storage``; returns its metadata."""
+    meta = {'version': META_VERSION, 'source': name, 'variants': []}
+    try:
+        meta['bytes'] = storage.size(name)
+    except OSError as exc:
+        logger.warning('Not generating a poster for %s: %s', name, exc)
+        return meta
+    if not shutil.which('ffprobe'):
+        return meta
+
+    with local_copy(storage, name) as path:
+        try:
+            meta.update(probe(path))
+        except (*TOOL_ERRORS, StopIteration, KeyError) as exc:
+            # Not a video, or a container ffprobe cannot read
+            logger.warning('Could not probe %s: %s', name, exc)
+            return meta
+        if not shutil.which('ffmpeg'):
+            return meta
+        try:
+            image = extract_frame(path, poster_time(meta['duration']))
+        except TOOL_ERRORS as exc:
+            logger.warning('Could not extract a poster from %s: %s', name, exc)
+            return meta
+
+    meta.update(describe(image))
+    folder = derivative_folder(name, image.tobytes())
+    meta['variants'] = encode_variants(storage, folder, image, target_widths(image.width))
+    return meta
@@ -0,0 +1,102 @@
+"""
+First-page previews of uploaded PDFs.
+
+Models list their document fields in ``PDF_PREVIEW_FIELDS`` (file field ->
+JSON metadata field). The upload pipeline of uploads.derivatives runs
+``build_pdf_preview`` in its worker pool after the upload is committed: the
+first page is rendered at the largest PDF_PREVIEW_WIDTHS bucket, then
+encoded like an image derivative, so the metadata has the same shape plus
+the page count:
+
+    {"version": 2, "source": "catalog/pdfs/guide.pdf", "bytes": 4821133,
+     "pages": 24, "width": 640, "height": 905, "color": "#e9e4d8",
+     "placeholder": "data:image/webp;base64,...", "variants": [...]}
+
+Rendering uses pypdfium2 when installed, else poppler's ``pdftoppm`` /
+``pdfinfo`` when they are on PATH. Without either, and for files that are
+not PDFs, only the size is recorded.
+"""
+import logging
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+
+from .derivatives import META_VERSION, derivative_folder, describe, encode_variants
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_pdf(data):
+    return data[:1024].lstrip().startswith(b'%PDF-')
+
+
+def render_with_pdfium(data, width):
+    document = pdfium.PdfDocument(data)
+    try:
+        page = document[0]
+        scale = width / page.get_width()
+        return len(document), page.render(scale=scale).to_pil().convert('RGB')
+    finally:
+        document.close()
+
+
+def render_with_poppler(data, width):
+    timeout = settings.PDF_PREVIEW_TIMEOUT
+    with tempfile.NamedTemporaryFile(suffix='.pdf') as source:
+        source.write(data)
+        source.flush()
+        info = subprocess.run(
+            ['pdfinfo', source.name], capture_output=True, check=True, timeout=timeout,
+        ).stdout.decode('latin-1')
+        pages = next(int(line.split(':', 1)[1]) for line in info.splitlines() if line.startswith('Pages:'))
+        # Without an output root the page is written to stdout
+        png = subprocess.run(
+            ['pdftoppm', '-png', '-f', '1', '-l', '1', '-singlefile', '-scale-to-x', str(width), '-scale-to-y', '-1',
+             source.name],
+            capture_output=True, check=True, timeout=timeout,
+        ).stdout
+    return pages, Image.open(BytesIO(png)).convert('RGB')
+
+
+def renderer():
+    """The first-page renderer available here, or None."""
+    if pdfium is not None:
+        return render_with_pdfium
+    if shutil.which('pdftoppm') and shutil.which('pdfinfo'):
+        return render_with_poppler
+    return None
+
+
+def build_pdf_preview(storage, name):
+    """Render the first page of the PDF ``name`` into ``storage``; returns its metadata."""
+    meta = {'version': META_VERSION, 'source': name, 'variants': []}
+    try:
+        with storage.open(name, 'rb') as fh:
+            data = fh.read()
+    except OSError as exc:
+        logger.warning('Not generating a preview for %s: %s', name, exc)
+        return meta
+    meta['bytes'] = len(data)
+
+    render = renderer()
+    if not is_pdf(data) or render is None:
+        return meta
+    widths = sorted(settings.PDF_PREVIEW_WIDTHS)
+    try:
+        pages, image = render(data, widths[-1])
+    except Exception as exc:
+        # Damaged or encrypted file, or the renderer gave up
+        logger.warning('Could not render a preview of %s: %s', name, exc)
+        return meta
+    meta.update(describe(image), pages=pages)
+    meta['variants'] = encode_variants(storage, derivative_folder(name, data), image, widths)
+    return meta
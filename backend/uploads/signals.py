@@ -0,0 +1,75 @@
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .derivatives import delete_derivatives, processed_fields, needs_processing, schedule
+from .media import concrete
+from .storage import DedupStorage
+
+
+def file_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+
+
+def release_on_commit(field, name):
+    """Drop the reference on ``name`` once the transaction commits (DedupStorage only)."""
+    storage = concrete(field.storage)
+    if name and isinstance(storage, DedupStorage):
+        transaction.on_commit(lambda: storage.release(name))
+
+
+def release_replaced_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Release the stored files a row is about to stop pointing at."""
+    if raw or instance.pk is None:
+        return
+    fields = [field for field in file_fields(sender) if update_fields is None or field.name in update_fields]
+    if not fields:
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).values(*(field.attname for field in fields)).first()
+    for field in fields if stored else ():
+        if stored[field.attname] != getattr(instance, field.attname).name:
+            release_on_commit(field, stored[field.attname])
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    for field in file_fields(sender):
+        release_on_commit(field, getattr(instance, field.attname).name)
+
+
+def drop_stale_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Forget the derivatives of an image that is being replaced or cleared."""
+    if raw:
+        return
+    for field_name, meta_field in processed_fields(sender).items():
+        meta = getattr(instance, meta_field)
+        if meta and meta.get('source') != getattr(instance, field_name).name:
+            storage = sender._meta.get_field(field_name).storage
+            setattr(instance, meta_field, {})
+            transaction.on_commit(lambda storage=storage, meta=meta: delete_derivatives(storage, meta))
+
+
+def image_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for field_name, meta_field in processed_fields(sender).items():
+        name = getattr(instance, field_name).name
+        if name and needs_processing(getattr(instance, meta_field), name):
+            schedule(instance, field_name)
+
+
+def image_deleted(sender, instance, **kwargs):
+    for field_name, meta_field in processed_fields(sender).items():
+        storage = sender._meta.get_field(field_name).storage
+        meta = getattr(instance, meta_field)
+        transaction.on_commit(lambda storage=storage, meta=meta: delete_derivatives(storage, meta))
+
+
+# Connected per model (proxies included: their signals use the proxy as sender)
+for model in apps.get_models():
+    if file_fields(model):
+        pre_save.connect(release_replaced_files, sender=model)
+        post_delete.connect(release_deleted_files, sender=model)
+    if processed_fields(model):
+        pre_save.connect(drop_stale_derivatives, sender=model)
+        post_save.connect(image_saved, sender=model)
+        post_delete.connect(image_deleted, sender=model)
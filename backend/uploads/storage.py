@@ -0,0 +1,152 @@
+"""
+Content-addressed deduplication for the default media storage.
+
+Editors upload the same logos and photos over and over. DedupStorage wraps
+the real backend (FileSystemStorage, MediaCloudinaryStorage, ...): every
+incoming file is hashed and, when a file with the same SHA-256 is already
+stored, its name is returned instead of uploading another copy. The name
+keeps the folder of the first upload, so it may lie under another field's
+``upload_to``. StoredBlob rows count the references to each stored file;
+``delete()`` drops one reference and only removes the file with the last
+one. Files stored before the wrapper was enabled have no StoredBlob and are
+deleted directly.
+
+Model rows hold one reference per file field: uploads.signals calls
+``release()`` when a row is deleted or its file is replaced.
+
+Configured as the "default" entry of STORAGES:
+
+    {'BACKEND': 'uploads.storage.DedupStorage',
+     'OPTIONS': {'backend': 'django.core.files.storage.FileSystemStorage'}}
+"""
+import hashlib
+
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+def content_digest(content):
+    """SHA-256 and size of ``content``, leaving it rewound for the actual save."""
+    digest, size = hashlib.sha256(), 0
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+    return digest.hexdigest(), size
+
+
+@deconstructible(path='uploads.storage.DedupStorage')
+class DedupStorage(Storage):
+    def __init__(self, backend='django.core.files.storage.FileSystemStorage', options=None):
+        self.backend = import_string(backend)(**(options or {}))
+
+    def save(self, name, content, max_length=None):
+        from .models import StoredBlob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        sha256, size = content_digest(content)
+
+        existing = self.add_reference(sha256)
+        if existing is not None:
+            return existing
+
+        stored = self.backend.save(name, content, max_length=max_length)
+        try:
+            with transaction.atomic():
+                StoredBlob.objects.create(sha256=sha256, name=stored, size=size)
+        except IntegrityError:
+            # The same content was stored concurrently: keep the other copy
+            existing = self.add_reference(sha256)
+            if existing is not None:
+                self.backend.delete(stored)
+                return existing
+            StoredBlob.objects.create(sha256=sha256, name=stored, size=size)
+        return stored
+
+    def add_reference(self, sha256):
+        """
+        Name of the stored file with this content, counting one more
+        reference to it; None when there is none. The row is locked like in
+        ``delete()``, so the last reference cannot be dropped in between.
+        """
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return None
+            if not self.backend.exists(blob.name):
+                # The file vanished behind our back: store it again
+                blob.delete()
+                return None
+            updated = StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            return blob.name if updated else None
+
+    def delete(self, name):
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+        self.backend.delete(name)
+
+    def release(self, name):
+        """
+        Drop the reference a model row held on ``name``. Unlike ``delete()``
+        this keeps files stored before deduplication: their references were
+        never counted, so another row may still point at them.
+        """
+        from .models import StoredBlob
+
+        if StoredBlob.objects.filter(name=name).exists():
+            self.delete(name)
+
+    # Everything else is the wrapped backend's business
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_valid_name(self, name):
+        return self.backend.get_valid_name(name)
+
+    def get_available_name(self, name, max_length=None):
+        return self.backend.get_available_name(name, max_length=max_length)
+
+    def generate_filename(self, filename):
+        return self.backend.generate_filename(filename)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
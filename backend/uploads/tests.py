@@ -0,0 +1,407 @@
+import io
+import json
+import tempfile
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from catalog.models import CatalogItem
+from content.models import Page, PageSection, PageSectionItem, PageSectionItemImage
+from content.queries import with_page_tree
+from content.serializers import PageSerializer
+from .derivatives import available_formats
+from .media import UrlCache, url_cache
+from .models import StoredBlob
+from .posters import parse_probe
+from .previews import pdfium
+
+
+def image_file(name, size, mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+def pdf_file(name, pages=3):
+    buffer = io.BytesIO()
+    first, *rest = [Image.new("RGB", (595, 842), (240, 230, 210)) for _ in range(pages)]
+    first.save(buffer, "PDF", save_all=True, append_images=rest)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="application/pdf")
+
+
+class TemporaryMediaMixin:
+    """Store uploads in a temporary MEDIA_ROOT for the duration of each test."""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+@override_settings(MEDIA_WORKERS=0, API_CACHE_TIMEOUT=0, IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1920))
+class ImageDerivativeTest(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        page = Page.objects.create(slug="gallery", title_uk="Галерея", title_en="Gallery")
+        section = PageSection.objects.create(page=page)
+        self.item = PageSectionItem.objects.create(section=section)
+
+    def _upload(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PageSectionItemImage.objects.create(item=self.item, image=image_file("photo.png", (800, 400), **kwargs))
+
+    def test_width_buckets_and_formats_are_generated(self):
+        image = self._upload()
+        image.refresh_from_db()
+        meta = image.image_meta
+        self.assertEqual(meta["source"], image.image.name)
+        self.assertEqual(sorted({v["width"] for v in meta["variants"]}), [320, 640, 800])
+        self.assertEqual({v["format"] for v in meta["variants"]}, set(available_formats()))
+        self.assertIn("webp", available_formats())
+        variant = next(v for v in meta["variants"] if v["width"] == 320 and v["format"] == "jpeg")
+        self.assertEqual(variant["height"], 160)
+        with default_storage.open(variant["name"]) as fh:
+            self.assertEqual(Image.open(fh).size, (320, 160))
+
+    def test_srcset_reaches_the_page_snapshot(self):
+        self._upload()
+        data = self.client.get(reverse("page_detail", args=["gallery"])).json()
+        srcset = data["sections"][0]["items"][0]["images"][0]["image_srcset"]
+        self.assertTrue(srcset)
+        self.assertLessEqual({"image/webp", "image/jpeg"}, {entry["type"] for entry in srcset})
+        self.assertTrue(all(entry["url"].startswith("/media/derivatives/item_gallery/photo") for entry in srcset))
+
+    def test_image_info_is_measured(self):
+        self._upload()
+        data = self.client.get(reverse("page_detail", args=["gallery"])).json()
+        info = data["sections"][0]["items"][0]["images"][0]["image_info"]
+        self.assertEqual((info["width"], info["height"]), (800, 400))
+        self.assertGreater(info["bytes"], 0)
+        self.assertEqual(info["color"], "#c81e1e")
+        self.assertTrue(info["placeholder"].startswith("data:image/webp;base64,"))
+        self.assertLess(len(info["placeholder"]), 1000)
+
+    def test_outdated_metadata_is_refreshed_by_the_backfill(self):
+        image = self._upload()
+        image.refresh_from_db()
+        PageSectionItemImage.objects.filter(pk=image.pk).update(
+            image_meta={"source": image.image.name, "variants": image.image_meta["variants"]}
+        )
+        call_command("build_image_derivatives", stdout=io.StringIO())
+        image.refresh_from_db()
+        self.assertEqual(image.image_meta["width"], 800)
+
+    def test_transparent_images_are_flattened_for_jpeg(self):
+        image = self._upload(mode="RGBA")
+        image.refresh_from_db()
+        jpeg = next(v for v in image.image_meta["variants"] if v["format"] == "jpeg")
+        with default_storage.open(jpeg["name"]) as fh:
+            self.assertEqual(Image.open(fh).mode, "RGB")
+
+    def test_replacing_the_image_drops_old_derivatives(self):
+        image = self._upload()
+        image.refresh_from_db()
+        old = [v["name"] for v in image.image_meta["variants"]]
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = image_file("other.png", (300, 300))
+            image.save()
+        image.refresh_from_db()
+        self.assertEqual([v["width"] for v in image.image_meta["variants"]][:1], [300])
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+
+    def test_backfill_command(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            item = CatalogItem.objects.create(slug="park", title_uk="Парк", cover_image=image_file("cover.png", (700, 350)))
+        self.assertEqual(item.cover_image_meta, {})
+        call_command("build_image_derivatives", stdout=io.StringIO())
+        item.refresh_from_db()
+        self.assertEqual(sorted({v["width"] for v in item.cover_image_meta["variants"]}), [320, 640, 700])
+        data = self.client.get(reverse("catalog-items-detail", args=["park"])).json()
+        self.assertEqual(len(data["cover_image_srcset"]), len(item.cover_image_meta["variants"]))
+
+
+class MediaUrlTest(TestCase):
+    def test_lru_keeps_the_most_recent_urls(self):
+        storage = mock.Mock(url=lambda name: f"/media/{name}")
+        cache = UrlCache(maxsize=2)
+        cache.url(storage, "a.jpg")
+        cache.url(storage, "b.jpg")
+        cache.url(storage, "a.jpg")
+        cache.url(storage, "c.jpg")
+        self.assertEqual(len(cache), 2)
+        storage.url = mock.Mock(side_effect=lambda name: f"/other/{name}")
+        self.assertEqual(cache.url(storage, "a.jpg"), "/media/a.jpg")
+        self.assertEqual(cache.url(storage, "b.jpg"), "/other/b.jpg")
+
+    @override_settings(MEDIA_WORKERS=0, IMAGE_DERIVATIVE_WIDTHS=(320,))
+    def test_tree_urls_are_resolved_once(self):
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            page = Page.objects.create(slug="grid", title_uk="Сітка")
+            section = PageSection.objects.create(page=page)
+            with self.captureOnCommitCallbacks(execute=True):
+                for index in range(3):
+                    item = PageSectionItem.objects.create(section=section, image=image_file(f"card{index}.png", (400 + index, 200)))
+                    PageSectionItemImage.objects.create(item=item, image=image_file(f"photo{index}.png", (300 + index, 200)))
+            url_cache.clear()
+            page = with_page_tree(Page.objects.all()).get(slug="grid")
+            with mock.patch.object(FileSystemStorage, "url", autospec=True, side_effect=FileSystemStorage.url) as url:
+                first = PageSerializer(page).data
+                calls = url.call_count
+                second = PageSerializer(page).data
+            names = {
+                name
+                for model in (PageSectionItem, PageSectionItemImage) for obj in model.objects.all()
+                for name in [obj.image.name, *(variant["name"] for variant in obj.image_meta["variants"])]
+            }
+            self.assertEqual(calls, len(names))
+            self.assertEqual(url.call_count, calls)
+            self.assertEqual(first, second)
+            card = first["sections"][0]["items"][0]
+            self.assertEqual(card["image_url"], PageSectionItem.objects.get(pk=card["id"]).image.url)
+
+
+class MediaViewTest(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.body = bytes(range(256)) * 40
+        self.name = default_storage.save("sections/videos/hero.mp4", io.BytesIO(self.body))
+        self.url = f"/media/{self.name}"
+
+    def test_whole_file_is_streamed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(response["Content-Length"], str(len(self.body)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], f"public, max-age={settings.MEDIA_ORIGINAL_MAX_AGE}")
+
+    def test_only_derivatives_are_immutable(self):
+        name = default_storage.save("derivatives/sections/hero-0123456789/320w.webp", io.BytesIO(b"webp"))
+        response = self.client.get(f"/media/{name}")
+        self.assertEqual(response["Cache-Control"], f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable")
+
+    def test_byte_ranges(self):
+        for header, start, end in [("bytes=100-199", 100, 199), ("bytes=10000-", 10000, 10239), ("bytes=-40", 10200, 10239)]:
+            response = self.client.get(self.url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(b"".join(response.streaming_content), self.body[start:end + 1])
+            self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/{len(self.body)}")
+            self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+    def test_unsatisfiable_and_multi_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=99999-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.body)}")
+        self.assertNotIn("Cache-Control", response)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1,5-6")
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_range_and_revalidation(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_paths_outside_media_root_are_refused(self):
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 400)
+        self.assertEqual(self.client.get("/media/sections/").status_code, 404)
+
+
+@override_settings(MEDIA_WORKERS=0, API_CACHE_TIMEOUT=0, PDF_PREVIEW_WIDTHS=(160, 320))
+class PdfPreviewTest(TemporaryMediaMixin, TestCase):
+    def _create(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CatalogItem.objects.create(slug="guide", title_uk="Путівник", pdf_file=upload)
+
+    @skipIf(pdfium is None, "pypdfium2 is not installed")
+    def test_first_page_preview_and_page_count(self):
+        self._create(pdf_file("guide.pdf", pages=3))
+        data = self.client.get(reverse("catalog-items-detail", args=["guide"])).json()
+        info = data["pdf_info"]
+        self.assertEqual(info["pages"], 3)
+        self.assertGreater(info["bytes"], 0)
+        self.assertEqual((info["width"], info["height"]), (320, 453))
+        self.assertRegex(info["color"], r"^#f[01]e6d2$")
+        self.assertEqual(sorted({entry["width"] for entry in data["pdf_preview"]}), [160, 320])
+        with default_storage.open(data["pdf_preview"][0]["url"].removeprefix("/media/")) as fh:
+            self.assertEqual(Image.open(fh).width, 160)
+
+    def test_without_a_renderer_only_the_size_is_recorded(self):
+        with mock.patch("uploads.previews.renderer", return_value=None):
+            item = self._create(pdf_file("guide.pdf"))
+        item.refresh_from_db()
+        self.assertEqual(item.pdf_file_meta["variants"], [])
+        data = self.client.get(reverse("catalog-items-detail", args=["guide"])).json()
+        self.assertEqual(data["pdf_info"]["bytes"], item.pdf_file.size)
+        self.assertIsNone(data["pdf_info"]["pages"])
+        self.assertEqual(data["pdf_preview"], [])
+
+    def test_files_that_are_not_pdfs_are_not_rendered(self):
+        renderer = mock.Mock()
+        with mock.patch("uploads.previews.renderer", return_value=renderer):
+            item = self._create(SimpleUploadedFile("notes.pdf", b"plain text"))
+        renderer.assert_not_called()
+        item.refresh_from_db()
+        self.assertEqual(item.pdf_file_meta["bytes"], 10)
+
+
+@override_settings(MEDIA_WORKERS=0, API_CACHE_TIMEOUT=0, IMAGE_DERIVATIVE_WIDTHS=(320, 640))
+class VideoPosterTest(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = Page.objects.create(slug="home-hero", title_uk="Головна")
+
+    def _create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PageSection.objects.create(
+                page=self.page, section_type="hero",
+                video=SimpleUploadedFile("hero.mp4", b"\x00" * 2048, content_type="video/mp4"),
+            )
+        return self.client.get(reverse("page_detail", args=["home-hero"])).json()["sections"][0]
+
+    def test_probe_output_is_parsed(self):
+        output = json.dumps({
+            "streams": [
+                {"codec_type": "audio", "codec_name": "aac"},
+                {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+                 "side_data_list": [{"rotation": -90}]},
+            ],
+            "format": {"duration": "42.080000", "bit_rate": "3466112"},
+        })
+        self.assertEqual(
+            parse_probe(output),
+            {"duration": 42.08, "bitrate": 3466112, "codec": "h264", "width": 1080, "height": 1920},
+        )
+
+    def test_poster_and_metadata(self):
+        info = {"duration": 12.5, "bitrate": 2_000_000, "codec": "h264", "width": 800, "height": 450}
+        frame = Image.new("RGB", (800, 450), (40, 50, 60))
+        with mock.patch("uploads.posters.shutil.which", return_value="/usr/bin/tool"), \
+                mock.patch("uploads.posters.probe", return_value=info), \
+                mock.patch("uploads.posters.extract_frame", return_value=frame) as extract:
+            section = self._create()
+        self.assertEqual(extract.call_args.args[1], 1.0)
+        self.assertEqual(
+            section["video_info"],
+            {"bytes": 2048, "duration": 12.5, "width": 800, "height": 450, "bitrate": 2_000_000,
+             "color": "#28323c", "placeholder": section["video_info"]["placeholder"]},
+        )
+        self.assertEqual(sorted({entry["width"] for entry in section["video_poster"]}), [320, 640])
+
+    def test_without_ffmpeg_only_the_size_is_recorded(self):
+        with mock.patch("uploads.posters.shutil.which", return_value=None):
+            section = self._create()
+        self.assertEqual(section["video_info"]["bytes"], 2048)
+        self.assertIsNone(section["video_info"]["duration"])
+        self.assertEqual(section["video_poster"], [])
+
+
+@override_settings(MEDIA_WORKERS=0)
+class DedupStorageTest(TemporaryMediaMixin, TestCase):
+    def test_identical_uploads_share_one_file(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            first = CatalogItem.objects.create(slug="a", title_uk="А", cover_image=image_file("logo.png", (64, 64)))
+            second = CatalogItem.objects.create(slug="b", title_uk="Б", cover_image=image_file("logo-copy.png", (64, 64)))
+            other = CatalogItem.objects.create(slug="c", title_uk="В", cover_image=image_file("logo.png", (32, 32)))
+        self.assertEqual(second.cover_image.name, first.cover_image.name)
+        self.assertNotEqual(other.cover_image.name, first.cover_image.name)
+        blob = StoredBlob.objects.get(name=first.cover_image.name)
+        self.assertEqual(blob.refcount, 2)
+        self.assertEqual(blob.size, first.cover_image.size)
+
+    def test_files_are_removed_with_their_last_reference(self):
+        name = default_storage.save("section_images/a.txt", io.BytesIO(b"same bytes"))
+        self.assertEqual(default_storage.save("item_gallery/b.txt", io.BytesIO(b"same bytes")), name)
+        default_storage.delete(name)
+        self.assertTrue(default_storage.exists(name))
+        default_storage.delete(name)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_files_that_vanished_are_stored_again(self):
+        name = default_storage.save("section_images/a.txt", io.BytesIO(b"same bytes"))
+        default_storage.backend.delete(name)
+        self.assertEqual(default_storage.save("section_images/a.txt", io.BytesIO(b"same bytes")), name)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
+
+    def test_reference_dropped_during_save_stores_the_file_again(self):
+        default_storage.save("section_images/a.txt", io.BytesIO(b"same bytes"))
+        backend = default_storage.backend
+        exists = backend.exists
+
+        def deleted_meanwhile(path):
+            # The last reference goes away between the lookup and the increment
+            found = exists(path)
+            default_storage.delete(path)
+            return found
+
+        with mock.patch.object(backend, "exists", side_effect=deleted_meanwhile):
+            saved = default_storage.save("item_gallery/b.txt", io.BytesIO(b"same bytes"))
+        self.assertTrue(default_storage.exists(saved))
+        self.assertEqual(StoredBlob.objects.get().name, saved)
+        self.assertEqual(StoredBlob.objects.get().refcount, 1)
+
+    @override_settings(MEDIA_WORKERS=0)
+    def test_deleting_rows_releases_their_files(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = CatalogItem.objects.create(slug="a", title_uk="А", cover_image=image_file("logo.png", (64, 64)))
+        with self.captureOnCommitCallbacks(execute=True):
+            second = CatalogItem.objects.create(slug="b", title_uk="Б", cover_image=image_file("logo.png", (64, 64)))
+        # Derivative metadata was written to the rows in the background
+        first.refresh_from_db()
+        second.refresh_from_db()
+        name = first.cover_image.name
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+        # Derivatives went with the last reference too
+        self.assertFalse(StoredBlob.objects.exists())
+
+    @override_settings(MEDIA_WORKERS=0)
+    def test_replacing_a_file_releases_the_old_one(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = CatalogItem.objects.create(slug="a", title_uk="А", cover_image=image_file("logo.png", (64, 64)))
+        item.refresh_from_db()
+        old = item.cover_image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            item.cover_image = image_file("logo.png", (32, 32))
+            item.save()
+        self.assertFalse(default_storage.exists(old))
+        self.assertFalse(StoredBlob.objects.filter(name=old).exists())
+        self.assertTrue(default_storage.exists(item.cover_image.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            item.title_uk = "Б"
+            item.save()
+        self.assertTrue(default_storage.exists(item.cover_image.name))
+
+    def test_rows_keep_files_stored_before_deduplication(self):
+        name = default_storage.backend.save("catalog/covers/old.txt", io.BytesIO(b"legacy"))
+        item = CatalogItem.objects.create(slug="a", title_uk="А")
+        CatalogItem.objects.filter(pk=item.pk).update(cover_image=name)
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogItem.objects.get(pk=item.pk).delete()
+        self.assertTrue(default_storage.exists(name))
+
+    def test_files_stored_before_deduplication_are_deleted_directly(self):
+        name = default_storage.backend.save("section_images/old.txt", io.BytesIO(b"legacy"))
+        default_storage.delete(name)
+        self.assertFalse(default_storage.exists(name))
@@ -0,0 +1,147 @@
+"""
+Media files from local storage, for deployments without Cloudinary.
+
+Unlike ``django.views.static.serve`` the file is streamed (never read into
+memory) and byte ranges are honoured, so browsers can seek in hero videos
+and resume large PDF downloads:
+
+* ``Range: bytes=a-b`` / ``bytes=a-`` / ``bytes=-n`` -> 206 with
+  ``Content-Range``; unsatisfiable ranges -> 416. Multi-range requests get
+  the whole file (allowed by RFC 9110).
+* ``If-Range`` with a stale ETag or date -> the whole file.
+* ETag / Last-Modified revalidation -> 304.
+
+Responses keep the open file as ``file_to_stream`` so WSGI servers with a
+``wsgi.file_wrapper`` (gunicorn) can sendfile() it, ranges included.
+Derivatives live in folders named after the hash of their source, so they
+are cached for MEDIA_CACHE_MAX_AGE as immutable. Originals are not: once a
+file is deleted its name can be handed to a different upload, so they are
+cached for MEDIA_ORIGINAL_MAX_AGE and then revalidated. Error responses
+(416) are not cached.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from django.views import View
+
+from .derivatives import is_content_hashed
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) of a single-range ``Range`` header, None to
+    serve the whole file, or ``False`` when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        return (max(0, size - length), size - 1) if length else False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return False
+    if start > end:
+        return None
+    return start, end
+
+
+def if_range_matches(header, etag, mtime):
+    if header.startswith(('"', 'W/')):
+        # Strong comparison: weak validators never match
+        return header == etag
+    since = parse_http_date_safe(header)
+    return since is not None and since == mtime
+
+
+class FileRange:
+    """
+    ``length`` bytes of an open file from its current position. fileno() is
+    kept so sendfile() still applies; servers bound it by Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class MediaView(View):
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+            stat = os.stat(full_path)
+        except OSError:
+            raise Http404('File not found')
+        if not os.path.isfile(full_path):
+            raise Http404('File not found')
+
+        size, mtime = stat.st_size, int(stat.st_mtime)
+        etag = quote_etag(f'{stat.st_mtime_ns:x}-{size:x}')
+        response = get_conditional_response(request, etag=etag, last_modified=mtime)
+        if response is None:
+            response = self.file_response(request, full_path, size, etag, mtime)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        response['Accept-Ranges'] = 'bytes'
+        if response.status_code in (200, 206, 304):
+            if is_content_hashed(path):
+                patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True)
+            else:
+                patch_cache_control(response, public=True, max_age=settings.MEDIA_ORIGINAL_MAX_AGE)
+        return response
+
+    def file_response(self, request, full_path, size, etag, mtime):
+        content_type, encoding = mimetypes.guess_type(full_path)
+        if encoding:
+            # Never let the browser transparently decompress an uploaded .gz
+            content_type = 'application/octet-stream'
+        content_type = content_type or 'application/octet-stream'
+
+        byte_range = None
+        if 'Range' in request.headers:
+            if_range = request.headers.get('If-Range')
+            if if_range is None or if_range_matches(if_range, etag, mtime):
+                byte_range = parse_range(request.headers['Range'], size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        file = open(full_path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = byte_range
+            file.seek(start)
+            response = FileResponse(FileRange(file, end - start + 1), status=206, content_type=content_type)
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.block_size = BLOCK_SIZE
+        return response
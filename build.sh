@@ -17,6 +17,13 @@ python manage.py collectstatic --no-input
 
 echo "==> Running database migrations..."
 python manage.py migrate
+python manage.py createcachetable
+
+echo "==> Rebuilding page snapshots..."
+python manage.py rebuild_page_snapshots
+
+echo "==> Rebuilding search index..."
+python manage.py rebuild_search_index
 
 echo "==> Creating superuser if not exists..."
 python manage.py shell << END
@@ -0,0 +1,30 @@
+// Data inlined into index.html by the Django shell view (core/shell.py),
+// so the first screen renders without waiting for an API round-trip.
+let bootstrap;
+
+function readBootstrap() {
+  if (bootstrap === undefined) {
+    const element = document.getElementById('bootstrap-data');
+    try {
+      bootstrap = element ? JSON.parse(element.textContent) : {};
+    } catch (error) {
+      bootstrap = {};
+    }
+  }
+  return bootstrap;
+}
+
+// Inlined payload of the page or catalog item with this slug. Each entry is
+// handed out once: later visits to the same route fetch fresh data.
+export function takeBootstrap(kind, slug) {
+  const data = readBootstrap();
+  const entry = data[kind];
+  if (!entry || entry.slug !== slug) return null;
+  data[kind] = null;
+  return entry.data;
+}
+
+export function bootstrapNavigation() {
+  const navigation = readBootstrap().navigation;
+  return navigation ? navigation.categories : null;
+}
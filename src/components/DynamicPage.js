@@ -1,20 +1,31 @@
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useEffect, useContext, useRef } from 'react';
 import { LanguageContext } from '../LanguageContext';
+import { takeBootstrap } from '../bootstrap';
 import Section from './Section';
 import { HeroSkeleton, SectionSkeleton } from './Skeleton';
 
 const DynamicPage = ({ slug }) => {
   const { language } = useContext(LanguageContext);
   const isUk = language === 'uk';
-  const [page, setPage] = useState(null);
-  const [loading, setLoading] = useState(true);
+  const inlined = useRef(undefined);
+  if (inlined.current === undefined) {
+    inlined.current = takeBootstrap('page', slug);
+  }
+  const [page, setPage] = useState(inlined.current);
+  const [loading, setLoading] = useState(!inlined.current);
   const [error, setError] = useState(null);
 
   useEffect(() => {
+    // The shell inlined this page (both languages) on first load
+    if (inlined.current) {
+      inlined.current = null;
+      return;
+    }
+
     const fetchPage = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`/api/pages/${slug}/`);
+        const response = await fetch(`/api/pages/${slug}/?lang=${language}`);
         
         if (!response.ok) {
           throw new Error('Page not found');
@@ -35,7 +46,7 @@ const DynamicPage = ({ slug }) => {
     if (slug) {
       fetchPage();
     }
-  }, [slug]);
+  }, [slug, language]);
 
   const title = page ? (isUk ? page.title_uk : page.title_en) : '';
   const description = page ? (isUk ? page.description_uk : page.description_en) : '';
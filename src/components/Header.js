@@ -3,6 +3,7 @@ import { useLocation, NavLink, useNavigate } from "react-router-dom";
 import { HiMenu, HiX } from "react-icons/hi";
 import { LanguageContext } from "../LanguageContext";
 import { API_BASE } from "../config";
+import { bootstrapNavigation } from "../bootstrap";
 import { AuthContext } from "../context/AuthContext";
 import { motion, AnimatePresence } from "framer-motion";
 import { FaMountainSun } from "react-icons/fa6";
@@ -182,7 +183,7 @@ function Header() {
   const { user, logout } = useContext(AuthContext);
   const { language, toggleLanguage } = useContext(LanguageContext);
 
-  const [dynamicPages, setDynamicPages] = useState([]);
+  const [navigation, setNavigation] = useState(() => bootstrapNavigation() || []);
 
   useEffect(() => {
     if (menuOpen) {
@@ -204,67 +205,39 @@ function Header() {
   }, [menuOpen]);
 
   useEffect(() => {
-    const fetchPages = async () => {
+    if (bootstrapNavigation()) return;
+    const fetchNavigation = async () => {
       try {
-        const response = await fetch(`${API_BASE}/api/pages/?menu=true`);
+        const response = await fetch(`${API_BASE}/api/navigation/`);
         if (response.ok) {
           const data = await response.json();
-          setDynamicPages(data || []);
+          setNavigation(data.categories || []);
         }
       } catch (error) {
-        console.error("Failed to fetch dynamic pages:", error);
+        console.error("Failed to fetch navigation:", error);
       }
     };
-    fetchPages();
+    fetchNavigation();
   }, []);
 
   const allLinks = React.useMemo(() => {
-    const aboutPages = (dynamicPages || []).filter(p => p.menu_category === 'about').map(page => ({
-      labelUk: page.title_uk,
-      labelEn: page.title_en,
-      path: `/pages/${page.slug}`,
-      subLinks: []
-    }));
-
-    const economyPages = (dynamicPages || []).filter(p => p.menu_category === 'economy').map(page => ({
-      labelUk: page.title_uk,
-      labelEn: page.title_en,
-      path: `/pages/${page.slug}`,
-      subLinks: []
-    }));
-
-    const investmentPages = (dynamicPages || []).filter(p => p.menu_category === 'investment').map(page => ({
-      labelUk: page.title_uk,
-      labelEn: page.title_en,
-      path: `/pages/${page.slug}`,
-      subLinks: []
-    }));
-
     return (menuLinks || []).map(link => {
-      if (link.path === '/about') {
-        const uniqueSubLinks = [...(link.subLinks || [])];
-        aboutPages.forEach(p => {
-          if (!uniqueSubLinks.some(s => s.path === p.path)) uniqueSubLinks.push(p);
-        });
-        return { ...link, subLinks: uniqueSubLinks };
-      }
-      if (link.path === '/economy') {
-        const uniqueSubLinks = [...(link.subLinks || [])];
-        economyPages.forEach(p => {
-          if (!uniqueSubLinks.some(s => s.path === p.path)) uniqueSubLinks.push(p);
-        });
-        return { ...link, subLinks: uniqueSubLinks };
-      }
-      if (link.path === '/investment') {
-        const uniqueSubLinks = [...(link.subLinks || [])];
-        investmentPages.forEach(p => {
-          if (!uniqueSubLinks.some(s => s.path === p.path)) uniqueSubLinks.push(p);
-        });
-        return { ...link, subLinks: uniqueSubLinks };
-      }
-      return link;
+      const category = (navigation || []).find(c => c.path === link.path);
+      if (!category) return link;
+      const uniqueSubLinks = [...(link.subLinks || [])];
+      category.children.forEach(page => {
+        if (!uniqueSubLinks.some(s => s.path === page.path)) {
+          uniqueSubLinks.push({
+            labelUk: page.title_uk,
+            labelEn: page.title_en,
+            path: page.path,
+            subLinks: []
+          });
+        }
+      });
+      return { ...link, subLinks: uniqueSubLinks };
     });
-  }, [dynamicPages]);
+  }, [navigation]);
 
   return (
     <>
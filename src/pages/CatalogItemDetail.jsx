@@ -1,13 +1,19 @@
 import { useParams, Link } from "react-router-dom";
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { API_BASE } from "../config";
+import { takeBootstrap } from "../bootstrap";
 
 export default function CatalogItemDetail() {
   const { slug } = useParams();
-  const [item, setItem] = useState(null);
-  const [loading, setLoading] = useState(true);
+  const [item, setItem] = useState(() => takeBootstrap("catalogItem", slug));
+  const [loading, setLoading] = useState(!item);
+  const inlinedSlug = useRef(item ? slug : null);
 
   useEffect(() => {
+    if (inlinedSlug.current === slug) {
+      inlinedSlug.current = null;
+      return;
+    }
     fetch(`${API_BASE}/api/catalog/catalog-items/${slug}/`)
       .then((res) => {
         if (!res.ok) throw new Error("Not found");
@@ -33,7 +33,8 @@ export default function CatalogPage() {
         setRetryIn(null);
         clearRetryTimer();
 
-        const res = await fetch(`${API_BASE}/api/catalog/catalog-items/`);
+        // The whole catalog in one unpaginated response (see backend/core/streaming.py)
+        const res = await fetch(`${API_BASE}/api/catalog/catalog-items/?stream=1`);
 
         // Handle DRF throttling gracefully (429)
         if (res.status === 429) {
@@ -77,7 +78,7 @@ export default function CatalogPage() {
 
         const data = await res.json();
         if (!cancelled) {
-          setItems(Array.isArray(data) ? data : []);
+          setItems(Array.isArray(data) ? data : data.results || []);
         }
       } catch (e) {
         console.error("Catalog fetch failed", e);
@@ -1,15 +1,18 @@
-import React, { useState, useContext, useEffect } from "react";
+import React, { useState, useContext, useEffect, useRef } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import videoBg from "../assets/background-video.mp4";
 import { LanguageContext } from "../LanguageContext";
 import Section from "../components/Section";
+import { takeBootstrap } from "../bootstrap";
 
 function Home() {
   const [isVideoLoaded, setIsVideoLoaded] = useState(false);
   const { language } = useContext(LanguageContext);
-  const [homeData, setHomeData] = useState(null);
+  const [homeData, setHomeData] = useState(() => takeBootstrap("page", "home"));
+  const inlined = useRef(homeData !== null);
 
   useEffect(() => {
+    if (inlined.current) return;
     // Attempt to fetch dynamic content for home if it exists
     fetch("/api/pages/home/")
       .then(res => res.ok ? res.json() : null)
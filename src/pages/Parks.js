@@ -13,7 +13,8 @@ export default function Parks() {
     const run = async () => {
       try {
         setHint("");
-        const res = await fetch(`${API_BASE}/api/catalog/catalog-items/`);
+        // The whole catalog in one unpaginated response (see backend/core/streaming.py)
+        const res = await fetch(`${API_BASE}/api/catalog/catalog-items/?stream=1`);
 
         if (res.status === 429) {
           if (alive) setHint("Забагато запитів. Спробуй ще раз через 30–40 секунд.");
@@ -25,7 +26,7 @@ export default function Parks() {
         const data = await res.json();
         if (!alive) return;
 
-        setItems(Array.isArray(data) ? data : []);
+        setItems(Array.isArray(data) ? data : data.results || []);
       } catch (e) {
         if (alive) setHint("Не вдалося завантажити дані каталогу.");
       } finally {